@@ -0,0 +1,119 @@
+import logging
+from dataclasses import dataclass, field
+from typing import Any
+
+from langchain_core.messages import HumanMessage
+
+from config.state import SessionState
+from core.llm import LLMClient, content_text
+from utils.logger import configure_logging
+
+configure_logging()
+LOGGER = logging.getLogger("context_window")
+LOGGER.setLevel(logging.INFO)
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token) that needs no tokenizer round-trip."""
+    return len(text) // 4 + 1
+
+
+@dataclass
+class ContextSelection:
+    """The part of a session's history that goes into the prompt."""
+
+    summary: str
+    messages: list[dict[str, Any]] = field(default_factory=list)
+    full_tokens: int = 0
+    used_tokens: int = 0
+
+    @property
+    def saved_tokens(self) -> int:
+        return max(self.full_tokens - self.used_tokens, 0)
+
+
+class ContextWindow:
+    """Keeps prompts within a token budget by folding older turns into a rolling summary.
+
+    The most recent messages are sent verbatim; everything before `state.summarized_count` is
+    represented by `state.summary`, which is extended incrementally with newly overflowing
+    messages instead of being regenerated from the full history.
+    """
+
+    summary_prompt = (
+        "You maintain a running summary of a conversation between a user and a thesis "
+        "assistant. Update the summary with the new messages below. Keep names, definitions, "
+        "numbers and open questions; drop pleasantries. Reply with the updated summary only.\n\n"
+        "Current summary:\n{summary}\n\nNew messages:\n{messages}"
+    )
+
+    def __init__(self, llm: LLMClient, token_budget: int, retain_ratio: float = 0.5):
+        self.llm = llm
+        self.token_budget = token_budget
+        # After folding, recent messages fill only this share of the budget, so the summary is
+        # refreshed every few turns rather than on every turn.
+        self.retain_ratio = retain_ratio
+        self.tokens_saved_total = 0
+
+    @staticmethod
+    def _window_start(state: SessionState, budget: int) -> int:
+        """Index of the oldest unsummarized message that still fits in the budget."""
+        history = state.conversation_history
+        start = len(history)
+        used = 0
+        for index in range(len(history) - 1, -1, -1):
+            if state.history_offset + index < state.summarized_count:
+                break
+            tokens = estimate_tokens(history[index]["content"])
+            if used + tokens > budget:
+                break
+            used += tokens
+            start = index
+        # Open the window on a user message so the model never sees half a turn.
+        while start < len(history) and history[start]["role"] != "user":
+            start += 1
+        return start
+
+    def select(self, state: SessionState) -> ContextSelection:
+        """Choose the summary and recent messages to send for this turn."""
+        summary_tokens = estimate_tokens(state.summary) if state.summary else 0
+        start = self._window_start(state, self.token_budget - summary_tokens)
+        messages = state.conversation_history[start:]
+        selection = ContextSelection(
+            summary=state.summary,
+            messages=messages,
+            full_tokens=sum(estimate_tokens(m["content"]) for m in state.conversation_history),
+            used_tokens=summary_tokens + sum(estimate_tokens(m["content"]) for m in messages),
+        )
+        self.tokens_saved_total += selection.saved_tokens
+        if selection.saved_tokens:
+            LOGGER.info(
+                f"Context window kept {len(messages)}/{len(state.conversation_history)} messages, "
+                f"saved ~{selection.saved_tokens} tokens"
+            )
+        return selection
+
+    async def refresh_summary(self, state: SessionState) -> None:
+        """Fold messages that no longer fit in the budget into the session summary."""
+        history = state.conversation_history
+        unsummarized_from = max(state.summarized_count - state.history_offset, 0)
+        pending_tokens = sum(estimate_tokens(m["content"]) for m in history[unsummarized_from:])
+        summary_tokens = estimate_tokens(state.summary) if state.summary else 0
+        if pending_tokens + summary_tokens <= self.token_budget:
+            return
+
+        cutoff = self._window_start(state, int(self.token_budget * self.retain_ratio))
+        to_fold = history[unsummarized_from:cutoff]
+        if not to_fold:
+            return
+
+        transcript = "\n".join(f"{m['role']}: {m['content']}" for m in to_fold)
+        prompt = self.summary_prompt.format(summary=state.summary or "(none)", messages=transcript)
+        try:
+            response = await self.llm.ainvoke([HumanMessage(content=prompt)])
+        except Exception:
+            LOGGER.exception("Summary refresh failed; keeping the previous summary.")
+            return
+        state.summary = content_text(response)
+        state.summarized_count = state.history_offset + cutoff
+        LOGGER.info(f"Folded {len(to_fold)} messages into the session summary")
@@ -0,0 +1,120 @@
+"""Compact handling of retrieved chunks: references in state, rendered text for the LLM."""
+
+import asyncio
+from typing import Any
+
+from core.embedding_cache import normalize_text
+from memory.milvus_manager import MilvusManager
+from utils.cache import LRUCache
+
+
+def chunk_refs(hits: list[dict]) -> list[dict[str, Any]]:
+    """Reference each distinct hit in rank order.
+
+    `chunk_id` is the fast lookup; `source` and `chunk_hash` find the chunk again after a
+    re-ingest stored it under a new ID.
+    """
+    refs: dict[Any, dict[str, Any]] = {}
+    for hit in hits:
+        entity = hit["entity"]
+        refs.setdefault(
+            hit["id"],
+            {
+                "chunk_id": hit["id"],
+                "page_number": entity.get("page_number"),
+                "source": entity.get("source"),
+                "chunk_hash": entity.get("chunk_hash"),
+            },
+        )
+    return list(refs.values())
+
+
+def merge_refs(*ref_lists: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Concatenate reference lists, keeping the first occurrence of each chunk."""
+    merged: dict[Any, dict[str, Any]] = {}
+    for refs in ref_lists:
+        for ref in refs:
+            merged.setdefault(ref["chunk_id"], ref)
+    return list(merged.values())
+
+
+def render_contexts(hits: list[dict], max_chars: int | None = None) -> str:
+    """Render hits as one plain-text block for the LLM.
+
+    Chunks repeated by ID or by text are sent once, and each is cut to `max_chars`.
+    """
+    seen_ids: set[Any] = set()
+    seen_texts: set[str] = set()
+    blocks: list[str] = []
+    for hit in hits:
+        text = hit["entity"]["text_content"]
+        normalized = normalize_text(text)
+        if hit["id"] in seen_ids or normalized in seen_texts:
+            continue
+        seen_ids.add(hit["id"])
+        seen_texts.add(normalized)
+        if max_chars is not None and len(text) > max_chars:
+            text = text[:max_chars].rstrip() + "…"
+        page = hit["entity"].get("page_number")
+        blocks.append(f"[{len(blocks) + 1}] (page {page})\n{text}")
+    return "\n\n".join(blocks) or "No relevant passages found."
+
+
+class ChunkStore:
+    """Chunk text by ID for clients that need more than the references kept in state.
+
+    Reads go through `cache` (the retrieval cache's chunk layer when it is enabled), so
+    chunks the agent just retrieved are served from memory.
+    """
+
+    def __init__(self, milvus_manager: MilvusManager, cache: LRUCache):
+        self.milvus_manager = milvus_manager
+        self.cache = cache
+
+    async def aget(self, ids: list[int]) -> dict[int, dict]:
+        """Return {id: {"text_content", "page_number", ...}} for the chunks that exist."""
+        chunks, missing = {}, []
+        for chunk_id in dict.fromkeys(ids):
+            if (entity := self.cache.get(chunk_id)) is None:
+                missing.append(chunk_id)
+            else:
+                chunks[chunk_id] = entity
+        if missing:
+            loop = asyncio.get_running_loop()
+            fetched = await loop.run_in_executor(
+                self.milvus_manager.executor, self.milvus_manager.get_chunks, missing
+            )
+            for chunk_id, entity in fetched.items():
+                self.cache.set(chunk_id, entity)
+            chunks.update(fetched)
+        return chunks
+
+    async def aresolve(self, refs: list[dict]) -> list[dict]:
+        """Resolve chunk references to their text, in order.
+
+        References whose ID is gone are looked up by `source` and `chunk_hash`; those that
+        still cannot be found come back as `{"chunk_id": ..., "missing": True}`.
+        """
+        by_id = await self.aget([ref["chunk_id"] for ref in refs])
+        keys = [
+            (ref["source"], ref["chunk_hash"])
+            for ref in refs
+            if ref["chunk_id"] not in by_id and ref.get("source") and ref.get("chunk_hash")
+        ]
+        by_key: dict[tuple, dict] = {}
+        if keys:
+            loop = asyncio.get_running_loop()
+            by_key = await loop.run_in_executor(
+                self.milvus_manager.executor, self.milvus_manager.find_chunks, keys
+            )
+        resolved = []
+        for ref in refs:
+            chunk = by_id.get(ref["chunk_id"]) or by_key.get(
+                (ref.get("source"), ref.get("chunk_hash"))
+            )
+            if chunk is None:
+                resolved.append({"chunk_id": ref["chunk_id"], "missing": True})
+            else:
+                fields = {field: value for field, value in chunk.items() if field != "id"}
+                resolved.append({"chunk_id": ref["chunk_id"], **fields})
+        return resolved
@@ -2,11 +2,24 @@
 
 from functools import lru_cache
 
+from psycopg_pool import AsyncConnectionPool
+
+from agent.context_window import ContextWindow
+from agent.contexts import ChunkStore
+from agent.prefetch import RetrievalPrefetcher
 from agent.rag_agent import OrchestrateRAGAgent, ReactRAGAgent, Retriever
+from agent.retrieval_cache import RetrievalCache
+from agent.router import QueryRouter
+from agent.semantic_cache import SemanticAnswerCache
+from config.settings import settings
 from core.embedder import EmbeddingClient
 from core.llm import LLMClient
+from core.reranker import CrossEncoderReranker
+from memory.lexical_index import LexicalIndex
 from memory.milvus_manager import MilvusManager
-from memory.postgres import PostgresClient
+from memory.postgres import PostgresClient, create_postgres_pool
+from memory.session_cache import SessionStateCache
+from utils.cache import LRUCache
 
 
 @lru_cache
@@ -27,13 +40,41 @@ def get_llm_client() -> LLMClient:
     return LLMClient()
 
 
+@lru_cache
+def get_postgres_pool() -> AsyncConnectionPool:
+    """Get or create the singleton Postgres connection pool, shared by every Postgres user.
+
+    :return: The singleton AsyncConnectionPool instance.
+    """
+    return create_postgres_pool()
+
+
 @lru_cache
 def get_postgres_client() -> PostgresClient:
     """Get or create the singleton PostgresClient instance.
 
     :return: The singleton PostgresClient instance.
     """
-    return PostgresClient()
+    return PostgresClient(pool=get_postgres_pool())
+
+
+@lru_cache
+def get_session_cache() -> SessionStateCache | None:
+    """Get or create the singleton SessionStateCache, or None when it is disabled.
+
+    :return: The singleton SessionStateCache instance.
+    """
+    if not settings.SESSION_CACHE_ENABLED:
+        return None
+    return SessionStateCache(
+        postgres_client=get_postgres_client(),
+        max_sessions=settings.SESSION_CACHE_MAX_SESSIONS,
+        write_mode=settings.SESSION_WRITE_MODE,
+        flush_interval_seconds=settings.SESSION_FLUSH_INTERVAL_MS / 1000,
+        flush_batch_size=settings.SESSION_FLUSH_BATCH_SIZE,
+        ttl_seconds=settings.SESSION_CACHE_TTL_SECONDS,
+        max_history=settings.CONVERSATION_HISTORY_LIMIT,
+    )
 
 
 @lru_cache
@@ -45,13 +86,137 @@ def get_milvus_manager() -> MilvusManager:
     return MilvusManager()
 
 
+@lru_cache
+def get_reranker() -> CrossEncoderReranker | None:
+    """Get or create the singleton reranker, or None when reranking is disabled.
+
+    :return: The singleton CrossEncoderReranker instance.
+    """
+    if not settings.RERANK_ENABLED:
+        return None
+    return CrossEncoderReranker(
+        model_name=settings.RERANK_MODEL_NAME,
+        batch_size=settings.RERANK_BATCH_SIZE,
+        timeout_seconds=settings.RERANK_TIMEOUT_SECONDS,
+    )
+
+
+@lru_cache
+def get_retrieval_cache() -> RetrievalCache | None:
+    """Get or create the singleton RetrievalCache, or None when it is disabled.
+
+    :return: The singleton RetrievalCache instance.
+    """
+    if not settings.RETRIEVAL_CACHE_ENABLED:
+        return None
+    return RetrievalCache(
+        milvus_manager=get_milvus_manager(),
+        max_results=settings.RETRIEVAL_CACHE_MAX_ENTRIES,
+        max_chunks=settings.CHUNK_CACHE_MAX_ENTRIES,
+        ttl_seconds=settings.RETRIEVAL_CACHE_TTL_SECONDS,
+    )
+
+
+@lru_cache
+def get_chunk_store() -> ChunkStore:
+    """Get or create the singleton ChunkStore, sharing the retrieval cache's chunk layer.
+
+    :return: The singleton ChunkStore instance.
+    """
+    retrieval_cache = get_retrieval_cache()
+    return ChunkStore(
+        milvus_manager=get_milvus_manager(),
+        cache=(
+            retrieval_cache.chunks
+            if retrieval_cache
+            else LRUCache(max_size=settings.CHUNK_CACHE_MAX_ENTRIES)
+        ),
+    )
+
+
 @lru_cache
 def get_retriever() -> Retriever:
     """Get or create the singleton Retriever instance.
 
     :return: The singleton Retriever instance.
     """
-    return Retriever(milvus_manager=get_milvus_manager(), embedder=get_embedding_client())
+    hybrid = settings.RETRIEVAL_MODE == "hybrid"
+    return Retriever(
+        milvus_manager=get_milvus_manager(),
+        embedder=get_embedding_client(),
+        top_k=settings.RETRIEVAL_TOP_K,
+        lexical_index=LexicalIndex(get_milvus_manager()) if hybrid else None,
+        dense_top_k=settings.HYBRID_DENSE_TOP_K if hybrid else None,
+        sparse_top_k=settings.HYBRID_SPARSE_TOP_K if hybrid else None,
+        rrf_k=settings.HYBRID_RRF_K,
+        reranker=get_reranker(),
+        candidate_k=settings.RERANK_CANDIDATES,
+        cache=get_retrieval_cache(),
+    )
+
+
+@lru_cache
+def get_query_router() -> QueryRouter | None:
+    """Get or create the singleton QueryRouter, or None when routing is disabled.
+
+    :return: The singleton QueryRouter instance.
+    """
+    if not settings.ROUTING_ENABLED:
+        return None
+    return QueryRouter(
+        milvus_manager=get_milvus_manager(),
+        embedder=get_embedding_client(),
+        threshold=settings.ROUTING_CENTROID_THRESHOLD,
+        keywords=settings.ROUTING_KEYWORDS,
+    )
+
+
+@lru_cache
+def get_retrieval_prefetcher() -> RetrievalPrefetcher | None:
+    """Get or create the singleton RetrievalPrefetcher, or None when prefetch is disabled.
+
+    :return: The singleton RetrievalPrefetcher instance.
+    """
+    if not settings.PREFETCH_ENABLED:
+        return None
+    return RetrievalPrefetcher(
+        embedder=get_embedding_client(),
+        match=settings.PREFETCH_MATCH,
+        threshold=settings.PREFETCH_SIMILARITY_THRESHOLD,
+    )
+
+
+@lru_cache
+def get_context_window() -> ContextWindow | None:
+    """Get or create the singleton ContextWindow, or None when no token budget is set.
+
+    :return: The singleton ContextWindow instance.
+    """
+    if settings.CONTEXT_TOKEN_BUDGET is None:
+        return None
+    return ContextWindow(
+        llm=get_llm_client(),
+        token_budget=settings.CONTEXT_TOKEN_BUDGET,
+        retain_ratio=settings.CONTEXT_RETAIN_RATIO,
+    )
+
+
+@lru_cache
+def get_semantic_cache() -> SemanticAnswerCache | None:
+    """Get or create the singleton SemanticAnswerCache, or None when it is disabled.
+
+    :return: The singleton SemanticAnswerCache instance.
+    """
+    if not settings.SEMANTIC_CACHE_ENABLED:
+        return None
+    return SemanticAnswerCache(
+        embedder=get_embedding_client(),
+        milvus_manager=get_milvus_manager(),
+        threshold=settings.SEMANTIC_CACHE_THRESHOLD,
+        max_size=settings.SEMANTIC_CACHE_MAX_ENTRIES,
+        ttl_seconds=settings.SEMANTIC_CACHE_TTL_SECONDS,
+        min_words=settings.SEMANTIC_CACHE_MIN_WORDS,
+    )
 
 
 @lru_cache
@@ -60,7 +225,15 @@ def get_react_rag_agent() -> ReactRAGAgent:
 
     :return: The singleton ReactRAGAgent instance.
     """
-    return ReactRAGAgent(llm=get_llm_client(), retriever=get_retriever())
+    return ReactRAGAgent(
+        llm=get_llm_client(),
+        retriever=get_retriever(),
+        context_window=get_context_window(),
+        answer_cache=get_semantic_cache(),
+        router=get_query_router(),
+        prefetcher=get_retrieval_prefetcher(),
+        chunk_max_chars=settings.CONTEXT_CHUNK_MAX_CHARS,
+    )
 
 
 @lru_cache
@@ -70,5 +243,6 @@ def get_orchestrate_rag_agent() -> OrchestrateRAGAgent:
     :return: The singleton OrchestrateRAGAgent instance.
     """
     return OrchestrateRAGAgent(
-        react_rag_agent=get_react_rag_agent(), postgres_client=get_postgres_client()
+        react_rag_agent=get_react_rag_agent(),
+        session_store=get_session_cache() or get_postgres_client(),
     )
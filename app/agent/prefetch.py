@@ -0,0 +1,103 @@
+import asyncio
+import logging
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Literal
+
+import numpy as np
+
+from core.embedder import EmbeddingClient
+from memory.lexical_index import tokenize
+from utils.cache import CacheStats
+from utils.logger import configure_logging
+
+configure_logging()
+LOGGER = logging.getLogger("prefetch")
+LOGGER.setLevel(logging.INFO)
+
+MatchMode = Literal["exact", "similarity"]
+
+
+@dataclass
+class Prefetch:
+    question: str
+    task: asyncio.Future
+    used: bool = False
+
+
+# The prefetch of the agent run in progress; tool calls inherit it through the asyncio context.
+CURRENT_PREFETCH: ContextVar[Prefetch | None] = ContextVar("retrieval_prefetch", default=None)
+
+
+def discard(task: asyncio.Future) -> None:
+    """Cancel a speculative task whose result is no longer wanted."""
+    task.cancel()
+    # Retrieve the outcome so a failure that beat the cancellation is not reported as unhandled.
+    task.add_done_callback(lambda done: done.cancelled() or done.exception())
+
+
+class RetrievalPrefetcher:
+    """Lets the retrieval tool reuse a search started for the user input before the agent ran.
+
+    The agent usually asks for context on the user's own question, so searching for it while
+    the first LLM call is still planning hides the embedding and Milvus latency. A tool call
+    reuses the prefetched hits when its question matches: in `exact` mode after case and
+    punctuation normalisation, in `similarity` mode also when the two question embeddings are
+    at least `threshold` cosine-similar.
+    """
+
+    def __init__(
+        self,
+        embedder: EmbeddingClient,
+        match: MatchMode = "exact",
+        threshold: float = 0.9,
+    ):
+        self.embedder = embedder
+        self.match = match
+        self.threshold = threshold
+        # hits count reused prefetches, misses tool calls that searched again, and evictions
+        # prefetches that no tool call used
+        self.stats = CacheStats()
+
+    @contextmanager
+    def prefetching(self, question: str, task: asyncio.Future) -> Iterator[None]:
+        """Offer `task` to tool calls made inside the block; discard it if none used it."""
+        prefetch = Prefetch(question=question, task=task)
+        CURRENT_PREFETCH.set(prefetch)
+        try:
+            yield
+        finally:
+            CURRENT_PREFETCH.set(None)
+            if not prefetch.used:
+                self.stats.evictions += 1
+                discard(task)
+
+    async def matches(self, prefetched: str, question: str) -> bool:
+        if tokenize(prefetched) == tokenize(question):
+            return True
+        if self.match != "similarity":
+            return False
+        vectors = np.asarray(await self.embedder.aembed_queries([prefetched, question]))
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True).clip(min=1e-12)
+        return float(vectors[0] @ vectors[1]) >= self.threshold
+
+    async def claim(self, queries: list[str]) -> list[dict] | None:
+        """Return the prefetched hits if they answer this tool call, else None."""
+        prefetch = CURRENT_PREFETCH.get()
+        if prefetch is None:
+            return None
+        # A multi-query call fuses several rankings, which one prefetched search cannot replace.
+        if len(queries) != 1 or not await self.matches(prefetch.question, queries[0]):
+            self.stats.misses += 1
+            return None
+        try:
+            hits = await asyncio.shield(prefetch.task)
+        except Exception as e:
+            LOGGER.warning(f"Prefetched retrieval failed ({e}); searching again")
+            self.stats.misses += 1
+            return None
+        prefetch.used = True
+        self.stats.hits += 1
+        return hits
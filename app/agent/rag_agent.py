@@ -1,64 +1,273 @@
-import json
+import asyncio
 import logging
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterator
+from contextlib import contextmanager
+from functools import partial
 from typing import Any
 
 from langchain.agents import create_agent
-from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
 from langchain_core.tools import StructuredTool
 from pydantic import BaseModel, Field
 
+from agent.context_window import ContextWindow
+from agent.contexts import chunk_refs, merge_refs, render_contexts
+from agent.prefetch import RetrievalPrefetcher, discard
+from agent.retrieval_cache import RetrievalCache
+from agent.router import QueryRouter, RouteDecision
+from agent.semantic_cache import SemanticAnswerCache
+from config.settings import settings
 from config.state import SessionState
 from core.embedder import EmbeddingClient
-from core.llm import LLMClient
+from core.llm import LLMClient, content_text
+from core.reranker import CrossEncoderReranker
+from memory.lexical_index import LexicalIndex
 from memory.milvus_manager import MilvusManager
 from memory.postgres import PostgresClient
+from memory.session_cache import SessionStateCache
 from utils.logger import configure_logging
+from utils.metrics import (
+    ROUTE_DECISIONS,
+    ROUTE_FALLBACK_OUTCOMES,
+    ROUTE_SECONDS,
+    LLMMetricsCallback,
+    timed,
+)
 
 configure_logging()
 LOGGER = logging.getLogger("rag_agent")
 LOGGER.setLevel(logging.INFO)
 
 
+def reciprocal_rank_fusion(result_lists: list[list[dict]], k: int = 60) -> list[dict]:
+    """Fuse ranked hit lists by summing 1 / (k + rank) per primary key."""
+    scores: dict[Any, float] = {}
+    hits: dict[Any, dict] = {}
+    for results in result_lists:
+        for rank, hit in enumerate(results, start=1):
+            scores[hit["id"]] = scores.get(hit["id"], 0.0) + 1.0 / (k + rank)
+            hits.setdefault(hit["id"], hit)
+    return [hits[hit_id] for hit_id in sorted(scores, key=scores.__getitem__, reverse=True)]
+
+
 class Retriever:
-    """Milvus cosine retriever."""
+    """Milvus cosine retriever, optionally fused with a BM25 lexical index and reranked.
+
+    With a reranker, `candidate_k` hits are fetched and the cross-encoder keeps the best `top_k`.
+    """
 
     def __init__(
-        self, milvus_manager: MilvusManager, embedder: EmbeddingClient = None, top_k: int = 5
+        self,
+        milvus_manager: MilvusManager,
+        embedder: EmbeddingClient = None,
+        top_k: int = 5,
+        lexical_index: LexicalIndex | None = None,
+        dense_top_k: int | None = None,
+        sparse_top_k: int | None = None,
+        rrf_k: int = 60,
+        reranker: CrossEncoderReranker | None = None,
+        candidate_k: int | None = None,
+        cache: RetrievalCache | None = None,
     ):
         self.embedder = embedder
+        self.cache = cache
         self.top_k = top_k
+        self.reranker = reranker
+        self.candidate_k = max(candidate_k or top_k, top_k) if reranker else top_k
         self.milvus_manager = milvus_manager
+        self.lexical_index = lexical_index
+        self.dense_top_k = dense_top_k or top_k
+        self.sparse_top_k = sparse_top_k or top_k
+        self.rrf_k = rrf_k
+
+    @staticmethod
+    def _extract_contexts(hits: list[dict]) -> list[str]:
+        """Extract the text content of search hits."""
+        return [hit["entity"]["text_content"] for hit in hits]
+
+    def _fuse(self, dense_hits: list[dict], sparse_hits: list[dict]) -> list[dict]:
+        return reciprocal_rank_fusion([dense_hits, sparse_hits], k=self.rrf_k)[: self.candidate_k]
+
+    async def warm_up(self) -> None:
+        """Build in-memory indexes and load the reranker ahead of the first request."""
+        if self.lexical_index:
+            await self.lexical_index.refresh()
+        if self.reranker:
+            await self.reranker.warm_up()
+
+    def _candidates(self, query: str) -> list[dict]:
+        if not self.lexical_index:
+            return self.milvus_manager.search(query, self.embedder, limit=self.candidate_k)[0]
+        dense_hits = self.milvus_manager.search(query, self.embedder, limit=self.dense_top_k)[0]
+        sparse_hits = self.lexical_index.search(query, self.sparse_top_k)
+        return self._fuse(dense_hits, sparse_hits)
+
+    async def _acandidates(self, query: str) -> list[dict]:
+        if not self.lexical_index:
+            limit = self.candidate_k
+            return (await self.milvus_manager.asearch(query, self.embedder, limit=limit))[0]
+        dense_results, sparse_hits = await asyncio.gather(
+            self.milvus_manager.asearch(query, self.embedder, limit=self.dense_top_k),
+            self.lexical_index.asearch(query, self.sparse_top_k),
+        )
+        return self._fuse(dense_results[0], sparse_hits)
+
+    def search_hits(self, query: str) -> list[dict]:
+        """Return the ranked search hits for a query."""
+        return self._cached([query], partial(self._search_hits, query))
+
+    async def asearch_hits(self, query: str) -> list[dict]:
+        """Return the ranked search hits for a query without blocking the event loop."""
+        return await self._acached([query], partial(self._asearch_hits, query))
+
+    def search_many_hits(self, queries: list[str]) -> list[dict]:
+        """Return the ranked, deduplicated hits for several queries searched in one round-trip."""
+        queries = list(dict.fromkeys(queries))
+        return self._cached(queries, partial(self._search_many_hits, queries))
+
+    async def asearch_many_hits(self, queries: list[str]) -> list[dict]:
+        """Return `search_many_hits` without blocking the event loop."""
+        queries = list(dict.fromkeys(queries))
+        return await self._acached(queries, partial(self._asearch_many_hits, queries))
+
+    def _cached(self, queries: list[str], search: Callable[[], list[dict]]) -> list[dict]:
+        if self.cache and (hits := self.cache.get(queries, self.top_k)) is not None:
+            return hits
+        hits = search()
+        if self.cache:
+            self.cache.set(queries, self.top_k, hits)
+        return hits
+
+    async def _acached(
+        self, queries: list[str], search: Callable[[], Awaitable[list[dict]]]
+    ) -> list[dict]:
+        if self.cache and (hits := await self.cache.aget(queries, self.top_k)) is not None:
+            return hits
+        hits = await search()
+        if self.cache:
+            self.cache.set(queries, self.top_k, hits)
+        return hits
+
+    def _search_hits(self, query: str) -> list[dict]:
+        hits = self._candidates(query)
+        if self.reranker:
+            return self.reranker.rerank(query, hits, self.top_k)
+        return hits[: self.top_k]
+
+    async def _asearch_hits(self, query: str) -> list[dict]:
+        hits = await self._acandidates(query)
+        if self.reranker:
+            return await self.reranker.arerank(query, hits, self.top_k)
+        return hits[: self.top_k]
+
+    def _fuse_many(self, queries: list[str], result_lists: list[list[dict]]) -> list[dict]:
+        """Merge per-query hit lists into one ranking, deduplicated by primary key."""
+        if self.lexical_index:
+            result_lists = result_lists + [
+                self.lexical_index.search(query, self.sparse_top_k) for query in queries
+            ]
+        return reciprocal_rank_fusion(result_lists, k=self.rrf_k)[: self.candidate_k]
+
+    def _search_many_hits(self, queries: list[str]) -> list[dict]:
+        limit = self.dense_top_k if self.lexical_index else self.candidate_k
+        result_lists = self.milvus_manager.search_many(queries, self.embedder, limit=limit)
+        hits = self._fuse_many(queries, result_lists)
+        if self.reranker:
+            return self.reranker.rerank(queries, hits, self.top_k)
+        return hits[: self.top_k]
+
+    async def _asearch_many_hits(self, queries: list[str]) -> list[dict]:
+        limit = self.dense_top_k if self.lexical_index else self.candidate_k
+        if self.lexical_index:
+            await self.lexical_index.refresh()
+        result_lists = await self.milvus_manager.asearch_many(queries, self.embedder, limit=limit)
+        loop = asyncio.get_running_loop()
+        hits = await loop.run_in_executor(
+            self.milvus_manager.executor, self._fuse_many, queries, result_lists
+        )
+        if self.reranker:
+            return await self.reranker.arerank(queries, hits, self.top_k)
+        return hits[: self.top_k]
+
+    def retrieve_hits(self, queries: list[str]) -> list[dict]:
+        """Return the ranked hits for one query, or the fused hits for several."""
+        if len(queries) == 1:
+            return self.search_hits(queries[0])
+        return self.search_many_hits(queries)
+
+    async def aretrieve_hits(self, queries: list[str]) -> list[dict]:
+        """Return `retrieve_hits` without blocking the event loop."""
+        if len(queries) == 1:
+            return await self.asearch_hits(queries[0])
+        return await self.asearch_many_hits(queries)
 
     def retrieve(self, query: str) -> list[str]:
         """Retrieve relevant documents for a query."""
-        results = self.milvus_manager.search(query, self.embedder, limit=self.top_k)
-        contexts = []
-        for search_hits in results:
-            for search_hit in search_hits:
-                contexts.append(search_hit["entity"]["text_content"])
-        return contexts
+        return self._extract_contexts(self.search_hits(query))
+
+    async def aretrieve(self, query: str) -> list[str]:
+        """Retrieve relevant documents for a query without blocking the event loop."""
+        return self._extract_contexts(await self.asearch_hits(query))
+
+    def retrieve_many(self, queries: list[str]) -> list[str]:
+        """Retrieve relevant documents for several queries at once."""
+        return self._extract_contexts(self.retrieve_hits(queries))
+
+    async def aretrieve_many(self, queries: list[str]) -> list[str]:
+        """Retrieve relevant documents for several queries without blocking the event loop."""
+        return self._extract_contexts(await self.aretrieve_hits(queries))
 
 
 class RetrieveContextInput(BaseModel):
     question: str = Field(description="The question to retrieve context for")
+    related_questions: list[str] = Field(
+        default_factory=list,
+        description="Other questions or rephrasings to search for in the same call",
+    )
+
+
+def build_retrieval_tool(
+    retriever: Retriever,
+    prefetcher: RetrievalPrefetcher | None = None,
+    max_chars: int | None = None,
+) -> StructuredTool:
+    """Build a retrieval tool, reusing a prefetched search for the question when one matches.
 
+    The model sees the passages as compact plain text; the chunk references travel separately
+    as the ToolMessage artifact, so the text is never JSON-encoded and parsed back.
+    """
 
-def build_retrieval_tool(retriever: Retriever) -> StructuredTool:
-    """Build a retrieval tool."""
+    def respond(hits: list[dict]) -> tuple[str, list[dict[str, Any]]]:
+        LOGGER.info(f"Retrieved {len(hits)} contexts")
+        with timed("tool_serialization"):
+            return render_contexts(hits, max_chars), chunk_refs(hits)
 
-    def retrieve_fn(question: str) -> str:
+    def retrieve_fn(
+        question: str, related_questions: list[str] | None = None
+    ) -> tuple[str, list[dict[str, Any]]]:
         """Retrieve relevant documents for a question."""
         LOGGER.info(f"Tool called with question: {question}")
-        retrieved_contexts = retriever.retrieve(question)
-        LOGGER.info(f"Retrieved {len(retrieved_contexts)} contexts")
-        result = json.dumps({"retrieved_contexts": retrieved_contexts}, ensure_ascii=False)
-        return result
+        return respond(retriever.retrieve_hits([question, *(related_questions or [])]))
+
+    async def aretrieve_fn(
+        question: str, related_questions: list[str] | None = None
+    ) -> tuple[str, list[dict[str, Any]]]:
+        """Retrieve relevant documents for a question."""
+        LOGGER.info(f"Tool called with question: {question}")
+        queries = [question, *(related_questions or [])]
+        hits = await prefetcher.claim(queries) if prefetcher else None
+        if hits is None:
+            hits = await retriever.aretrieve_hits(queries)
+        return respond(hits)
 
     return StructuredTool(
         name="retrieve_context",
         description="Retrieve relevant context passages for a question and return the chunk ids",
         func=retrieve_fn,
+        coroutine=aretrieve_fn,
         args_schema=RetrieveContextInput,
+        response_format="content_and_artifact",
     )
 
 
@@ -70,12 +279,34 @@ class ReactRAGAgent:
         "Analyze the user's question and determine if it is a question about the thesis or a general question."
         "If it is a general question, answer it based on your knowledge. "
         "If it is a question about the AI, LLM, RAG, or any other AI-related topic, use the `retrieve_context` tool to fetch relevant information."
+        "When you need several searches, make a single `retrieve_context` call and pass the extra questions as `related_questions`."
         "If the knowledge base returns no relevant results, acknowledge this and provide general assistance."
     )
 
-    def __init__(self, llm: LLMClient, retriever: Retriever):
+    answer_prompt = (
+        "You are a RAG agent. Answer the user's question using the context retrieved from the knowledge base below. "
+        "If the context does not answer the question, acknowledge this and provide general assistance.\n\n"
+        "Retrieved context:\n{context}"
+    )
+
+    def __init__(
+        self,
+        llm: LLMClient,
+        retriever: Retriever,
+        context_window: ContextWindow | None = None,
+        answer_cache: SemanticAnswerCache | None = None,
+        router: QueryRouter | None = None,
+        prefetcher: RetrievalPrefetcher | None = None,
+        chunk_max_chars: int | None = None,
+    ):
+        self.llm = llm
         self.retriever = retriever
-        self.tool = build_retrieval_tool(retriever)
+        self.context_window = context_window
+        self.answer_cache = answer_cache
+        self.router = router
+        self.prefetcher = prefetcher
+        self.chunk_max_chars = chunk_max_chars
+        self.tool = build_retrieval_tool(retriever, prefetcher, chunk_max_chars)
         self.agent: Any = create_agent(
             model=llm.model, tools=[self.tool], system_prompt=self.system_prompt
         )
@@ -84,11 +315,7 @@ class ReactRAGAgent:
         """Update session state from agent result."""
         state.user_input = user_input
         state.response = result["response"]
-        retrieved_contexts = result.get("retrieved_contexts", [])
-        state.retrieved_context = [
-            {"content": context} if isinstance(context, str) else context
-            for context in retrieved_contexts
-        ]
+        state.retrieved_context = result.get("retrieved_contexts", [])
         state.conversation_history.append({"role": "user", "content": user_input})
         state.conversation_history.append({"role": "assistant", "content": result["response"]})
         return state
@@ -96,9 +323,17 @@ class ReactRAGAgent:
     def prepare_messages(self, state: SessionState, current_prompt: str) -> list[dict[str, Any]]:
         """Build LLM-formatted messages list from conversation history and current prompt."""
         messages = []
+        history = state.conversation_history
+
+        if self.context_window:
+            selection = self.context_window.select(state)
+            history = selection.messages
+            if selection.summary:
+                summary = f"Summary of the earlier conversation:\n{selection.summary}"
+                messages.append(SystemMessage(content=summary))
 
-        if state.conversation_history:
-            for message in state.conversation_history:
+        if history:
+            for message in history:
                 if message["role"] == "user":
                     messages.append(HumanMessage(content=message["content"]))
                 elif message["role"] == "assistant":
@@ -109,25 +344,18 @@ class ReactRAGAgent:
         messages.append(HumanMessage(content=current_prompt))
         return messages
 
-    async def ainvoke(self, state: SessionState) -> SessionState:
-        """Invoke the agent."""
-        if not state.user_input:
-            state.response = "Please provide a question."
-            return state
-
-        messages = self.prepare_messages(state, state.user_input)
-        result = await self.agent.ainvoke({"messages": messages})
-
-        messages = result.get("messages", [])
+    def parse_result(self, messages: list) -> dict[str, Any]:
+        """Extract the final response and the chunk references of every retrieval."""
         LOGGER.info(f"Agent returned {len(messages)} messages")
         response = ""
         retrieved_contexts: list[dict[str, Any]] = []
+        retrieval_called = False
 
         for msg in messages:
             if isinstance(msg, ToolMessage):
-                tool_output = json.loads(msg.content)  # type: ignore
-                retrieved_contexts = tool_output.get("retrieved_contexts", [])
-                LOGGER.info(f"Parsed ToolMessage: {len(retrieved_contexts)} contexts")
+                retrieval_called = True
+                retrieved_contexts = merge_refs(retrieved_contexts, msg.artifact or [])
+                LOGGER.info(f"Parsed ToolMessage: {len(msg.artifact or [])} chunk references")
             elif isinstance(msg, AIMessage):
                 if isinstance(msg.content, list) and len(msg.content) > 0:
                     response = "\n".join([content.get("text", "") for content in msg.content])
@@ -135,29 +363,292 @@ class ReactRAGAgent:
                 else:
                     response = msg.content
 
-        result = {"response": response, "retrieved_contexts": retrieved_contexts}
+        return {
+            "response": response,
+            "retrieved_contexts": retrieved_contexts,
+            "retrieval_called": retrieval_called,
+        }
+
+    async def compact_history(self, state: SessionState) -> None:
+        """Fold history that no longer fits the context window into the session summary."""
+        if self.context_window:
+            with timed("summarize_history"):
+                await self.context_window.refresh_summary(state)
+
+    def uses_answer_cache(self, state: SessionState) -> bool:
+        """Only opening turns share cached answers.
+
+        A later turn such as "what about the second method?" depends on its own session's
+        history, so it is neither served from the cache nor stored in it.
+        """
+        return self.answer_cache is not None and bool(state.user_input) and not state.message_count
+
+    async def cached_result(self, state: SessionState) -> dict[str, Any] | None:
+        """Look up a cached answer for a semantically equivalent question."""
+        if not self.answer_cache or not self.uses_answer_cache(state):
+            return None
+        cached = await self.answer_cache.lookup(state.user_input or "")
+        if cached is None:
+            return None
+        return {"response": cached.response, "retrieved_contexts": cached.retrieved_contexts}
+
+    async def cache_result(self, state: SessionState) -> None:
+        if self.answer_cache and self.uses_answer_cache(state):
+            await self.answer_cache.store(
+                state.user_input or "", state.response, state.retrieved_context
+            )
+
+    def start_retrieval(self, question: str) -> asyncio.Task | None:
+        """Start retrieving for the user input before it is known whether the answer needs it."""
+        if not (self.router or self.prefetcher):
+            return None
+        return asyncio.ensure_future(self.retriever.asearch_hits(question))
+
+    async def fast_path_hits(
+        self, question: str, retrieval: asyncio.Task | None
+    ) -> list[dict] | None:
+        """Route a question while `retrieval` runs for it speculatively.
+
+        :return: The retrieved hits when the question takes the retrieve route, or None
+            to leave it to the ReAct agent.
+        """
+        if self.router is None or retrieval is None:
+            return None
+        try:
+            with timed("route"):
+                decision = await self.router.route(question)
+        except Exception:
+            LOGGER.exception("Query routing failed; falling back to the agent.")
+            decision = RouteDecision(route="agent", reason="error")
+        ROUTE_DECISIONS.inc(route=decision.route, reason=decision.reason)
+        if decision.route == "retrieve":
+            return await retrieval
+        return None
+
+    @contextmanager
+    def prefetched(self, question: str, retrieval: asyncio.Task | None) -> Iterator[None]:
+        """Offer the speculative retrieval to the agent's tool calls, or drop it."""
+        if retrieval is not None and self.prefetcher:
+            with self.prefetcher.prefetching(question, retrieval):
+                yield
+            return
+        if retrieval is not None:
+            discard(retrieval)
+        yield
+
+    def answer_messages(self, state: SessionState, hits: list[dict]) -> list:
+        """Build the single answer call of the fast path around the retrieved passages."""
+        with timed("tool_serialization"):
+            context = render_contexts(hits, self.chunk_max_chars)
+        system = SystemMessage(content=self.answer_prompt.format(context=context))
+        return [system, *self.prepare_messages(state, state.user_input)]
+
+    def record_route(self, route: str, result: dict[str, Any], elapsed: float) -> None:
+        ROUTE_SECONDS.observe(elapsed, route=route)
+        if route == "agent":
+            # An agent-routed question that still retrieved is a fast path the router missed.
+            outcome = "retrieved" if result.get("retrieval_called") else "answered_directly"
+            ROUTE_FALLBACK_OUTCOMES.inc(outcome=outcome)
+
+    async def ainvoke(self, state: SessionState) -> SessionState:
+        """Invoke the agent."""
+        if not state.user_input:
+            state.response = "Please provide a question."
+            return state
+
+        if cached := await self.cached_result(state):
+            return self.update_state(state, state.user_input, cached)
+
+        start = time.perf_counter()
+        callback = LLMMetricsCallback()
+        retrieval = self.start_retrieval(state.user_input)
+        hits = await self.fast_path_hits(state.user_input, retrieval)
+        if hits is not None:
+            route = "retrieve"
+            with timed("prepare_messages"):
+                messages = self.answer_messages(state, hits)
+            with timed("fast_path"):
+                response = await self.llm.model.ainvoke(messages, config={"callbacks": [callback]})
+            result = {
+                "response": content_text(response.content),
+                "retrieved_contexts": chunk_refs(hits),
+            }
+        else:
+            route = "agent"
+            with timed("prepare_messages"):
+                messages = self.prepare_messages(state, state.user_input)
+            with self.prefetched(state.user_input, retrieval), timed("react_agent"):
+                output = await self.agent.ainvoke(
+                    {"messages": messages}, config={"callbacks": [callback]}
+                )
+            callback.record_run()
+            result = self.parse_result(output.get("messages", []))
+        if self.router:
+            self.record_route(route, result, time.perf_counter() - start)
         state = self.update_state(state, state.user_input, result)
+        await self.cache_result(state)
         return state
 
+    async def astream(self, state: SessionState) -> AsyncIterator[dict[str, Any]]:
+        """Invoke the agent, yielding retrieval and token events as they happen.
+
+        The state is updated in place once the agent finishes.
+        """
+        if not state.user_input:
+            state.response = "Please provide a question."
+            yield {"event": "token", "data": {"text": state.response}}
+            return
+
+        if cached := await self.cached_result(state):
+            self.update_state(state, state.user_input, cached)
+            contexts = state.retrieved_context
+            yield {"event": "retrieved_contexts", "data": {"retrieved_contexts": contexts}}
+            yield {"event": "token", "data": {"text": state.response}}
+            return
+
+        start = time.perf_counter()
+        retrieval = self.start_retrieval(state.user_input)
+        hits = await self.fast_path_hits(state.user_input, retrieval)
+        if hits is not None:
+            route = "retrieve"
+            events = self._astream_fast_path(state, hits)
+        else:
+            route = "agent"
+            events = self._astream_agent(state, retrieval)
+        result: dict[str, Any] = {}
+        async for event in events:
+            if event["event"] == "result":
+                result = event["data"]
+            else:
+                yield event
+        if self.router:
+            self.record_route(route, result, time.perf_counter() - start)
+
+        self.update_state(state, state.user_input, result)
+        await self.cache_result(state)
+
+    async def _astream_fast_path(
+        self, state: SessionState, hits: list[dict]
+    ) -> AsyncIterator[dict[str, Any]]:
+        yield {"event": "retrieval_started", "data": {"question": state.user_input}}
+        refs = chunk_refs(hits)
+        yield {"event": "retrieved_contexts", "data": {"retrieved_contexts": refs}}
+        with timed("prepare_messages"):
+            messages = self.answer_messages(state, hits)
+        callback = LLMMetricsCallback()
+        parts = []
+        with timed("fast_path"):
+            async for chunk in self.llm.model.astream(messages, config={"callbacks": [callback]}):
+                if text := content_text(chunk.content):
+                    parts.append(text)
+                    yield {"event": "token", "data": {"text": text}}
+        result = {"response": "".join(parts), "retrieved_contexts": refs}
+        yield {"event": "result", "data": result}
+
+    async def _astream_agent(
+        self, state: SessionState, retrieval: asyncio.Task | None
+    ) -> AsyncIterator[dict[str, Any]]:
+        with timed("prepare_messages"):
+            messages = self.prepare_messages(state, state.user_input)
+        final_messages: list = []
+        callback = LLMMetricsCallback()
+        with self.prefetched(state.user_input, retrieval), timed("react_agent"):
+            events = self.agent.astream_events(
+                {"messages": messages}, version="v2", config={"callbacks": [callback]}
+            )
+            async for event in events:
+                kind = event["event"]
+                if kind == "on_tool_start" and event["name"] == self.tool.name:
+                    question = event["data"].get("input", {}).get("question")
+                    yield {"event": "retrieval_started", "data": {"question": question}}
+                elif kind == "on_tool_end" and event["name"] == self.tool.name:
+                    refs = event["data"]["output"].artifact or []
+                    retrieved = {"retrieved_contexts": refs}
+                    yield {"event": "retrieved_contexts", "data": retrieved}
+                elif kind == "on_chat_model_stream":
+                    if text := content_text(event["data"]["chunk"].content):
+                        yield {"event": "token", "data": {"text": text}}
+                elif kind == "on_chain_end" and not event.get("parent_ids"):
+                    final_messages = event["data"]["output"].get("messages", [])
+        callback.record_run()
+        yield {"event": "result", "data": self.parse_result(final_messages)}
+
 
 class OrchestrateRAGAgent:
     """Orchestrate the RAG agent."""
 
-    def __init__(self, react_rag_agent: ReactRAGAgent, postgres_client: PostgresClient):
+    def __init__(
+        self,
+        react_rag_agent: ReactRAGAgent,
+        session_store: PostgresClient | SessionStateCache,
+    ):
         self.react_rag_agent = react_rag_agent
-        self.postgres_client = postgres_client
+        self.session_store = session_store
+        # Summary refreshes in flight by session, kept off the response path.
+        self._summary_tasks: dict[str, asyncio.Task] = {}
 
     async def load_state_memory(self, session_id: str) -> SessionState:
-        """Load state memory from Postgres."""
-        await self.postgres_client.create_tables()
-        state = await self.postgres_client.get_state(session_id)
+        """Load state memory from the session cache or Postgres."""
+        with timed("postgres_get_state"):
+            state = await self.session_store.get_state(
+                session_id, history_limit=settings.CONVERSATION_HISTORY_LIMIT
+            )
         if state:
             return state
         return SessionState(session_id=session_id)
 
     async def save_state_memory(self, state: SessionState) -> None:
-        """Save state memory to Postgres."""
-        await self.postgres_client.add_state(state)
+        """Save state memory through the session cache or directly to Postgres.
+
+        History that overflows the context window is summarized afterwards, in the background.
+        """
+        with timed("postgres_add_state"):
+            await self.session_store.add_state(state)
+        self.schedule_summary(state)
+
+    def schedule_summary(self, state: SessionState) -> None:
+        """Refresh the session summary without delaying the response.
+
+        At most one refresh runs per session; a turn that finishes meanwhile is folded in by
+        the refresh after its own turn.
+        """
+        if not self.react_rag_agent.context_window or state.session_id in self._summary_tasks:
+            return
+        task = asyncio.create_task(self._refresh_summary(state.model_copy()))
+        self._summary_tasks[state.session_id] = task
+        task.add_done_callback(lambda _: self._summary_tasks.pop(state.session_id, None))
+
+    async def _refresh_summary(self, state: SessionState) -> None:
+        summarized_count = state.summarized_count
+        await self.react_rag_agent.compact_history(state)
+        if state.summarized_count <= summarized_count:
+            return
+        try:
+            await self.session_store.update_summary(
+                state.session_id, state.summary, state.summarized_count
+            )
+        except Exception:
+            LOGGER.exception(f"Saving the summary of session {state.session_id} failed.")
+
+    async def close(self) -> None:
+        """Wait for summary refreshes in flight; called on shutdown before the stores close."""
+        if self._summary_tasks:
+            await asyncio.gather(*self._summary_tasks.values(), return_exceptions=True)
+
+    async def stream(self, state: SessionState) -> AsyncIterator[dict[str, Any]]:
+        """Stream agent events for a loaded state, ending with a final state frame.
+
+        A failure ends the stream cleanly with an error frame instead of a state frame.
+        Persisting the state is left to the caller so it can happen after the stream closes.
+        """
+        try:
+            async for event in self.react_rag_agent.astream(state):
+                yield event
+        except Exception as e:
+            LOGGER.exception("ReactRAGAgent failed.")
+            yield {"event": "error", "data": {"error": f"ReactRAGAgent failed: {e}"}}
+            return
+        yield {"event": "state", "data": state.model_dump()}
 
     async def run(self, session_id: str, user_input: str) -> dict:
         """Run the agent."""
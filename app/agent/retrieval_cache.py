@@ -0,0 +1,108 @@
+import asyncio
+import logging
+import threading
+
+from core.embedding_cache import normalize_text
+from memory.milvus_manager import MilvusManager
+from utils.cache import LRUCache
+from utils.logger import configure_logging
+
+configure_logging()
+LOGGER = logging.getLogger("retrieval_cache")
+LOGGER.setLevel(logging.INFO)
+
+
+class RetrievalCache:
+    """Ranked search results per query, stored as chunk IDs over a shared chunk-text cache.
+
+    Result entries hold only (id, distance) pairs, so memory is bounded by the chunk cache
+    rather than by how many queries reference a chunk. Result keys include the collection
+    version; when ingestion bumps it the result layer is cleared. Chunk IDs are never reused,
+    so cached chunk text stays valid across versions.
+    """
+
+    def __init__(
+        self,
+        milvus_manager: MilvusManager,
+        max_results: int,
+        max_chunks: int,
+        ttl_seconds: float | None = None,
+    ):
+        self.milvus_manager = milvus_manager
+        self.results = LRUCache(max_size=max_results, ttl_seconds=ttl_seconds)
+        self.chunks = LRUCache(max_size=max_chunks)
+        self._version: str | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def stats(self) -> dict[str, dict[str, float]]:
+        return {"results": self.results.stats.as_dict(), "chunks": self.chunks.stats.as_dict()}
+
+    def _key(self, version: str, queries: list[str], top_k: int) -> tuple:
+        normalized = tuple(sorted({normalize_text(query) for query in queries}))
+        return (self.milvus_manager.collection_name, version, top_k, normalized)
+
+    def _sync_version(self, version: str) -> None:
+        with self._lock:
+            if version != self._version:
+                if self._version is not None:
+                    LOGGER.info("Collection version changed; clearing cached retrieval results")
+                self.results.clear()
+                self._version = version
+
+    def _cached(self, version: str, queries: list[str], top_k: int):
+        """Return the cached ranking, the chunks already in memory and the missing chunk IDs."""
+        self._sync_version(version)
+        ranked = self.results.get(self._key(version, queries, top_k))
+        if ranked is None:
+            return None, {}, []
+        chunks, missing = {}, []
+        for chunk_id, _ in ranked:
+            if (entity := self.chunks.get(chunk_id)) is None:
+                missing.append(chunk_id)
+            else:
+                chunks[chunk_id] = entity
+        return ranked, chunks, missing
+
+    def _assemble(self, ranked: list, chunks: dict, fetched: dict) -> list[dict] | None:
+        for chunk_id, entity in fetched.items():
+            self.chunks.set(chunk_id, entity)
+        chunks.update(fetched)
+        if any(chunk_id not in chunks for chunk_id, _ in ranked):
+            # A chunk vanished without a version bump; let the caller search again.
+            return None
+        return [
+            {"id": chunk_id, "distance": distance, "entity": chunks[chunk_id]}
+            for chunk_id, distance in ranked
+        ]
+
+    def get(self, queries: list[str], top_k: int) -> list[dict] | None:
+        """Return cached hits for the queries, or None on a miss."""
+        version = self.milvus_manager.collection_version()
+        ranked, chunks, missing = self._cached(version, queries, top_k)
+        if ranked is None:
+            return None
+        return self._assemble(ranked, chunks, self.milvus_manager.get_chunks(missing))
+
+    async def aget(self, queries: list[str], top_k: int) -> list[dict] | None:
+        """Return cached hits without blocking the event loop."""
+        version = await self.milvus_manager.acollection_version()
+        ranked, chunks, missing = self._cached(version, queries, top_k)
+        if ranked is None:
+            return None
+        fetched = {}
+        if missing:
+            loop = asyncio.get_running_loop()
+            fetched = await loop.run_in_executor(
+                self.milvus_manager.executor, self.milvus_manager.get_chunks, missing
+            )
+        return self._assemble(ranked, chunks, fetched)
+
+    def set(self, queries: list[str], top_k: int, hits: list[dict]) -> None:
+        """Cache the ranking as chunk IDs and the chunk text in the shared layer."""
+        if self._version is None:
+            return
+        key = self._key(self._version, queries, top_k)
+        self.results.set(key, [(hit["id"], hit["distance"]) for hit in hits])
+        for hit in hits:
+            self.chunks.set(hit["id"], hit["entity"])
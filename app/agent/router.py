@@ -0,0 +1,90 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Literal
+
+import numpy as np
+
+from core.embedder import EmbeddingClient
+from memory.lexical_index import tokenize
+from memory.milvus_manager import MilvusManager
+from utils.logger import configure_logging
+
+configure_logging()
+LOGGER = logging.getLogger("router")
+LOGGER.setLevel(logging.INFO)
+
+Route = Literal["retrieve", "agent"]
+
+
+@dataclass
+class RouteDecision:
+    route: Route
+    reason: str
+    score: float | None = None
+
+
+class QueryRouter:
+    """Decides whether a question clearly needs the knowledge base.
+
+    A question takes the `retrieve` route when it mentions one of `keywords` or its embedding
+    is within `threshold` cosine similarity of the collection centroid; anything else is left
+    to the ReAct agent. The query embedding is the one retrieval computes anyway, so with the
+    embedding cache and request batcher the check adds no extra embedding call.
+    """
+
+    def __init__(
+        self,
+        milvus_manager: MilvusManager,
+        embedder: EmbeddingClient,
+        threshold: float,
+        keywords: list[str] | None = None,
+    ):
+        self.milvus_manager = milvus_manager
+        self.embedder = embedder
+        self.threshold = threshold
+        self.keywords = {token for keyword in keywords or [] for token in tokenize(keyword)}
+        self._centroid: np.ndarray | None = None
+        self._version: str | None = None
+        self._lock = asyncio.Lock()
+
+    def build_centroid(self) -> np.ndarray | None:
+        """Mean of the normalized chunk vectors, streamed from the collection."""
+        total: np.ndarray | None = None
+        count = 0
+        for row in self.milvus_manager.iter_rows(output_fields=["vector"]):
+            vector = self.milvus_manager.decode_vector(row["vector"])
+            vector /= np.linalg.norm(vector) or 1.0
+            total = vector if total is None else total + vector
+            count += 1
+        if total is None:
+            LOGGER.warning("Collection is empty; routing every question to the agent")
+            return None
+        LOGGER.info(f"Built routing centroid over {count} chunks")
+        return total / (np.linalg.norm(total) or 1.0)
+
+    async def refresh(self) -> None:
+        """Recompute the centroid if the collection changed."""
+        version = await self.milvus_manager.acollection_version()
+        if version == self._version:
+            return
+        async with self._lock:
+            if version == self._version:
+                return
+            loop = asyncio.get_running_loop()
+            self._centroid = await loop.run_in_executor(
+                self.milvus_manager.executor, self.build_centroid
+            )
+            self._version = version
+
+    async def route(self, question: str) -> RouteDecision:
+        if self.keywords.intersection(tokenize(question)):
+            return RouteDecision(route="retrieve", reason="keyword")
+        await self.refresh()
+        if self._centroid is None:
+            return RouteDecision(route="agent", reason="no_centroid")
+        vector = np.asarray(await self.embedder.aembed_query(question), dtype=np.float32)
+        score = float(vector @ self._centroid / (np.linalg.norm(vector) or 1.0))
+        if score >= self.threshold:
+            return RouteDecision(route="retrieve", reason="centroid", score=score)
+        return RouteDecision(route="agent", reason="centroid", score=score)
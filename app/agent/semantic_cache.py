@@ -0,0 +1,143 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+
+from core.embedder import EmbeddingClient
+from memory.milvus_manager import MilvusManager
+from utils.cache import CacheStats
+from utils.logger import configure_logging
+
+configure_logging()
+LOGGER = logging.getLogger("semantic_cache")
+LOGGER.setLevel(logging.INFO)
+
+
+@dataclass
+class CachedAnswer:
+    question: str
+    response: str
+    retrieved_contexts: list[dict[str, Any]]
+    stored_at: float
+
+
+class SemanticAnswerCache:
+    """Answers to earlier questions, looked up by cosine similarity of the question embedding.
+
+    Entries live in a preallocated float32 matrix so a lookup is a single matrix-vector product.
+    The whole cache is dropped when the Milvus collection version changes, since answers are
+    grounded in the indexed content. Only answers that used retrieval are stored, and very
+    short inputs are skipped because they are usually follow-ups that depend on the session;
+    the agent also bypasses the cache for any turn after the first of a session.
+    """
+
+    def __init__(
+        self,
+        embedder: EmbeddingClient,
+        milvus_manager: MilvusManager,
+        threshold: float,
+        max_size: int,
+        ttl_seconds: float | None = None,
+        min_words: int = 0,
+    ):
+        self.embedder = embedder
+        self.milvus_manager = milvus_manager
+        self.threshold = threshold
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.min_words = min_words
+        self.stats = CacheStats()
+        self._version: str | None = None
+        self._vectors: np.ndarray | None = None
+        # slot -> entry, in least-recently-used order
+        self._entries: OrderedDict[int, CachedAnswer] = OrderedDict()
+        self._free_slots = list(range(max_size))
+        self._lock = threading.Lock()
+
+    def is_cacheable(self, question: str) -> bool:
+        return len(question.split()) >= self.min_words
+
+    def _sync_version(self, version: str) -> None:
+        if version != self._version:
+            if self._entries:
+                LOGGER.info(f"Collection version changed; dropping {len(self._entries)} answers")
+                self.stats.evictions += len(self._entries)
+            self._entries.clear()
+            self._free_slots = list(range(self.max_size))
+            self._version = version
+
+    def _evict_expired(self) -> None:
+        """Free the slots of expired entries, so they never shadow a valid next-best match."""
+        if self.ttl_seconds is None:
+            return
+        cutoff = time.time() - self.ttl_seconds
+        expired = [slot for slot, entry in self._entries.items() if entry.stored_at < cutoff]
+        for slot in expired:
+            del self._entries[slot]
+            self._free_slots.append(slot)
+        self.stats.evictions += len(expired)
+
+    async def _embed(self, question: str) -> np.ndarray:
+        vector = np.asarray(await self.embedder.aembed_query(question), dtype=np.float32)
+        return vector / (np.linalg.norm(vector) or 1.0)
+
+    async def lookup(self, question: str) -> CachedAnswer | None:
+        """Return a cached answer for a semantically equivalent question, if any."""
+        if not self.is_cacheable(question):
+            return None
+        try:
+            version = await self.milvus_manager.acollection_version()
+            query = await self._embed(question)
+        except Exception:
+            LOGGER.exception("Semantic cache lookup failed; treating as a miss.")
+            return None
+
+        with self._lock:
+            self._sync_version(version)
+            if not self._entries or self._vectors is None:
+                self.stats.misses += 1
+                return None
+            self._evict_expired()
+            if not self._entries:
+                self.stats.misses += 1
+                return None
+            slots = np.fromiter(self._entries.keys(), dtype=np.int64)
+            similarities = self._vectors[slots] @ query
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.threshold:
+                self.stats.misses += 1
+                return None
+            slot = int(slots[best])
+            entry = self._entries[slot]
+            self._entries.move_to_end(slot)
+            self.stats.hits += 1
+        LOGGER.info(f"Semantic cache hit (similarity={similarities[best]:.3f})")
+        return entry
+
+    async def store(self, question: str, response: str, retrieved_contexts: list) -> None:
+        """Cache an answer that was grounded in retrieved context."""
+        if not retrieved_contexts or not self.is_cacheable(question):
+            return
+        try:
+            version = await self.milvus_manager.acollection_version()
+            vector = await self._embed(question)
+        except Exception:
+            LOGGER.exception("Semantic cache store failed.")
+            return
+
+        entry = CachedAnswer(question, response, retrieved_contexts, stored_at=time.time())
+        with self._lock:
+            self._sync_version(version)
+            if self._vectors is None:
+                self._vectors = np.zeros((self.max_size, vector.shape[0]), dtype=np.float32)
+            if self._free_slots:
+                slot = self._free_slots.pop()
+            else:
+                slot, _ = self._entries.popitem(last=False)
+                self.stats.evictions += 1
+            self._vectors[slot] = vector
+            self._entries[slot] = entry
@@ -1,8 +1,22 @@
 """Request and response schemas."""
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+
+from config.settings import settings
 
 
 class UserInput(BaseModel):
     session_id: str
     user_input: str
+
+
+class ChunkRef(BaseModel):
+    """A chunk reference as stored in `retrieved_context`."""
+
+    chunk_id: int
+    source: str | None = None
+    chunk_hash: str | None = None
+
+
+class ChunkLookup(BaseModel):
+    refs: list[ChunkRef] = Field(max_length=settings.CHUNKS_MAX_IDS)
@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic import Field, SecretStr
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -8,18 +10,125 @@ class Settings(BaseSettings):
     CHUNK_SIZE: int = Field(default=1000)
     CHUNK_OVERLAP: int = Field(default=200)
 
+    # Ingestion Settings
+    INGEST_BATCH_SIZE: int = Field(default=256)
+    INGEST_WORKERS: int = Field(default=4)
+    INGEST_PAGES_PER_TASK: int = Field(default=16)
+
     # Embedding Settings
     GEMINI_API_KEY: SecretStr = SecretStr("gemini_api_key")
+    # "gemini" calls the Gemini API; "local" runs a sentence-transformers model in-process
+    EMBEDDING_BACKEND: Literal["gemini", "local"] = Field(default="gemini")
     EMBEDDING_MODEL_NAME: str = Field(default="gemini-embedding-001")
+    LOCAL_EMBEDDING_MODEL_NAME: str = Field(default="sentence-transformers/all-MiniLM-L6-v2")
+    LOCAL_EMBEDDING_DEVICE: str = Field(default="cpu")
+    LOCAL_EMBEDDING_BATCH_SIZE: int = Field(default=64)
+    LOCAL_EMBEDDING_QUANTIZE: bool = Field(default=False)
+    # Matryoshka truncation to the first N dimensions (e.g. 768 or 256); set MILVUS_EMBEDDING_DIM
+    # to match and re-ingest. None keeps the model's full output
+    EMBEDDING_OUTPUT_DIM: int | None = Field(default=None)
+    EMBEDDING_CACHE_ENABLED: bool = Field(default=True)
+    EMBEDDING_CACHE_MAX_ENTRIES: int = Field(default=10_000)
+    EMBEDDING_CACHE_TTL_SECONDS: float | None = Field(default=None)
+    # Optional SQLite tier that survives restarts; it is pruned to EMBEDDING_CACHE_DISK_MAX_ENTRIES
+    # rows, dropping expired then oldest rows, on open and every 1000 writes
+    EMBEDDING_CACHE_PATH: str | None = Field(default=None)
+    EMBEDDING_CACHE_DISK_MAX_ENTRIES: int | None = Field(default=100_000)
+    # Concurrent query embeddings are coalesced into one batch call (Gemini caps batches at 100)
+    EMBEDDING_BATCH_ENABLED: bool = Field(default=True)
+    EMBEDDING_BATCH_MAX_SIZE: int = Field(default=100)
+    EMBEDDING_BATCH_MAX_WAIT_MS: float = Field(default=5.0)
 
     # LLM Settings
     LLM_MODEL_NAME: str = Field(default="gemini-3-flash-preview")
+    # Token budget for conversation history in the prompt; None sends the full history
+    CONTEXT_TOKEN_BUDGET: int | None = Field(default=4000)
+    CONTEXT_RETAIN_RATIO: float = Field(default=0.5)
 
     # Milvus Settings
+    # "milvus" connects to MILVUS_URI (a path ending in .db runs Milvus Lite in-process);
+    # "flat" uses the exact NumPy index under FLAT_INDEX_PATH
+    VECTOR_STORE: Literal["milvus", "flat"] = Field(default="milvus")
+    FLAT_INDEX_PATH: str = Field(default=".vector_store")
     MILVUS_URI: str = Field(default="http://localhost:19530")
     MILVUS_TOKEN: str = Field(default="")
     MILVUS_COLLECTION_NAME: str = Field(default="rag_agent")
     MILVUS_EMBEDDING_DIM: int = Field(default=3072)
+    MILVUS_SEARCH_MAX_WORKERS: int = Field(default=8)
+    COLLECTION_VERSION_REFRESH_SECONDS: float = Field(default=30.0)
+    # Vector index built for new collections and by scripts.manage_index. AUTOINDEX lets Milvus
+    # choose; DISKANN needs a server with local disk. Empty params use defaults per index type
+    MILVUS_INDEX_TYPE: Literal[
+        "AUTOINDEX", "HNSW", "IVF_FLAT", "IVF_SQ8", "IVF_PQ", "DISKANN", "BIN_FLAT", "BIN_IVF_FLAT"
+    ] = Field(default="AUTOINDEX")
+    MILVUS_INDEX_PARAMS: dict[str, int] = Field(default={})
+    # Per-request search effort, applied according to the loaded index type: HNSW ef,
+    # IVF nprobe and DiskANN search_list trade latency for recall
+    MILVUS_SEARCH_EF: int = Field(default=64)
+    MILVUS_SEARCH_NPROBE: int = Field(default=16)
+    MILVUS_SEARCH_LIST: int = Field(default=100)
+    # Load the collection at startup rather than on the first search. Releasing on shutdown
+    # frees server memory but unloads it for every other worker too
+    MILVUS_LOAD_ON_STARTUP: bool = Field(default=True)
+    MILVUS_RELEASE_ON_SHUTDOWN: bool = Field(default=False)
+    # Stored vector encoding: "float" (4 bytes per dimension), "float16" (2 bytes) or "binary"
+    # (1 bit, Hamming search with BIN_* or AUTOINDEX indexes). Changing it needs a re-ingest
+    MILVUS_VECTOR_TYPE: Literal["float", "float16", "binary"] = Field(default="float")
+    # Search MILVUS_RESCORE_OVERSAMPLE times the hits, then rank them by cosine similarity of the
+    # float32 query to the stored vectors, recovering recall lost to quantization
+    MILVUS_RESCORE_ENABLED: bool = Field(default=False)
+    MILVUS_RESCORE_OVERSAMPLE: int = Field(default=4)
+    # Keep a full-precision copy of float16/binary vectors in new collections so rescoring is
+    # exact; without it, rescoring compares against the decoded float16 values or sign bits
+    MILVUS_RESCORE_FULL_PRECISION: bool = Field(default=False)
+
+    # Retrieval Settings
+    RETRIEVAL_TOP_K: int = Field(default=5)
+    # "dense" searches Milvus only; "hybrid" fuses it with a BM25 index via reciprocal rank fusion
+    RETRIEVAL_MODE: Literal["dense", "hybrid"] = Field(default="dense")
+    HYBRID_DENSE_TOP_K: int = Field(default=20)
+    HYBRID_SPARSE_TOP_K: int = Field(default=20)
+    HYBRID_RRF_K: int = Field(default=60)
+    # Ranked chunk IDs per query, over a shared chunk-text cache; cleared on collection changes
+    RETRIEVAL_CACHE_ENABLED: bool = Field(default=True)
+    RETRIEVAL_CACHE_MAX_ENTRIES: int = Field(default=5_000)
+    RETRIEVAL_CACHE_TTL_SECONDS: float | None = Field(default=None)
+    CHUNK_CACHE_MAX_ENTRIES: int = Field(default=20_000)
+    # Cut each passage rendered for the LLM to this many characters; None sends it whole
+    CONTEXT_CHUNK_MAX_CHARS: int | None = Field(default=None)
+    # Most chunks a single /chunks request may resolve
+    CHUNKS_MAX_IDS: int = Field(default=100)
+
+    # Cross-encoder rerank Settings (over-fetch RERANK_CANDIDATES hits, keep RETRIEVAL_TOP_K)
+    RERANK_ENABLED: bool = Field(default=False)
+    RERANK_MODEL_NAME: str = Field(default="cross-encoder/ms-marco-MiniLM-L-6-v2")
+    RERANK_CANDIDATES: int = Field(default=20)
+    RERANK_BATCH_SIZE: int = Field(default=32)
+    # Fall back to the dense order when scoring takes longer than this
+    RERANK_TIMEOUT_SECONDS: float | None = Field(default=0.5)
+
+    # Query routing Settings: knowledge-base questions skip the ReAct planning call
+    ROUTING_ENABLED: bool = Field(default=False)
+    # Cosine similarity to the collection centroid from which a question takes the fast path
+    ROUTING_CENTROID_THRESHOLD: float = Field(default=0.6)
+    # Questions mentioning any of these words always take the fast path
+    ROUTING_KEYWORDS: list[str] = Field(default=["thesis"])
+
+    # Retrieval prefetch Settings: search for the user input while the agent plans
+    PREFETCH_ENABLED: bool = Field(default=True)
+    # "exact" reuses the prefetch for the same question; "similarity" also for close rephrasings
+    PREFETCH_MATCH: Literal["exact", "similarity"] = Field(default="exact")
+    PREFETCH_SIMILARITY_THRESHOLD: float = Field(default=0.9)
+
+    # Observability Settings (stage timings are always exported on /metrics)
+    OTEL_ENABLED: bool = Field(default=False)
+
+    # Semantic answer cache Settings
+    SEMANTIC_CACHE_ENABLED: bool = Field(default=False)
+    SEMANTIC_CACHE_THRESHOLD: float = Field(default=0.95)
+    SEMANTIC_CACHE_MAX_ENTRIES: int = Field(default=1000)
+    SEMANTIC_CACHE_TTL_SECONDS: float | None = Field(default=3600.0)
+    SEMANTIC_CACHE_MIN_WORDS: int = Field(default=4)
 
     # Postgress Settings
     POSTGRES_USER: str | None = Field(default="postgres")
@@ -30,6 +139,19 @@ class Settings(BaseSettings):
     POSTGRES_HOST: str = Field(default="localhost")
     POSTGRES_MIN_CONNECTIONS_PER_POOL: int = Field(default=1)
     POSTGRES_MAX_CONNECTIONS_PER_POOL: int = Field(default=10)
+    # Load only the last N messages of a session; None loads the full history
+    CONVERSATION_HISTORY_LIMIT: int | None = Field(default=None)
+
+    # Session state cache Settings
+    SESSION_CACHE_ENABLED: bool = Field(default=True)
+    SESSION_CACHE_MAX_SESSIONS: int = Field(default=10000)
+    # Bounds how long a worker can serve a session another worker has since updated
+    SESSION_CACHE_TTL_SECONDS: float | None = Field(default=None)
+    # "write_through" persists each turn before responding; "write_behind" batches writes and
+    # can lose the turns of the last flush interval on a crash
+    SESSION_WRITE_MODE: Literal["write_through", "write_behind"] = Field(default="write_through")
+    SESSION_FLUSH_INTERVAL_MS: float = Field(default=200.0)
+    SESSION_FLUSH_BATCH_SIZE: int = Field(default=100)
 
 
 settings = Settings()
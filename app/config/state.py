@@ -10,8 +10,14 @@ class SessionState(BaseModel):
         session_id: The ID of the current session.
         user_input: The user's most recent input.
         conversation_history: The list of messages that make up the chat history.
-        retrieved_context: The list of retrieved context documents.
+        retrieved_context: References to the retrieved chunks ({"chunk_id", "page_number"}),
+            whose text is served by the /chunks endpoint.
         response: Agent response.
+        message_count: Number of messages persisted for the session.
+        history_offset: Sequence number of the first message in conversation_history, which
+            is non-zero when only the most recent messages were loaded.
+        summary: Rolling summary of the messages that fell out of the context window.
+        summarized_count: Number of leading messages covered by the summary.
     """
 
     session_id: str
@@ -19,3 +25,7 @@ class SessionState(BaseModel):
     conversation_history: list[dict[str, Any]] = Field(default_factory=list)
     retrieved_context: list[dict[str, Any]] = Field(default_factory=list)
     response: str = Field(default="")
+    message_count: int = Field(default=0, exclude=True)
+    history_offset: int = Field(default=0, exclude=True)
+    summary: str = Field(default="", exclude=True)
+    summarized_count: int = Field(default=0, exclude=True)
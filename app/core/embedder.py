@@ -1,15 +1,222 @@
-from langchain_google_genai import GoogleGenerativeAIEmbeddings
+import asyncio
+from collections.abc import Awaitable, Callable
 
 from config.settings import settings
+from core.embedding_backends import create_embedding_backend, embedding_model_name
+from core.embedding_cache import EmbeddingCache
+from utils.metrics import timed
+
+
+class EmbeddingBatcher:
+    """Coalesces concurrent embedding requests into batch calls.
+
+    Requests are collected until `max_batch_size` distinct texts are waiting or `max_wait_seconds`
+    has passed since the first one, then sent as a single batch. Requests for a text that is
+    already pending or in flight share its result instead of being sent again.
+    """
+
+    def __init__(
+        self,
+        embed_batch: Callable[[list[str]], Awaitable[list[list[float]]]],
+        max_batch_size: int = 100,
+        max_wait_seconds: float = 0.005,
+    ):
+        self.embed_batch = embed_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait_seconds = max_wait_seconds
+        self.requests = 0
+        self.batches = 0
+        self.deduplicated = 0
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._pending: dict[str, asyncio.Future] = {}
+        self._in_flight: dict[str, asyncio.Future] = {}
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+    async def embed(self, text: str) -> list[float]:
+        """Embed one text as part of the next batch."""
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # Futures belong to one loop; scripts that call asyncio.run repeatedly start fresh.
+            self._loop = loop
+            self._pending, self._in_flight, self._flush_handle = {}, {}, None
+
+        self.requests += 1
+        future = self._pending.get(text) or self._in_flight.get(text)
+        if future is not None:
+            self.deduplicated += 1
+        else:
+            future = loop.create_future()
+            self._pending[text] = future
+            if len(self._pending) >= self.max_batch_size:
+                self._flush()
+            elif self._flush_handle is None:
+                self._flush_handle = loop.call_later(self.max_wait_seconds, self._flush)
+        # Shielded so one cancelled caller does not cancel the result shared with the others.
+        return await asyncio.shield(future)
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, {}
+        self._in_flight.update(batch)
+        self.batches += 1
+        task = asyncio.get_running_loop().create_task(self._send(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, batch: dict[str, asyncio.Future]) -> None:
+        texts = list(batch)
+        try:
+            vectors = await self.embed_batch(texts)
+            if len(vectors) != len(texts):
+                raise ValueError(
+                    f"Embedding backend returned {len(vectors)} vectors for {len(texts)} texts"
+                )
+            for text, vector in zip(texts, vectors):
+                if not batch[text].done():
+                    batch[text].set_result(vector)
+        except Exception as e:
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            # Cancellation skips the handler above; no caller may be left waiting on a future.
+            for text, future in batch.items():
+                if not future.done():
+                    future.set_exception(RuntimeError("Embedding batch was cancelled"))
+                if self._in_flight.get(text) is future:
+                    del self._in_flight[text]
 
 
 class EmbeddingClient:
     def __init__(self):
-        self.model = GoogleGenerativeAIEmbeddings(  # type: ignore[call-arg]
-            model=settings.EMBEDDING_MODEL_NAME,
-            google_api_key=settings.GEMINI_API_KEY.get_secret_value(),
+        self.model = create_embedding_backend()
+        self.cache = (
+            EmbeddingCache(
+                model_name=embedding_model_name(),
+                max_size=settings.EMBEDDING_CACHE_MAX_ENTRIES,
+                ttl_seconds=settings.EMBEDDING_CACHE_TTL_SECONDS,
+                path=settings.EMBEDDING_CACHE_PATH,
+                max_disk_rows=settings.EMBEDDING_CACHE_DISK_MAX_ENTRIES,
+            )
+            if settings.EMBEDDING_CACHE_ENABLED
+            else None
         )
+        self.batcher = (
+            EmbeddingBatcher(
+                self._aembed_query_batch,
+                max_batch_size=settings.EMBEDDING_BATCH_MAX_SIZE,
+                max_wait_seconds=settings.EMBEDDING_BATCH_MAX_WAIT_MS / 1000,
+            )
+            if settings.EMBEDDING_BATCH_ENABLED
+            else None
+        )
+
+    async def _aembed_query_batch(self, queries: list[str]) -> list[list[float]]:
+        return await self.model.aembed_queries(queries)
+
+    async def warm_up(self) -> None:
+        """Load the embedding model and check it against `MILVUS_EMBEDDING_DIM`."""
+        await self.model.warm_up()
+        dimension = self.model.dimension
+        if dimension is not None and dimension != settings.MILVUS_EMBEDDING_DIM:
+            raise ValueError(
+                f"Embedding model produces {dimension}-d vectors but "
+                f"MILVUS_EMBEDDING_DIM is {settings.MILVUS_EMBEDDING_DIM}"
+            )
 
     def embed_query(self, query: str) -> list[float]:
         """Embed a query string."""
-        return self.model.embed_query(query)
+        with timed("embed_query"):
+            return self._embed_query(query)
+
+    def _embed_query(self, query: str) -> list[float]:
+        if self.cache and (cached := self.cache.get(query)) is not None:
+            return cached
+        embedding = self.model.embed_query(query)
+        if self.cache:
+            self.cache.set(query, embedding)
+        return embedding
+
+    async def aembed_query(self, query: str) -> list[float]:
+        """Embed a query string without blocking the event loop."""
+        with timed("embed_query"):
+            return await self._aembed_query(query)
+
+    async def _aembed_query(self, query: str) -> list[float]:
+        if self.cache and (cached := await self.cache.aget(query)) is not None:
+            return cached
+        if self.batcher:
+            embedding = await self.batcher.embed(query)
+        else:
+            embedding = await self.model.aembed_query(query)
+        if self.cache:
+            self.cache.set_nowait(query, embedding)
+        return embedding
+
+    def _split_cached(self, queries: list[str]) -> tuple[dict[str, list[float]], list[str]]:
+        """Return cached vectors and the distinct queries that still need embedding."""
+        found: dict[str, list[float]] = {}
+        missing: list[str] = []
+        for query in dict.fromkeys(queries):
+            if self.cache and (cached := self.cache.get(query)) is not None:
+                found[query] = cached
+            else:
+                missing.append(query)
+        return found, missing
+
+    async def _asplit_cached(
+        self, queries: list[str]
+    ) -> tuple[dict[str, list[float]], list[str]]:
+        """Like `_split_cached`, reading the disk tier off the event loop."""
+        distinct = list(dict.fromkeys(queries))
+        if not self.cache:
+            return {}, distinct
+        found: dict[str, list[float]] = {}
+        missing: list[str] = []
+        for query, cached in zip(distinct, await self.cache.aget_many(distinct)):
+            if cached is not None:
+                found[query] = cached
+            else:
+                missing.append(query)
+        return found, missing
+
+    def _merge(
+        self,
+        queries: list[str],
+        found: dict[str, list[float]],
+        missing: list[str],
+        vectors: list,
+        wait: bool = True,
+    ) -> list[list[float]]:
+        for query, vector in zip(missing, vectors):
+            found[query] = vector
+            if self.cache:
+                if wait:
+                    self.cache.set(query, vector)
+                else:
+                    self.cache.set_nowait(query, vector)
+        return [found[query] for query in queries]
+
+    def embed_queries(self, queries: list[str]) -> list[list[float]]:
+        """Embed several query strings with one batch call for the uncached ones."""
+        found, missing = self._split_cached(queries)
+        vectors = self.model.embed_queries(missing) if missing else []
+        return self._merge(queries, found, missing, vectors)
+
+    async def aembed_queries(self, queries: list[str]) -> list[list[float]]:
+        """Embed several query strings in one batch call without blocking the event loop."""
+        found, missing = await self._asplit_cached(queries)
+        if self.batcher:
+            vectors = await asyncio.gather(*(self.batcher.embed(query) for query in missing))
+        else:
+            vectors = await self._aembed_query_batch(missing) if missing else []
+        return self._merge(queries, found, missing, vectors, wait=False)
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        """Embed a batch of document texts in as few API calls as possible."""
+        return self.model.embed_documents(texts)
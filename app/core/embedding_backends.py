@@ -0,0 +1,157 @@
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_google_genai import GoogleGenerativeAIEmbeddings
+
+from config.settings import settings
+from utils.logger import configure_logging
+
+configure_logging()
+LOGGER = logging.getLogger("embedding_backends")
+LOGGER.setLevel(logging.INFO)
+
+
+class GeminiEmbeddings(GoogleGenerativeAIEmbeddings):
+    """Gemini embeddings with a batched query call, matching the local backend's interface."""
+
+    def embed_queries(self, texts: list[str]) -> list[list[float]]:
+        return self.embed_documents(texts, task_type="RETRIEVAL_QUERY")
+
+    async def aembed_queries(self, texts: list[str]) -> list[list[float]]:
+        return await self.aembed_documents(texts, task_type="RETRIEVAL_QUERY")
+
+    @property
+    def dimension(self) -> int | None:
+        return self.output_dimensionality
+
+    async def warm_up(self) -> None:
+        pass
+
+
+class LocalEmbeddings(Embeddings):
+    """sentence-transformers model run in-process on a dedicated thread pool.
+
+    Each call encodes its whole batch in one forward pass; with the request batcher in front,
+    concurrent queries share a pass too. Optional int8 dynamic quantization of the linear
+    layers trades a little accuracy for faster CPU inference. With `output_dim`, embeddings
+    are cut to their first dimensions and re-normalized, which suits Matryoshka-trained models.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        device: str = "cpu",
+        batch_size: int = 64,
+        quantize: bool = False,
+        output_dim: int | None = None,
+    ):
+        self.model_name = model_name
+        self.device = device
+        self.batch_size = batch_size
+        self.quantize = quantize
+        self.output_dim = output_dim
+        # One worker: a single forward pass already uses every core through torch.
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embeddings")
+        self._model: Any = None
+        self._lock = threading.Lock()
+
+    def load(self) -> Any:
+        """Load the model once; torch is imported here to keep startup cheap."""
+        with self._lock:
+            if self._model is None:
+                from sentence_transformers import SentenceTransformer
+
+                model = SentenceTransformer(self.model_name, device=self.device)
+                if self.quantize:
+                    import torch
+
+                    model = torch.quantization.quantize_dynamic(
+                        model, {torch.nn.Linear}, dtype=torch.qint8
+                    )
+                self._model = model
+                LOGGER.info(
+                    f"Loaded embedding model {self.model_name} on {self.device} "
+                    f"(dim={model.get_sentence_embedding_dimension()}, quantized={self.quantize})"
+                )
+        return self._model
+
+    @property
+    def dimension(self) -> int:
+        return self.output_dim or self.load().get_sentence_embedding_dimension()
+
+    async def warm_up(self) -> None:
+        """Load the model and run one encode off the event loop ahead of the first request."""
+        await self.aembed_query("warm-up")
+
+    def _encode(self, texts: list[str], prompt_name: str | None = None) -> list[list[float]]:
+        model = self.load()
+        if prompt_name not in (model.prompts or {}):
+            prompt_name = None
+        vectors = model.encode(
+            texts,
+            batch_size=self.batch_size,
+            prompt_name=prompt_name,
+            normalize_embeddings=True,
+            convert_to_numpy=True,
+            show_progress_bar=False,
+        )
+        if self.output_dim:
+            vectors = vectors[:, : self.output_dim]
+            vectors /= np.linalg.norm(vectors, axis=1, keepdims=True).clip(min=1e-12)
+        return vectors.tolist()
+
+    async def _aencode(self, texts: list[str], prompt_name: str | None = None) -> list[list[float]]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self._encode, texts, prompt_name)
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self._encode(texts, prompt_name="document")
+
+    def embed_queries(self, texts: list[str]) -> list[list[float]]:
+        return self._encode(texts, prompt_name="query")
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.embed_queries([text])[0]
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        return await self._aencode(texts, prompt_name="document")
+
+    async def aembed_queries(self, texts: list[str]) -> list[list[float]]:
+        return await self._aencode(texts, prompt_name="query")
+
+    async def aembed_query(self, text: str) -> list[float]:
+        return (await self.aembed_queries([text]))[0]
+
+
+def create_embedding_backend() -> GeminiEmbeddings | LocalEmbeddings:
+    """Build the embedding backend selected by `EMBEDDING_BACKEND`."""
+    if settings.EMBEDDING_BACKEND == "local":
+        return LocalEmbeddings(
+            model_name=settings.LOCAL_EMBEDDING_MODEL_NAME,
+            device=settings.LOCAL_EMBEDDING_DEVICE,
+            batch_size=settings.LOCAL_EMBEDDING_BATCH_SIZE,
+            quantize=settings.LOCAL_EMBEDDING_QUANTIZE,
+            output_dim=settings.EMBEDDING_OUTPUT_DIM,
+        )
+    # Gemini embeddings are Matryoshka-trained, so the API truncates them itself.
+    return GeminiEmbeddings(  # type: ignore[call-arg]
+        model=settings.EMBEDDING_MODEL_NAME,
+        google_api_key=settings.GEMINI_API_KEY.get_secret_value(),
+        output_dimensionality=settings.EMBEDDING_OUTPUT_DIM,
+    )
+
+
+def embedding_model_name() -> str:
+    """Name of the configured embedding model and output size, used to key cached vectors."""
+    if settings.EMBEDDING_BACKEND == "local":
+        name = settings.LOCAL_EMBEDDING_MODEL_NAME
+    else:
+        name = settings.EMBEDDING_MODEL_NAME
+    if settings.EMBEDDING_OUTPUT_DIM:
+        return f"{name}@{settings.EMBEDDING_OUTPUT_DIM}"
+    return name
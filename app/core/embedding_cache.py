@@ -0,0 +1,222 @@
+import asyncio
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from utils.cache import CacheStats, LRUCache
+from utils.logger import configure_logging
+
+configure_logging()
+LOGGER = logging.getLogger("embedding_cache")
+LOGGER.setLevel(logging.INFO)
+
+
+def normalize_text(text: str) -> str:
+    """Collapse case and whitespace so trivially different phrasings share a key."""
+    return " ".join(text.casefold().split())
+
+
+def embedding_cache_key(text: str, model_name: str) -> str:
+    """Content-addressed key for a text embedded with a given model."""
+    return hashlib.sha256(f"{model_name}\x00{normalize_text(text)}".encode()).hexdigest()
+
+
+class SQLiteEmbeddingStore:
+    """On-disk embedding tier that survives restarts.
+
+    Expired rows, then the oldest ones beyond `max_rows`, are deleted on open and every
+    `prune_interval` writes, so the file stays bounded.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        ttl_seconds: float | None = None,
+        max_rows: int | None = None,
+        prune_interval: int = 1000,
+    ):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.ttl_seconds = ttl_seconds
+        self.max_rows = max_rows
+        self.prune_interval = prune_interval
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings "
+            "(key TEXT PRIMARY KEY, vector BLOB NOT NULL, created_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS embeddings_created_at ON embeddings (created_at)"
+        )
+        self._conn.commit()
+        self.prune()
+
+    def prune(self) -> int:
+        """Delete expired rows and the oldest rows beyond `max_rows`; return how many."""
+        with self._lock:
+            deleted = 0
+            if self.ttl_seconds is not None:
+                cursor = self._conn.execute(
+                    "DELETE FROM embeddings WHERE created_at < ?", (time.time() - self.ttl_seconds,)
+                )
+                deleted += cursor.rowcount
+            if self.max_rows is not None:
+                cursor = self._conn.execute(
+                    "DELETE FROM embeddings WHERE key IN "
+                    "(SELECT key FROM embeddings ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_rows,),
+                )
+                deleted += cursor.rowcount
+            self._conn.commit()
+        if deleted:
+            LOGGER.info(f"Pruned {deleted} rows from the embedding cache")
+        return deleted
+
+    def get(self, key: str) -> np.ndarray | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT vector, created_at FROM embeddings WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        vector, created_at = row
+        if self.ttl_seconds is not None and time.time() - created_at > self.ttl_seconds:
+            return None
+        return np.frombuffer(vector, dtype=np.float32)
+
+    def set(self, key: str, vector: np.ndarray) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO embeddings (key, vector, created_at) VALUES (?, ?, ?)",
+                (key, vector.tobytes(), time.time()),
+            )
+            self._conn.commit()
+            self._writes += 1
+        if self._writes % self.prune_interval == 0:
+            self.prune()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class EmbeddingCache:
+    """Two-tier query embedding cache: in-memory LRU over an optional SQLite store.
+
+    The async methods keep SQLite off the event loop: disk reads run on a single writer thread,
+    and writes are queued to it without waiting, so a request never blocks on a commit or a
+    prune. Memory hits are still answered inline.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        max_size: int,
+        ttl_seconds: float | None = None,
+        path: str | None = None,
+        max_disk_rows: int | None = None,
+    ):
+        self.model_name = model_name
+        self.memory = LRUCache(max_size=max_size, ttl_seconds=ttl_seconds)
+        self.disk = (
+            SQLiteEmbeddingStore(path, ttl_seconds=ttl_seconds, max_rows=max_disk_rows)
+            if path
+            else None
+        )
+        # One thread keeps queued writes in order and never contends for the store lock.
+        self.executor = (
+            ThreadPoolExecutor(max_workers=1, thread_name_prefix="embedding_cache")
+            if path
+            else None
+        )
+        self.disk_stats = CacheStats()
+        LOGGER.info(f"Embedding cache enabled (max_size={max_size}, disk={path or 'off'})")
+
+    def _disk_get(self, disk: SQLiteEmbeddingStore, keys: list[str]) -> list[np.ndarray | None]:
+        """Look keys up in the disk tier, promoting hits to memory."""
+        vectors = []
+        for key in keys:
+            vector = disk.get(key)
+            if vector is None:
+                self.disk_stats.misses += 1
+            else:
+                self.disk_stats.hits += 1
+                self.memory.set(key, vector)
+            vectors.append(vector)
+        return vectors
+
+    def get(self, text: str) -> list[float] | None:
+        """Return the cached embedding for a text, or None on a miss."""
+        key = embedding_cache_key(text, self.model_name)
+        vector = self.memory.get(key)
+        if vector is None and self.disk is not None:
+            (vector,) = self._disk_get(self.disk, [key])
+        return None if vector is None else vector.tolist()
+
+    async def aget_many(self, texts: list[str]) -> list[list[float] | None]:
+        """Return cached embeddings for several texts, reading the disk tier off the loop."""
+        keys = [embedding_cache_key(text, self.model_name) for text in texts]
+        vectors = [self.memory.get(key) for key in keys]
+        missing = [index for index, vector in enumerate(vectors) if vector is None]
+        if missing and self.disk is not None:
+            loop = asyncio.get_running_loop()
+            found = await loop.run_in_executor(
+                self.executor, self._disk_get, self.disk, [keys[index] for index in missing]
+            )
+            for index, vector in zip(missing, found):
+                vectors[index] = vector
+        return [None if vector is None else vector.tolist() for vector in vectors]
+
+    async def aget(self, text: str) -> list[float] | None:
+        (embedding,) = await self.aget_many([text])
+        return embedding
+
+    def _store(self, text: str, embedding: list[float]) -> tuple[str, np.ndarray]:
+        key = embedding_cache_key(text, self.model_name)
+        vector = np.asarray(embedding, dtype=np.float32)
+        self.memory.set(key, vector)
+        return key, vector
+
+    def set(self, text: str, embedding: list[float]) -> None:
+        """Store an embedding as a compact float32 array."""
+        key, vector = self._store(text, embedding)
+        if self.disk is not None:
+            self.disk.set(key, vector)
+
+    def set_nowait(self, text: str, embedding: list[float]) -> None:
+        """Store an embedding in memory and queue its disk write to the writer thread."""
+        key, vector = self._store(text, embedding)
+        if self.disk is not None and self.executor is not None:
+            self.executor.submit(self.disk.set, key, vector).add_done_callback(_log_write_error)
+
+    def flush(self) -> None:
+        """Wait for queued disk writes."""
+        if self.executor is not None:
+            self.executor.submit(lambda: None).result()
+
+    def close(self) -> None:
+        """Finish queued disk writes and close the store."""
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+        if self.disk is not None:
+            self.disk.close()
+
+    @property
+    def stats(self) -> dict[str, dict[str, float]]:
+        stats = {"memory": self.memory.stats.as_dict()}
+        if self.disk is not None:
+            stats["disk"] = self.disk_stats.as_dict()
+        return stats
+
+
+def _log_write_error(future: Future) -> None:
+    if (error := future.exception()) is not None:
+        LOGGER.warning(f"Embedding cache write failed: {error}")
@@ -0,0 +1,250 @@
+import hashlib
+import logging
+import time
+from collections import defaultdict, deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from itertools import islice
+from pathlib import Path
+
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from pypdf import PdfReader
+
+from config.settings import settings
+from core.embedder import EmbeddingClient
+from memory.milvus_manager import MilvusManager
+from utils.logger import configure_logging
+
+configure_logging()
+LOGGER = logging.getLogger("ingestion")
+LOGGER.setLevel(logging.INFO)
+
+
+@dataclass
+class Chunk:
+    source: str
+    page_number: int
+    text: str
+
+    @property
+    def content_hash(self) -> str:
+        return hashlib.sha256(self.text.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class ChunkBatch:
+    """Chunks produced from one page range of a document."""
+
+    pages: int
+    chunks: list[Chunk]
+
+
+@dataclass
+class IngestionReport:
+    documents: int = 0
+    pages: int = 0
+    chunks: int = 0
+    embedded: int = 0
+    reused: int = 0
+    unchanged: int = 0
+    deleted: int = 0
+    seconds: float = 0.0
+
+    @property
+    def pages_per_second(self) -> float:
+        return self.pages / self.seconds if self.seconds else 0.0
+
+    @property
+    def chunks_per_second(self) -> float:
+        return self.chunks / self.seconds if self.seconds else 0.0
+
+
+class ChunkManifest:
+    """Chunks already stored in Milvus, keyed by source document and content hash.
+
+    Incoming chunks are matched against the manifest as they stream past: an identical chunk on
+    the same page is left alone, an identical chunk that moved pages reuses its stored vector,
+    and anything left unmatched at the end is an orphan to delete.
+    """
+
+    def __init__(self, rows: Iterable[dict] = ()):
+        self._pending: dict[tuple[str, str], list[dict]] = defaultdict(list)
+        for row in rows:
+            self._pending[(row["source"], row["chunk_hash"])].append(row)
+
+    def match(self, chunk: Chunk) -> tuple[bool, int | None]:
+        """Claim a stored row for a chunk.
+
+        Returns:
+            (unchanged, reusable_id): `unchanged` when the stored row already matches, otherwise
+            the id of a stored row with the same content whose vector can be reused, or None.
+        """
+        candidates = self._pending.get((chunk.source, chunk.content_hash))
+        if not candidates:
+            return False, None
+        for index, row in enumerate(candidates):
+            if row["page_number"] == chunk.page_number:
+                candidates.pop(index)
+                return True, None
+        return False, candidates.pop()["id"]
+
+    def orphan_ids(self) -> list[int]:
+        return [row["id"] for rows in self._pending.values() for row in rows]
+
+
+def source_name(path: Path, root: Path) -> str:
+    """Name a document by its path relative to the ingest root, or absolute if outside it.
+
+    Unlike the file name, this tells apart documents with the same name in different folders.
+    """
+    path = path.resolve()
+    if path.is_relative_to(root.resolve()):
+        return path.relative_to(root.resolve()).as_posix()
+    return path.as_posix()
+
+
+def chunk_page_range(
+    path: str, source: str, start: int, end: int, chunk_size: int, chunk_overlap: int
+) -> ChunkBatch:
+    """Parse pages [start, end) of a PDF and split them into chunks.
+
+    Runs inside a worker process, so it only takes and returns picklable values.
+    """
+    reader = PdfReader(path)
+    splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    chunks = []
+    for index in range(start, end):
+        text = reader.pages[index].extract_text() or ""
+        for piece in splitter.split_text(text):
+            chunks.append(Chunk(source=source, page_number=index + 1, text=piece))
+    return ChunkBatch(pages=end - start, chunks=chunks)
+
+
+def iter_page_ranges(
+    sources: dict[Path, str], pages_per_task: int
+) -> Iterator[tuple[str, str, int, int]]:
+    """Yield (path, source, start, end) page ranges for every PDF."""
+    for path, source in sources.items():
+        page_count = len(PdfReader(path).pages)
+        LOGGER.info(f"Queued {source} ({page_count} pages)")
+        for start in range(0, page_count, pages_per_task):
+            yield str(path), source, start, min(start + pages_per_task, page_count)
+
+
+def iter_chunk_batches(
+    sources: dict[Path, str],
+    pool: ProcessPoolExecutor,
+    pages_per_task: int,
+    max_in_flight: int,
+) -> Iterator[ChunkBatch]:
+    """Chunk documents in a process pool, yielding results in document order.
+
+    At most `max_in_flight` page ranges are parsed ahead of the consumer, so memory stays
+    bounded regardless of corpus size.
+    """
+    pending: deque[Future[ChunkBatch]] = deque()
+    for path, source, start, end in iter_page_ranges(sources, pages_per_task):
+        pending.append(
+            pool.submit(
+                chunk_page_range,
+                path,
+                source,
+                start,
+                end,
+                settings.CHUNK_SIZE,
+                settings.CHUNK_OVERLAP,
+            )
+        )
+        if len(pending) >= max_in_flight:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def iter_chunks(batches: Iterable[ChunkBatch], report: IngestionReport) -> Iterator[Chunk]:
+    """Flatten chunk batches while counting pages and chunks."""
+    for batch in batches:
+        report.pages += batch.pages
+        report.chunks += len(batch.chunks)
+        yield from batch.chunks
+
+
+def batched(items: Iterable[Chunk], size: int) -> Iterator[list[Chunk]]:
+    iterator = iter(items)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def to_row(chunk: Chunk, vector: list[float]) -> dict:
+    return {
+        "vector": vector,
+        "text_content": chunk.text,
+        "page_number": chunk.page_number,
+        "source": chunk.source,
+        "chunk_hash": chunk.content_hash,
+    }
+
+
+def ingest_documents(
+    paths: list[Path],
+    embedding_client: EmbeddingClient,
+    milvus_manager: MilvusManager,
+    batch_size: int = settings.INGEST_BATCH_SIZE,
+    workers: int = settings.INGEST_WORKERS,
+    pages_per_task: int = settings.INGEST_PAGES_PER_TASK,
+    incremental: bool = True,
+    root: Path | None = None,
+) -> IngestionReport:
+    """Parse, chunk, embed and insert PDFs into the Milvus collection.
+
+    Documents are stored under their path relative to `root` (the working directory by
+    default). Chunks are diffed against what is already stored for the same documents: only
+    new or changed chunks are embedded, and chunks that no longer exist are deleted, so
+    re-ingesting a document never duplicates it as long as the root is the same. Pass
+    `incremental=False` only for a collection known to be empty, to skip the manifest query.
+    """
+    report = IngestionReport(documents=len(paths))
+    sources = {path: source_name(path, root or Path.cwd()) for path in paths}
+    manifest = ChunkManifest(
+        milvus_manager.iter_chunk_manifest(list(sources.values())) if incremental else ()
+    )
+    inserted = 0
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        batches = iter_chunk_batches(sources, pool, pages_per_task, max_in_flight=workers * 2)
+        for chunks in batched(iter_chunks(batches, report), batch_size):
+            to_embed: list[Chunk] = []
+            to_reuse: list[tuple[Chunk, int]] = []
+            for chunk in chunks:
+                unchanged, reusable_id = manifest.match(chunk)
+                if unchanged:
+                    report.unchanged += 1
+                elif reusable_id is not None:
+                    to_reuse.append((chunk, reusable_id))
+                else:
+                    to_embed.append(chunk)
+
+            rows: list[dict] = []
+            if to_embed:
+                vectors = embedding_client.embed_documents([chunk.text for chunk in to_embed])
+                rows.extend(map(to_row, to_embed, vectors))
+                report.embedded += len(to_embed)
+            reused_ids = [row_id for _, row_id in to_reuse]
+            if to_reuse:
+                stored = milvus_manager.get_vectors(reused_ids)
+                rows.extend(to_row(chunk, stored[row_id]) for chunk, row_id in to_reuse)
+                report.reused += len(to_reuse)
+            if rows:
+                inserted += milvus_manager.insert_batch(rows)
+                LOGGER.info(f"Inserted {inserted} chunks")
+            # Replaced rows go only once their copies are stored, so a failed embed or insert
+            # leaves them in place.
+            if reused_ids:
+                milvus_manager.delete_ids(reused_ids)
+
+    report.deleted = milvus_manager.delete_ids(manifest.orphan_ids())
+    if report.embedded or report.reused or report.deleted:
+        milvus_manager.bump_collection_version()
+    report.seconds = time.perf_counter() - start
+    return report
@@ -1,9 +1,20 @@
+from typing import Any
+
 from langchain_core.messages import BaseMessage
 from langchain_google_genai import ChatGoogleGenerativeAI
 
 from config.settings import settings
 
 
+def content_text(content: Any) -> str:
+    """Flatten message content, which may be a list of content blocks, into text."""
+    if isinstance(content, list):
+        return "".join(
+            block.get("text", "") if isinstance(block, dict) else str(block) for block in content
+        )
+    return content or ""
+
+
 class LLMClient:
     def __init__(self):
         self.model = ChatGoogleGenerativeAI(
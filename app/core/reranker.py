@@ -0,0 +1,112 @@
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any
+
+from utils.cache import CacheStats
+from utils.logger import configure_logging
+from utils.metrics import timed
+
+configure_logging()
+LOGGER = logging.getLogger("reranker")
+LOGGER.setLevel(logging.INFO)
+
+
+class CrossEncoderReranker:
+    """Reorders search hits with a local CPU cross-encoder.
+
+    All (query, passage) pairs are scored in one batched forward pass on a dedicated thread
+    pool. When scoring exceeds `timeout_seconds` or fails, the hits are returned in their
+    original order so retrieval never waits on the reranker. The model is loaded on first use
+    unless `warm_up` ran, and that load counts against the timeout.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        batch_size: int = 32,
+        timeout_seconds: float | None = None,
+        device: str = "cpu",
+    ):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.timeout_seconds = timeout_seconds
+        self.device = device
+        # One worker: a single forward pass already uses every core through torch.
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="reranker")
+        # hits count reranked queries, misses count fallbacks to the original order
+        self.stats = CacheStats()
+        self._model: Any = None
+        self._lock = threading.Lock()
+
+    def load(self) -> Any:
+        """Load the cross-encoder once; torch is imported here to keep startup cheap."""
+        with self._lock:
+            if self._model is None:
+                from sentence_transformers import CrossEncoder
+
+                self._model = CrossEncoder(self.model_name, device=self.device)
+                LOGGER.info(f"Loaded cross-encoder {self.model_name} on {self.device}")
+        return self._model
+
+    async def warm_up(self) -> None:
+        """Load the model off the event loop ahead of the first request."""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self.executor, self.load)
+
+    def score(self, queries: list[str], texts: list[str]) -> list[float]:
+        """Score every passage against the queries in a single batched pass.
+
+        With several queries a passage keeps its best score across them.
+        """
+        model = self.load()
+        pairs = [(query, text) for query in queries for text in texts]
+        with timed("rerank"):
+            scores = model.predict(pairs, batch_size=self.batch_size, show_progress_bar=False)
+        per_query = [scores[i : i + len(texts)] for i in range(0, len(pairs), len(texts))]
+        return [float(max(column)) for column in zip(*per_query)]
+
+    def _order(self, hits: list[dict], scores: list[float], top_k: int) -> list[dict]:
+        self.stats.hits += 1
+        ranked = sorted(zip(scores, hits), key=lambda pair: pair[0], reverse=True)
+        return [hit for _, hit in ranked[:top_k]]
+
+    def _fallback(self, hits: list[dict], top_k: int, reason: str) -> list[dict]:
+        self.stats.misses += 1
+        LOGGER.warning(f"Rerank skipped ({reason}); keeping the original order")
+        return hits[:top_k]
+
+    def rerank(self, query: str | list[str], hits: list[dict], top_k: int) -> list[dict]:
+        """Return the `top_k` best hits, or the first `top_k` if reranking is too slow."""
+        if len(hits) <= 1:
+            return hits[:top_k]
+        queries = [query] if isinstance(query, str) else query
+        texts = [hit["entity"]["text_content"] for hit in hits]
+        future = self.executor.submit(self.score, queries, texts)
+        try:
+            scores = future.result(timeout=self.timeout_seconds)
+        except FutureTimeoutError:
+            # Drops the request if it is still queued behind an earlier one.
+            future.cancel()
+            return self._fallback(hits, top_k, f"over {self.timeout_seconds}s budget")
+        except Exception as e:
+            return self._fallback(hits, top_k, f"error: {e}")
+        return self._order(hits, scores, top_k)
+
+    async def arerank(self, query: str | list[str], hits: list[dict], top_k: int) -> list[dict]:
+        """Rerank without blocking the event loop."""
+        if len(hits) <= 1:
+            return hits[:top_k]
+        queries = [query] if isinstance(query, str) else query
+        texts = [hit["entity"]["text_content"] for hit in hits]
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self.executor, self.score, queries, texts)
+        try:
+            scores = await asyncio.wait_for(future, timeout=self.timeout_seconds)
+        except TimeoutError:
+            return self._fallback(hits, top_k, f"over {self.timeout_seconds}s budget")
+        except Exception as e:
+            return self._fallback(hits, top_k, f"error: {e}")
+        return self._order(hits, scores, top_k)
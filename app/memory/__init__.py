@@ -1,14 +1,16 @@
+from psycopg_pool import AsyncConnectionPool
+
 from .postgres import get_postgres_saver, get_postgres_store
 
 
-def initialize_database():
+def initialize_database(pool: AsyncConnectionPool):
     """Initialize appropriate database checkpointer"""
-    return get_postgres_saver()
+    return get_postgres_saver(pool)
 
 
-def initialize_store():
+def initialize_store(pool: AsyncConnectionPool):
     """Initialize appropriate database checkpointer"""
-    return get_postgres_store()
+    return get_postgres_store(pool)
 
 
 __all__ = ["initialize_database", "initialize_store"]
@@ -0,0 +1,458 @@
+"""In-process flat vector store that stands in for MilvusClient on single-node deployments."""
+
+import fcntl
+import json
+import logging
+import re
+import shutil
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from pymilvus import CollectionSchema, DataType, MilvusClient
+
+from utils.logger import configure_logging
+
+configure_logging()
+LOGGER = logging.getLogger("flat_index")
+LOGGER.setLevel(logging.INFO)
+
+# The only filter shape the app issues: `<field> in [<json values>]`.
+IN_FILTER_PATTERN = re.compile(r"^\s*(\w+)\s+in\s+(\[.*\])\s*$", re.DOTALL)
+
+VECTOR_DTYPES = {
+    int(DataType.FLOAT_VECTOR): np.float32,
+    int(DataType.FLOAT16_VECTOR): np.float16,
+    int(DataType.BINARY_VECTOR): np.uint8,
+}
+# Set bits in every byte value, for Hamming distances between packed binary vectors.
+POPCOUNT = np.array([bin(value).count("1") for value in range(256)], dtype=np.uint8)
+
+
+def parse_filter(expression: str) -> tuple[str, set] | None:
+    """Parse an empty or `field in [...]` filter into (field, values)."""
+    if not expression.strip():
+        return None
+    match = IN_FILTER_PATTERN.match(expression)
+    if not match:
+        raise ValueError(f"Unsupported filter for the flat index: {expression!r}")
+    return match.group(1), set(json.loads(match.group(2)))
+
+
+class FlatCollection:
+    """One collection on disk: append-only vectors plus JSON-lines scalar rows.
+
+    Float vectors (float32 or float16) are L2-normalized on insert, so cosine similarity is a
+    plain dot product; binary vectors are packed bits compared by Hamming distance. Vectors
+    are read through a memory map so only the pages a search touches are loaded. Deletes are
+    tombstones until more than half the rows are dead, then the files are compacted.
+
+    Several processes may share a collection (the server and `scripts/ingest.py`): writes hold
+    an exclusive `flock` on the collection, and every read reloads the files if another
+    process changed them.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.meta = json.loads(self.meta_path.read_text())
+        self.dim: int = self.meta["dim"]
+        self.vector_type = DataType(self.meta.get("vector_type", DataType.FLOAT_VECTOR))
+        self.dtype = VECTOR_DTYPES[int(self.vector_type)]
+        self.binary = self.vector_type == DataType.BINARY_VECTOR
+        # Stored values per vector: packed bytes for binary, components otherwise.
+        self.width = self.dim // 8 if self.binary else self.dim
+        self.score_block_rows = 4096
+        self._lock = threading.Lock()
+        self._load()
+
+    @property
+    def meta_path(self) -> Path:
+        return self.path / "collection.json"
+
+    @property
+    def vectors_path(self) -> Path:
+        return self.path / "vectors.f32"
+
+    @property
+    def rows_path(self) -> Path:
+        return self.path / "rows.jsonl"
+
+    @classmethod
+    def create(
+        cls, path: Path, dim: int, fields: list[dict], vector_type: int = DataType.FLOAT_VECTOR
+    ) -> "FlatCollection":
+        path.mkdir(parents=True, exist_ok=True)
+        meta = {
+            "dim": dim,
+            "vector_type": int(vector_type),
+            "fields": fields,
+            "properties": {},
+            "next_id": 1,
+            "deleted": [],
+        }
+        (path / "collection.json").write_text(json.dumps(meta))
+        (path / "vectors.f32").touch()
+        (path / "rows.jsonl").touch()
+        return cls(path)
+
+    def _file_stamp(self) -> tuple:
+        """Identity of the on-disk state; any write by any process changes it."""
+        stats = [p.stat() for p in (self.meta_path, self.rows_path, self.vectors_path)]
+        return tuple((stat.st_ino, stat.st_size, stat.st_mtime_ns) for stat in stats)
+
+    @contextmanager
+    def _file_lock(self, operation: int) -> Iterator[None]:
+        with (self.path / "collection.lock").open("a") as lock_file:
+            fcntl.flock(lock_file, operation)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _reload_if_changed(self) -> None:
+        """Re-read meta, rows and the vector map if another process wrote to the files."""
+        if self._file_stamp() != self._stamp:
+            self.meta = json.loads(self.meta_path.read_text())
+            self._load()
+
+    def refresh(self) -> None:
+        """Pick up writes from other processes before a read."""
+        with self._lock, self._file_lock(fcntl.LOCK_SH):
+            self._reload_if_changed()
+
+    @contextmanager
+    def writing(self) -> Iterator[None]:
+        """Hold the thread and file locks over a write, starting from the latest state.
+
+        Reloading under the exclusive lock keeps `next_id` and the tombstones current, so two
+        writers never hand out the same primary key.
+        """
+        with self._lock, self._file_lock(fcntl.LOCK_EX):
+            self._reload_if_changed()
+            yield
+            self._stamp = self._file_stamp()
+
+    def _load(self) -> None:
+        with self.rows_path.open(encoding="utf-8") as rows_file:
+            self.rows: list[dict] = [json.loads(line) for line in rows_file]
+        self.ids = np.fromiter((row["id"] for row in self.rows), dtype=np.int64)
+        self.positions = {int(row_id): position for position, row_id in enumerate(self.ids)}
+        self.alive = np.ones(len(self.rows), dtype=bool)
+        for row_id in self.meta["deleted"]:
+            if row_id in self.positions:
+                self.alive[self.positions[row_id]] = False
+        self._map_vectors()
+        self._stamp = self._file_stamp()
+
+    def _map_vectors(self) -> None:
+        if self.vectors_path.stat().st_size == 0:
+            self.vectors = np.zeros((0, self.width), dtype=self.dtype)
+        else:
+            self.vectors = np.memmap(
+                self.vectors_path, dtype=self.dtype, mode="r", shape=(len(self.rows), self.width)
+            )
+
+    def _save_meta(self) -> None:
+        # Replace rather than rewrite, so readers never see a partially written file.
+        tmp_meta = self.meta_path.with_suffix(".tmp")
+        tmp_meta.write_text(json.dumps(self.meta))
+        tmp_meta.replace(self.meta_path)
+
+    def encode(self, vectors: list) -> np.ndarray:
+        """Stack client vectors in the stored layout: normalized floats or packed bits."""
+        encoded: np.ndarray
+        if self.binary:
+            encoded = np.frombuffer(b"".join(vectors), dtype=np.uint8).reshape(-1, self.width)
+        else:
+            floats = np.asarray(vectors, dtype=np.float32)
+            floats /= np.maximum(np.linalg.norm(floats, axis=1, keepdims=True), 1e-12)
+            encoded = floats
+        if encoded.shape[1] != self.width:
+            raise ValueError(f"Expected {self.dim}-d vectors, got {encoded.shape[1]} values")
+        return encoded.astype(self.dtype)
+
+    def insert(self, data: list[dict]) -> list[int]:
+        vectors = self.encode([row["vector"] for row in data])
+        with self.writing():
+            first_id = self.meta["next_id"]
+            ids = list(range(first_id, first_id + len(data)))
+            rows = [
+                {"id": row_id, **{k: v for k, v in row.items() if k != "vector"}}
+                for row_id, row in zip(ids, data)
+            ]
+            with self.vectors_path.open("ab") as vectors_file:
+                vectors_file.write(vectors.tobytes())
+            with self.rows_path.open("a", encoding="utf-8") as rows_file:
+                rows_file.writelines(json.dumps(row, ensure_ascii=False) + "\n" for row in rows)
+            self.meta["next_id"] = first_id + len(data)
+            self._save_meta()
+            # Publish new arrays rather than mutating the ones a concurrent search may hold.
+            start = len(self.rows)
+            self.rows = self.rows + rows
+            self.ids = np.concatenate([self.ids, np.asarray(ids, dtype=np.int64)])
+            self.positions.update({row_id: start + offset for offset, row_id in enumerate(ids)})
+            self.alive = np.concatenate([self.alive, np.ones(len(rows), dtype=bool)])
+            self._map_vectors()
+        return ids
+
+    def delete(self, ids: list[int]) -> int:
+        with self.writing():
+            alive = self.alive.copy()
+            deleted = 0
+            for row_id in ids:
+                position = self.positions.get(int(row_id))
+                if position is not None and alive[position]:
+                    alive[position] = False
+                    self.meta["deleted"].append(int(row_id))
+                    deleted += 1
+            self.alive = alive
+            if len(self.meta["deleted"]) * 2 > len(self.rows):
+                self._compact()
+            else:
+                self._save_meta()
+        return deleted
+
+    def _compact(self) -> None:
+        keep = np.flatnonzero(self.alive)
+        vectors = np.asarray(self.vectors[keep])
+        rows = [self.rows[position] for position in keep]
+        tmp_vectors = self.vectors_path.with_suffix(".tmp")
+        tmp_rows = self.rows_path.with_suffix(".tmp")
+        tmp_vectors.write_bytes(vectors.tobytes())
+        with tmp_rows.open("w", encoding="utf-8") as rows_file:
+            rows_file.writelines(json.dumps(row, ensure_ascii=False) + "\n" for row in rows)
+        tmp_vectors.replace(self.vectors_path)
+        tmp_rows.replace(self.rows_path)
+        self.meta["deleted"] = []
+        self._save_meta()
+        self._load()
+        LOGGER.info(f"Compacted {self.path.name} to {len(rows)} rows")
+
+    def entity(self, position: int, output_fields: list[str], rows=None, vectors=None) -> dict:
+        row = (rows or self.rows)[position]
+        entity = {field: row.get(field) for field in output_fields if field != "vector"}
+        if "vector" in output_fields:
+            vector = (self.vectors if vectors is None else vectors)[position]
+            # Binary vectors are returned as packed bytes, like Milvus does.
+            entity["vector"] = vector.tobytes() if self.binary else vector.tolist()
+        return entity
+
+    def matching_positions(self, expression: str) -> np.ndarray:
+        self.refresh()
+        alive = np.flatnonzero(self.alive)
+        parsed = parse_filter(expression)
+        if parsed is None:
+            return alive
+        field, values = parsed
+        return np.asarray([p for p in alive if self.rows[p].get(field) in values], dtype=np.int64)
+
+    def cosine_scores(self, queries: np.ndarray, vectors: np.ndarray) -> np.ndarray:
+        """Score every query against every stored vector in one (queries x rows) product.
+
+        float32 vectors are multiplied straight from the memory map; float16 ones are upcast
+        `score_block_rows` rows at a time, so the whole matrix is never copied into RAM.
+        """
+        queries = queries.astype(np.float32, copy=False)
+        if vectors.dtype == np.float32:
+            return np.asarray(queries @ vectors.T)
+        scores = np.empty((len(queries), len(vectors)), dtype=np.float32)
+        for start in range(0, len(vectors), self.score_block_rows):
+            block = vectors[start : start + self.score_block_rows].astype(np.float32)
+            scores[:, start : start + len(block)] = queries @ block.T
+        return scores
+
+    def search(self, data: list[list[float]], limit: int, output_fields: list[str]) -> list:
+        with self._lock, self._file_lock(fcntl.LOCK_SH):
+            self._reload_if_changed()
+            vectors, alive, ids, rows = self.vectors, self.alive, self.ids, self.rows
+        if not alive.any():
+            return [[] for _ in data]
+        queries = self.encode(data)
+        if self.binary:
+            # Negated Hamming distances, so that higher scores are closer as for cosine.
+            scores = np.stack(
+                [-POPCOUNT[vectors ^ query].sum(axis=1, dtype=np.float32) for query in queries]
+            )
+        else:
+            scores = self.cosine_scores(queries, vectors)
+        scores[:, ~alive] = -np.inf
+        limit = min(limit, int(alive.sum()))
+        top = np.argpartition(-scores, limit - 1, axis=1)[:, :limit]
+        results = []
+        for query_index, candidates in enumerate(top):
+            ranked = candidates[np.argsort(-scores[query_index, candidates])]
+            results.append([
+                {
+                    "id": int(ids[position]),
+                    # Hamming distances are reported as positive counts, like Milvus does.
+                    "distance": float(abs(scores[query_index, position]))
+                    if self.binary
+                    else float(scores[query_index, position]),
+                    "entity": self.entity(position, output_fields, rows, vectors),
+                }
+                for position in ranked
+            ])
+        return results
+
+
+class FlatQueryIterator:
+    def __init__(self, collection: FlatCollection, positions: np.ndarray, batch_size: int, fields):
+        self.collection = collection
+        # Positions index this snapshot; a reload or compaction publishes new arrays.
+        self.rows, self.vectors = collection.rows, collection.vectors
+        self.positions = positions
+        self.batch_size = batch_size
+        self.fields = fields
+        self.offset = 0
+
+    def next(self) -> list[dict]:
+        batch = self.positions[self.offset : self.offset + self.batch_size]
+        self.offset += len(batch)
+        return [
+            self.collection.entity(position, self.fields, self.rows, self.vectors)
+            for position in batch
+        ]
+
+    def close(self) -> None:
+        pass
+
+
+class FlatIndexClient:
+    """Implements the subset of the MilvusClient API used by MilvusManager over local files.
+
+    Brute-force cosine search over memory-mapped float32 vectors is exact and needs no
+    external service, which suits single-node deployments, benchmarks and tests.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._collections: dict[str, FlatCollection] = {}
+        self._lock = threading.Lock()
+
+    def _collection(self, collection_name: str) -> FlatCollection:
+        with self._lock:
+            if collection_name not in self._collections:
+                if not self.has_collection(collection_name):
+                    raise ValueError(f"Collection {collection_name} does not exist")
+                self._collections[collection_name] = FlatCollection(self.path / collection_name)
+            return self._collections[collection_name]
+
+    def has_collection(self, collection_name: str, **kwargs) -> bool:
+        return (self.path / collection_name / "collection.json").exists()
+
+    def drop_collection(self, collection_name: str, **kwargs) -> None:
+        with self._lock:
+            self._collections.pop(collection_name, None)
+            shutil.rmtree(self.path / collection_name, ignore_errors=True)
+
+    def prepare_index_params(self, **kwargs):
+        # Search is always exact cosine, so index parameters are accepted and ignored.
+        return MilvusClient.prepare_index_params(**kwargs)
+
+    def list_indexes(self, collection_name: str, **kwargs) -> list[str]:
+        return ["vector"] if self.has_collection(collection_name) else []
+
+    def describe_index(self, collection_name: str, index_name: str, **kwargs) -> dict:
+        self._collection(collection_name)
+        return {"index_type": "FLAT", "metric_type": "COSINE", "field_name": index_name}
+
+    def create_index(self, collection_name: str, index_params, **kwargs) -> None:
+        self._collection(collection_name)
+
+    def drop_index(self, collection_name: str, index_name: str, **kwargs) -> None:
+        pass
+
+    def load_collection(self, collection_name: str, **kwargs) -> None:
+        # Opening the collection maps its vectors; pages are read in as searches touch them.
+        self._collection(collection_name)
+
+    def release_collection(self, collection_name: str, **kwargs) -> None:
+        with self._lock:
+            self._collections.pop(collection_name, None)
+
+    def get_load_state(self, collection_name: str, **kwargs) -> dict:
+        return {"state": "Loaded" if collection_name in self._collections else "NotLoad"}
+
+    def create_collection(
+        self, collection_name: str, schema: CollectionSchema, index_params=None, **kwargs
+    ) -> None:
+        fields = [
+            {"name": f.name, "type": int(f.dtype), "params": dict(f.params)} for f in schema.fields
+        ]
+        vector_fields = [f for f in fields if "dim" in f["params"]]
+        if len(vector_fields) != 1:
+            raise ValueError("The flat index supports exactly one vector field")
+        (vector_field,) = vector_fields
+        if vector_field["type"] not in VECTOR_DTYPES:
+            raise ValueError(f"Unsupported vector type {DataType(vector_field['type']).name}")
+        with self._lock:
+            collection = FlatCollection.create(
+                self.path / collection_name,
+                vector_field["params"]["dim"],
+                fields,
+                vector_field["type"],
+            )
+            self._collections[collection_name] = collection
+
+    def describe_collection(self, collection_name: str, **kwargs) -> dict:
+        collection = self._collection(collection_name)
+        collection.refresh()
+        return {
+            "collection_name": collection_name,
+            "fields": collection.meta["fields"],
+            "properties": dict(collection.meta["properties"]),
+        }
+
+    def alter_collection_properties(self, collection_name: str, properties: dict, **kwargs):
+        collection = self._collection(collection_name)
+        with collection.writing():
+            collection.meta["properties"].update(properties)
+            collection._save_meta()
+
+    def insert(self, collection_name: str, data: list[dict], **kwargs) -> dict:
+        ids = self._collection(collection_name).insert(data)
+        return {"insert_count": len(ids), "ids": ids}
+
+    def delete(self, collection_name: str, ids: list[int], **kwargs) -> dict:
+        return {"delete_count": self._collection(collection_name).delete(ids)}
+
+    def get(self, collection_name: str, ids: list[int], output_fields: list[str], **kwargs):
+        collection = self._collection(collection_name)
+        collection.refresh()
+        positions = [collection.positions.get(int(row_id)) for row_id in ids]
+        return [
+            collection.entity(position, output_fields)
+            for position in positions
+            if position is not None and collection.alive[position]
+        ]
+
+    def query_iterator(
+        self,
+        collection_name: str,
+        batch_size: int = 1000,
+        filter: str = "",
+        output_fields: list[str] | None = None,
+        **kwargs,
+    ) -> FlatQueryIterator:
+        collection = self._collection(collection_name)
+        positions = collection.matching_positions(filter)
+        # Milvus always returns the primary key alongside the requested fields.
+        fields = list(dict.fromkeys(["id", *(output_fields or [])]))
+        return FlatQueryIterator(collection, positions, batch_size, fields)
+
+    def search(
+        self,
+        collection_name: str,
+        data: list[list[float]],
+        limit: int = 10,
+        output_fields: list[str] | None = None,
+        **kwargs: Any,
+    ) -> list[list[dict]]:
+        return self._collection(collection_name).search(data, limit, output_fields or [])
+
+    def close(self) -> None:
+        self._collections.clear()
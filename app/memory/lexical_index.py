@@ -0,0 +1,125 @@
+import asyncio
+import logging
+import math
+import re
+from collections import Counter, defaultdict
+from collections.abc import Iterable
+
+import numpy as np
+
+from memory.milvus_manager import CHUNK_FIELDS, MilvusManager
+from utils.logger import configure_logging
+
+configure_logging()
+LOGGER = logging.getLogger("lexical_index")
+LOGGER.setLevel(logging.INFO)
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> list[str]:
+    return TOKEN_PATTERN.findall(text.casefold())
+
+
+class BM25Index:
+    """In-memory Okapi BM25 inverted index over chunk text."""
+
+    def __init__(self, rows: Iterable[dict], k1: float = 1.5, b: float = 0.75):
+        self.ids: list[int] = []
+        self.texts: list[str] = []
+        self.pages: list[int] = []
+        self.keys: list[tuple[str | None, str | None]] = []
+        doc_lengths: list[int] = []
+        postings: dict[str, list[tuple[int, int]]] = defaultdict(list)
+
+        for doc_index, row in enumerate(rows):
+            self.ids.append(row["id"])
+            self.texts.append(row["text_content"])
+            self.pages.append(row.get("page_number", 0))
+            self.keys.append((row.get("source"), row.get("chunk_hash")))
+            term_counts = Counter(tokenize(row["text_content"]))
+            doc_lengths.append(sum(term_counts.values()))
+            for term, count in term_counts.items():
+                postings[term].append((doc_index, count))
+
+        self.size = len(self.ids)
+        lengths = np.asarray(doc_lengths, dtype=np.float32)
+        average_length = float(lengths.mean()) if self.size else 0.0
+        # Per-document length normalisation is query independent, so precompute it once.
+        self._norm = k1 * (1 - b + b * lengths / (average_length or 1.0))
+        self.k1 = k1
+        self._postings: dict[str, tuple[np.ndarray, np.ndarray, float]] = {}
+        for term, entries in postings.items():
+            docs = np.fromiter((doc for doc, _ in entries), dtype=np.int64, count=len(entries))
+            tfs = np.fromiter((tf for _, tf in entries), dtype=np.float32, count=len(entries))
+            idf = math.log(1 + (self.size - len(entries) + 0.5) / (len(entries) + 0.5))
+            self._postings[term] = (docs, tfs, idf)
+
+    def search(self, query: str, limit: int) -> list[dict]:
+        """Return the top hits in the same shape as Milvus search hits."""
+        scores = np.zeros(self.size, dtype=np.float32)
+        for term in set(tokenize(query)):
+            if term not in self._postings:
+                continue
+            docs, tfs, idf = self._postings[term]
+            scores[docs] += idf * tfs * (self.k1 + 1) / (tfs + self._norm[docs])
+
+        matched = np.flatnonzero(scores)
+        if matched.size == 0:
+            return []
+        if matched.size > limit:
+            matched = matched[np.argpartition(-scores[matched], limit)[:limit]]
+        ranked = matched[np.argsort(-scores[matched])]
+        return [
+            {
+                "id": self.ids[index],
+                "distance": float(scores[index]),
+                "entity": {
+                    "text_content": self.texts[index],
+                    "page_number": self.pages[index],
+                    "source": self.keys[index][0],
+                    "chunk_hash": self.keys[index][1],
+                },
+            }
+            for index in ranked
+        ]
+
+
+class LexicalIndex:
+    """BM25 index over the Milvus collection, rebuilt when the collection version changes."""
+
+    def __init__(self, milvus_manager: MilvusManager):
+        self.milvus_manager = milvus_manager
+        self._index: BM25Index | None = None
+        self._version: str | None = None
+        self._lock = asyncio.Lock()
+
+    def build(self) -> BM25Index:
+        rows = self.milvus_manager.iter_rows(output_fields=["id", *CHUNK_FIELDS])
+        index = BM25Index(rows)
+        LOGGER.info(f"Built BM25 index over {index.size} chunks")
+        return index
+
+    async def refresh(self) -> None:
+        """Rebuild the index if the collection changed; searches use the old one meanwhile."""
+        version = await self.milvus_manager.acollection_version()
+        if version == self._version:
+            return
+        async with self._lock:
+            if version == self._version:
+                return
+            loop = asyncio.get_running_loop()
+            self._index = await loop.run_in_executor(self.milvus_manager.executor, self.build)
+            self._version = version
+
+    def search(self, query: str, limit: int) -> list[dict]:
+        if self._index is None:
+            self._index = self.build()
+        return self._index.search(query, limit)
+
+    async def asearch(self, query: str, limit: int) -> list[dict]:
+        await self.refresh()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.milvus_manager.executor, self.search, query, limit
+        )
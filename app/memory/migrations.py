@@ -0,0 +1,118 @@
+"""Versioned schema migrations, applied once at application startup."""
+
+import logging
+from dataclasses import dataclass
+
+from psycopg import AsyncConnection
+from psycopg.rows import dict_row
+
+from utils.logger import configure_logging
+
+configure_logging()
+LOGGER = logging.getLogger("migrations")
+LOGGER.setLevel(logging.INFO)
+
+# Arbitrary key for pg_advisory_xact_lock so concurrent workers apply migrations one at a time.
+MIGRATION_LOCK_ID = 7_420_001
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    description: str
+    sql: str
+
+
+MIGRATIONS: list[Migration] = [
+    Migration(
+        version=1,
+        description="create session_state",
+        sql="""
+            CREATE TABLE IF NOT EXISTS session_state (
+                session_id TEXT PRIMARY KEY,
+                user_input TEXT,
+                conversation_history JSONB,
+                retrieved_context JSONB,
+                response TEXT,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            );
+        """,
+    ),
+    Migration(
+        version=2,
+        description="move conversation history to append-only session_messages",
+        sql="""
+            CREATE TABLE IF NOT EXISTS session_messages (
+                session_id TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                role TEXT NOT NULL,
+                content TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (session_id, seq)
+            );
+
+            ALTER TABLE session_state
+                ADD COLUMN IF NOT EXISTS message_count INTEGER NOT NULL DEFAULT 0;
+
+            -- Older rows may hold the history as a JSON-encoded string rather than an array.
+            UPDATE session_state
+            SET conversation_history = (conversation_history #>> '{}')::jsonb
+            WHERE jsonb_typeof(conversation_history) = 'string';
+
+            INSERT INTO session_messages (session_id, seq, role, content)
+            SELECT s.session_id, m.ordinality - 1, m.value ->> 'role', m.value ->> 'content'
+            FROM session_state s
+            CROSS JOIN LATERAL jsonb_array_elements(
+                CASE WHEN jsonb_typeof(s.conversation_history) = 'array'
+                     THEN s.conversation_history ELSE '[]'::jsonb END
+            ) WITH ORDINALITY AS m(value, ordinality)
+            ON CONFLICT DO NOTHING;
+
+            UPDATE session_state
+            SET message_count = jsonb_array_length(conversation_history)
+            WHERE jsonb_typeof(conversation_history) = 'array';
+
+            ALTER TABLE session_state DROP COLUMN IF EXISTS conversation_history;
+        """,
+    ),
+    Migration(
+        version=3,
+        description="add rolling conversation summary to session_state",
+        sql="""
+            ALTER TABLE session_state
+                ADD COLUMN IF NOT EXISTS summary TEXT NOT NULL DEFAULT '',
+                ADD COLUMN IF NOT EXISTS summarized_count INTEGER NOT NULL DEFAULT 0;
+        """,
+    ),
+]
+
+
+async def run_migrations(conn: AsyncConnection) -> int:
+    """Apply pending migrations and return the resulting schema version."""
+    async with conn.transaction():
+        await conn.execute("SELECT pg_advisory_xact_lock(%s)", (MIGRATION_LOCK_ID,))
+        await conn.execute("""
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version INTEGER PRIMARY KEY,
+                description TEXT NOT NULL,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            );
+        """)
+        async with conn.cursor(row_factory=dict_row) as cur:
+            await cur.execute("SELECT COALESCE(MAX(version), 0) AS version FROM schema_version")
+            row = await cur.fetchone()
+        current = row["version"] if row else 0
+
+        for migration in MIGRATIONS:
+            if migration.version <= current:
+                continue
+            LOGGER.info(f"Applying migration {migration.version}: {migration.description}")
+            await conn.execute(migration.sql)
+            await conn.execute(
+                "INSERT INTO schema_version (version, description) VALUES (%s, %s)",
+                (migration.version, migration.description),
+            )
+            current = migration.version
+
+    LOGGER.info(f"Database schema at version {current}")
+    return current
@@ -1,28 +1,527 @@
+import asyncio
+import json
 import logging
+import math
+import time
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any
 
-from pymilvus import MilvusClient
+import numpy as np
+from pymilvus import DataType, MilvusClient
 
 from config.settings import settings
 from core.embedder import EmbeddingClient
+from memory.flat_index import FlatIndexClient
 from utils.logger import configure_logging
+from utils.metrics import timed
 
 configure_logging()
 LOGGER = logging.getLogger("milvus_manager")
 LOGGER.setLevel(logging.INFO)
 
+# Collection property that ingestion bumps whenever the indexed content changes, so caches
+# derived from search results know when to invalidate.
+VERSION_PROPERTY = "rag.collection_version"
+
+# Scalar fields returned with every chunk. Re-ingestion can store a chunk under a new primary
+# key, but its source and chunk_hash stay the same.
+CHUNK_FIELDS = ["text_content", "page_number", "source", "chunk_hash"]
+
+INDEX_TYPES = (
+    "AUTOINDEX", "HNSW", "IVF_FLAT", "IVF_SQ8", "IVF_PQ", "DISKANN", "BIN_FLAT", "BIN_IVF_FLAT"
+)
+
+# The search parameter that sets how much of each index a query explores.
+SEARCH_EFFORT_PARAMS = {
+    "HNSW": "ef",
+    "IVF_FLAT": "nprobe",
+    "IVF_SQ8": "nprobe",
+    "IVF_PQ": "nprobe",
+    "DISKANN": "search_list",
+    "BIN_IVF_FLAT": "nprobe",
+}
+
+# Milvus field type of each MILVUS_VECTOR_TYPE.
+VECTOR_FIELD_TYPES = {
+    "float": DataType.FLOAT_VECTOR,
+    "float16": DataType.FLOAT16_VECTOR,
+    "binary": DataType.BINARY_VECTOR,
+}
+
+# Optional scalar copy of each float16/binary vector at full precision, read only by rescoring.
+FULL_PRECISION_FIELD = "vector_full"
+
+
+def default_build_params(index_type: str, dim: int, num_rows: int | None = None) -> dict:
+    """Build parameters for `index_type`, with IVF lists scaled to `num_rows` when known."""
+    nlist = 1024 if num_rows is None else min(1024, max(16, int(4 * math.sqrt(num_rows))))
+    if index_type == "HNSW":
+        return {"M": 16, "efConstruction": 200}
+    if index_type in ("IVF_FLAT", "IVF_SQ8", "BIN_IVF_FLAT"):
+        return {"nlist": nlist}
+    if index_type == "IVF_PQ":
+        # Sub-vectors of about 8 dimensions; m has to divide the vector dimension.
+        m = next(m for m in range(max(dim // 8, 1), 0, -1) if dim % m == 0)
+        return {"nlist": nlist, "m": m, "nbits": 8}
+    return {}
+
+
+def default_search_params(index_type: str) -> dict[str, int]:
+    """Per-request search parameters for `index_type` from Settings."""
+    configured = {
+        "ef": settings.MILVUS_SEARCH_EF,
+        "nprobe": settings.MILVUS_SEARCH_NPROBE,
+        "search_list": settings.MILVUS_SEARCH_LIST,
+    }
+    key = SEARCH_EFFORT_PARAMS.get(index_type)
+    return {key: configured[key]} if key else {}
+
+
+def encode_vectors(vectors: list, vector_type: str) -> list:
+    """Convert float vectors to the representation Milvus expects for `vector_type`."""
+    if vector_type == "float16":
+        return [np.asarray(vector, dtype=np.float16) for vector in vectors]
+    if vector_type == "binary":
+        # One bit per dimension: the sign of each component.
+        return [np.packbits(np.asarray(vector) > 0).tobytes() for vector in vectors]
+    return vectors
+
+
+def decode_vector(value: Any, vector_type: str, dim: int) -> np.ndarray:
+    """Read a stored vector back as float32; binary vectors become +1/-1 components."""
+    if isinstance(value, list) and value and isinstance(value[0], bytes):
+        value = b"".join(value)
+    if vector_type == "binary":
+        bits = np.unpackbits(np.frombuffer(value, dtype=np.uint8))[:dim]
+        return bits.astype(np.float32) * 2 - 1
+    if isinstance(value, bytes):
+        return np.frombuffer(value, dtype=np.float16).astype(np.float32)
+    return np.asarray(value, dtype=np.float32)
+
+
+def create_vector_store_client() -> MilvusClient | FlatIndexClient:
+    """Build the vector store client selected by `VECTOR_STORE`."""
+    if settings.VECTOR_STORE == "flat":
+        LOGGER.info(f"Using the in-process flat index at {settings.FLAT_INDEX_PATH}")
+        return FlatIndexClient(settings.FLAT_INDEX_PATH)
+    LOGGER.info(f"Connecting to Milvus at {settings.MILVUS_URI}")
+    return MilvusClient(uri=settings.MILVUS_URI, token=settings.MILVUS_TOKEN)
+
 
 class MilvusManager:
-    def __init__(self):
-        self.client = MilvusClient(uri=settings.MILVUS_URI, token=settings.MILVUS_TOKEN)
+    def __init__(self, client: MilvusClient | FlatIndexClient | None = None):
+        self.client = client or create_vector_store_client()
         self.collection_name = settings.MILVUS_COLLECTION_NAME
-        LOGGER.info(f"Connected to Milvus at {settings.MILVUS_URI}")
+        # MilvusClient is blocking; a bounded pool keeps concurrent searches off the event loop
+        # without letting a burst of requests open an unbounded number of threads.
+        self.executor = ThreadPoolExecutor(
+            max_workers=settings.MILVUS_SEARCH_MAX_WORKERS, thread_name_prefix="milvus-search"
+        )
+        self._version: str | None = None
+        self._version_checked_at = 0.0
+        # Description of the loaded vector index; searches use the configured type until then.
+        self.index: dict | None = None
+        self.search_params = default_search_params(settings.MILVUS_INDEX_TYPE)
+        self.vector_type = settings.MILVUS_VECTOR_TYPE
+        self.dim = settings.MILVUS_EMBEDDING_DIM
+        self.rescore_oversample = (
+            settings.MILVUS_RESCORE_OVERSAMPLE if settings.MILVUS_RESCORE_ENABLED else None
+        )
+        self.rescore_full_precision = settings.MILVUS_RESCORE_FULL_PRECISION
+        # Whether the collection has FULL_PRECISION_FIELD; looked up on first use.
+        self._has_full_precision: bool | None = None
+
+    @property
+    def metric_type(self) -> str:
+        return "HAMMING" if self.vector_type == "binary" else "COSINE"
+
+    def create_collection(self, dim: int = settings.MILVUS_EMBEDDING_DIM, drop_existing=False):
+        """Create the chunk collection with the configured vector index if it does not exist."""
+        if self.vector_type == "binary" and dim % 8:
+            raise ValueError(f"Binary vectors need a dimension divisible by 8, got {dim}")
+        if self.client.has_collection(self.collection_name):
+            if not drop_existing:
+                LOGGER.info(f"Collection {self.collection_name} already exists")
+                return
+            self.client.drop_collection(self.collection_name)
+            LOGGER.info(f"Dropped collection {self.collection_name}")
+
+        self.dim = dim
+        schema = MilvusClient.create_schema(auto_id=True, enable_dynamic_field=False)
+        schema.add_field("id", DataType.INT64, is_primary=True)
+        schema.add_field("vector", VECTOR_FIELD_TYPES[self.vector_type], dim=dim)
+        schema.add_field("text_content", DataType.VARCHAR, max_length=65535)
+        schema.add_field("page_number", DataType.INT64)
+        schema.add_field("source", DataType.VARCHAR, max_length=1024)
+        schema.add_field("chunk_hash", DataType.VARCHAR, max_length=64)
+        full_precision = self.rescore_full_precision and self.vector_type != "float"
+        if full_precision:
+            # Memory-mapped: it is only read for the shortlists being rescored.
+            schema.add_field(
+                FULL_PRECISION_FIELD,
+                DataType.ARRAY,
+                element_type=DataType.FLOAT,
+                max_capacity=dim,
+                mmap_enabled=True,
+            )
+        self._has_full_precision = full_precision
+
+        self.client.create_collection(
+            collection_name=self.collection_name,
+            schema=schema,
+            index_params=self.build_index_params(dim),
+        )
+        self.bump_collection_version()
+        LOGGER.info(
+            f"Created collection {self.collection_name} (dim={dim}, vectors={self.vector_type})"
+        )
+
+    def build_index_params(
+        self,
+        dim: int,
+        index_type: str | None = None,
+        params: dict[str, Any] | None = None,
+        num_rows: int | None = None,
+    ):
+        """Index parameters for the vector field, from Settings unless overridden."""
+        configured = index_type in (None, settings.MILVUS_INDEX_TYPE)
+        index_type = index_type or settings.MILVUS_INDEX_TYPE
+        if params is None:
+            # MILVUS_INDEX_PARAMS only applies to the configured index type.
+            params = (configured and settings.MILVUS_INDEX_PARAMS) or default_build_params(
+                index_type, dim, num_rows
+            )
+        index_params = self.client.prepare_index_params()
+        index_params.add_index(
+            field_name="vector", index_type=index_type, metric_type=self.metric_type, params=params
+        )
+        return index_params
+
+    def describe_index(self) -> dict | None:
+        """Return the description of the vector index, or None if there is none."""
+        if not self.client.has_collection(self.collection_name):
+            return None
+        for index_name in self.client.list_indexes(self.collection_name, field_name="vector"):
+            return self.client.describe_index(self.collection_name, index_name=index_name)
+        return None
+
+    def create_index(
+        self,
+        index_type: str | None = None,
+        params: dict[str, Any] | None = None,
+        num_rows: int | None = None,
+    ) -> dict | None:
+        """Rebuild the vector index of the existing collection in place and reload it.
+
+        Searches fail while the collection is released, so run this off the serving path.
+        """
+        dim = self.get_vector_dim()
+        if dim is None:
+            raise ValueError(f"Collection {self.collection_name} does not exist")
+        self.release()
+        for index_name in self.client.list_indexes(self.collection_name, field_name="vector"):
+            self.client.drop_index(self.collection_name, index_name=index_name)
+        self.client.create_index(
+            self.collection_name, self.build_index_params(dim, index_type, params, num_rows)
+        )
+        return self.load()
+
+    def load(self) -> dict | None:
+        """Load the collection into memory and tune searches to the index it was built with."""
+        if not self.client.has_collection(self.collection_name):
+            LOGGER.warning(f"Collection {self.collection_name} not found; nothing to load")
+            return None
+        self.client.load_collection(self.collection_name)
+        self.dim = self.get_vector_dim() or self.dim
+        self.index = self.describe_index()
+        index_type = (self.index or {}).get("index_type", settings.MILVUS_INDEX_TYPE)
+        self.search_params = default_search_params(index_type)
+        LOGGER.info(
+            f"Loaded collection {self.collection_name} "
+            f"(index={index_type}, search_params={self.search_params})"
+        )
+        return self.index
+
+    def release(self) -> None:
+        """Release the collection from memory on the Milvus server."""
+        if self.client.has_collection(self.collection_name):
+            self.client.release_collection(self.collection_name)
+            LOGGER.info(f"Released collection {self.collection_name}")
+
+    def get_field(self, name: str) -> dict | None:
+        """Return the schema of a collection field, or None if it does not exist."""
+        if not self.client.has_collection(self.collection_name):
+            return None
+        description = self.client.describe_collection(collection_name=self.collection_name)
+        for field in description.get("fields", []):
+            if field.get("name") == name:
+                return field
+        return None
+
+    def get_vector_field(self) -> dict | None:
+        """Return the schema of the collection's vector field, or None if it does not exist."""
+        return self.get_field("vector")
+
+    @property
+    def has_full_precision(self) -> bool:
+        """Whether the collection keeps full-precision copies of its vectors for rescoring."""
+        if self._has_full_precision is None:
+            self._has_full_precision = self.get_field(FULL_PRECISION_FIELD) is not None
+        return self._has_full_precision
+
+    def get_vector_dim(self) -> int | None:
+        """Return the dimension of the collection's vector field, or None if it does not exist."""
+        field = self.get_vector_field()
+        return None if field is None else int(field.get("params", {}).get("dim"))
+
+    def validate_vector_dim(self, dim: int = settings.MILVUS_EMBEDDING_DIM) -> None:
+        """Fail fast when the collection was built for a different dimension or vector type."""
+        field = self.get_vector_field()
+        if field is None:
+            LOGGER.warning(f"Collection {self.collection_name} not found; run ingestion first")
+            return
+        collection_dim = int(field.get("params", {}).get("dim"))
+        if collection_dim != dim:
+            raise ValueError(
+                f"Collection {self.collection_name} stores {collection_dim}-d vectors but the "
+                f"embedding model is configured for {dim}; re-ingest or fix MILVUS_EMBEDDING_DIM"
+            )
+        field_type = field.get("type")
+        if field_type is not None and field_type != VECTOR_FIELD_TYPES[self.vector_type]:
+            raise ValueError(
+                f"Collection {self.collection_name} stores {DataType(field_type).name} vectors "
+                f"but MILVUS_VECTOR_TYPE is {self.vector_type}; re-ingest or fix the setting"
+            )
+
+    def get_collection_version(self) -> str:
+        """Read the content version stored on the collection."""
+        description = self.client.describe_collection(collection_name=self.collection_name)
+        return description.get("properties", {}).get(VERSION_PROPERTY, "0")
+
+    def bump_collection_version(self) -> str:
+        """Mark the collection content as changed."""
+        # Wall-clock nanoseconds stay unique even across a drop and re-create.
+        version = str(time.time_ns())
+        self.client.alter_collection_properties(
+            collection_name=self.collection_name, properties={VERSION_PROPERTY: version}
+        )
+        self._version = version
+        return version
+
+    def _version_is_stale(self) -> bool:
+        elapsed = time.monotonic() - self._version_checked_at
+        return elapsed > settings.COLLECTION_VERSION_REFRESH_SECONDS
+
+    def collection_version(self) -> str:
+        """Collection version, re-read from Milvus at most once per refresh interval."""
+        if self._version is None or self._version_is_stale():
+            self._version = self.get_collection_version()
+            self._version_checked_at = time.monotonic()
+        return self._version
+
+    async def acollection_version(self) -> str:
+        """Collection version, re-read from Milvus at most once per refresh interval."""
+        if self._version is None or self._version_is_stale():
+            loop = asyncio.get_running_loop()
+            self._version = await loop.run_in_executor(self.executor, self.get_collection_version)
+            self._version_checked_at = time.monotonic()
+        return self._version
+
+    def insert_batch(self, rows: list[dict]) -> int:
+        """Insert rows in a single bulk request and return the inserted count."""
+        if not rows:
+            return 0
+        if self.vector_type != "float":
+            vectors = encode_vectors([row["vector"] for row in rows], self.vector_type)
+            copy_field = FULL_PRECISION_FIELD if self.has_full_precision else None
+            rows = [
+                {**row, "vector": vector, **({copy_field: row["vector"]} if copy_field else {})}
+                for row, vector in zip(rows, vectors)
+            ]
+        result = self.client.insert(collection_name=self.collection_name, data=rows)
+        return result["insert_count"]
+
+    def iter_rows(
+        self, output_fields: list[str], filter: str = "", batch_size: int = 1000
+    ) -> Iterator[dict]:
+        """Stream rows of the collection without loading them all at once."""
+        iterator = self.client.query_iterator(
+            collection_name=self.collection_name,
+            batch_size=batch_size,
+            filter=filter,
+            output_fields=output_fields,
+        )
+        try:
+            while rows := iterator.next():
+                yield from rows
+        finally:
+            iterator.close()
+
+    def iter_chunk_manifest(self, sources: list[str]) -> Iterator[dict]:
+        """Yield id, source, page_number and chunk_hash for every chunk of the given sources."""
+        if not sources:
+            return
+        yield from self.iter_rows(
+            output_fields=["id", "source", "page_number", "chunk_hash"],
+            filter=f"source in {json.dumps(sources)}",
+        )
+
+    def get_chunks(self, ids: list[int]) -> dict[int, dict]:
+        """Fetch chunk text, page numbers and stable keys by primary key."""
+        if not ids:
+            return {}
+        rows = self.client.get(
+            collection_name=self.collection_name, ids=ids, output_fields=["id", *CHUNK_FIELDS]
+        )
+        return {row["id"]: {field: row.get(field) for field in CHUNK_FIELDS} for row in rows}
+
+    def find_chunks(self, keys: list[tuple[str, str]]) -> dict[tuple[str, str], dict]:
+        """Look up chunks by (source, chunk_hash), which survive re-ingestion under new IDs."""
+        wanted = set(keys)
+        if not wanted:
+            return {}
+        hashes = sorted({chunk_hash for _, chunk_hash in wanted})
+        found: dict[tuple[str, str], dict] = {}
+        rows = self.iter_rows(
+            output_fields=["id", *CHUNK_FIELDS], filter=f"chunk_hash in {json.dumps(hashes)}"
+        )
+        for row in rows:
+            key = (row["source"], row["chunk_hash"])
+            if key in wanted and key not in found:
+                found[key] = {"id": row["id"], **{field: row.get(field) for field in CHUNK_FIELDS}}
+        return found
+
+    def decode_vector(self, value: Any) -> np.ndarray:
+        """Read a vector returned by the client as float32."""
+        return decode_vector(value, self.vector_type, self.dim)
+
+    def get_vectors(self, ids: list[int]) -> dict[int, list[float]]:
+        """Fetch stored vectors by primary key, decoded to floats."""
+        if not ids:
+            return {}
+        rows = self.client.get(
+            collection_name=self.collection_name, ids=ids, output_fields=["id", "vector"]
+        )
+        return {row["id"]: self.decode_vector(row["vector"]).tolist() for row in rows}
+
+    def delete_ids(self, ids: list[int]) -> int:
+        """Delete rows by primary key and return the deleted count."""
+        if not ids:
+            return 0
+        result = self.client.delete(collection_name=self.collection_name, ids=ids)
+        # Some server versions report the deleted primary keys instead of a count.
+        return len(result) if isinstance(result, list) else result.get("delete_count", len(ids))
 
     def search(self, query_text: str, embedding_client: EmbeddingClient, limit: int = 3):
         """Performs a semantic search."""
         query_vector = embedding_client.embed_query(query_text)
-        return self.client.search(
-            collection_name=self.collection_name,
-            data=[query_vector],
-            limit=limit,
-            output_fields=["text_content", "page_number"],
+        return self.search_by_vector(query_vector, limit=limit)
+
+    def search_by_vector(self, query_vector: list[float], limit: int = 3):
+        """Performs a search with a precomputed query vector."""
+        return self.search_by_vectors([query_vector], limit=limit)
+
+    def search_by_vectors(
+        self,
+        query_vectors: list[list[float]],
+        limit: int = 3,
+        search_params: dict[str, Any] | None = None,
+    ):
+        """Searches several precomputed query vectors in one round-trip.
+
+        `search_params` overrides the index search parameters taken from Settings. Hit
+        distances are similarities: higher is closer for every vector type.
+        """
+        candidates = limit * self.rescore_oversample if self.rescore_oversample else limit
+        params = dict(self.search_params if search_params is None else search_params)
+        # HNSW and DiskANN reject a candidate list shorter than the number of hits requested.
+        for key in ("ef", "search_list"):
+            if key in params:
+                params[key] = max(params[key], candidates)
+        with timed("milvus_search"):
+            results = self.client.search(
+                collection_name=self.collection_name,
+                data=encode_vectors(query_vectors, self.vector_type),
+                limit=candidates,
+                output_fields=CHUNK_FIELDS,
+                search_params={"metric_type": self.metric_type, "params": params},
+            )
+        if self.vector_type == "binary":
+            # Hamming distance d between sign vectors corresponds to a cosine of 1 - 2d/dim.
+            for hits in results:
+                for hit in hits:
+                    hit["distance"] = 1 - 2 * hit["distance"] / self.dim
+        if self.rescore_oversample:
+            with timed("vector_rescore"):
+                return self.rescore(query_vectors, results, limit)
+        return results
+
+    def rescore(
+        self, query_vectors: list[list[float]], results: list[list[dict]], limit: int
+    ) -> list[list[dict]]:
+        """Rank each shortlist by cosine similarity of the float32 query to the stored vectors.
+
+        Rescoring is exact for float fields, whose vectors stay full precision under a
+        quantized index (IVF_SQ8, IVF_PQ). A float16 or binary field only holds the encoded
+        vector, so rescoring reads the full-precision copy in FULL_PRECISION_FIELD when the
+        collection has one and otherwise compares against the decoded float16 values or signs.
+        """
+        ids = list({hit["id"] for hits in results for hit in hits})
+        if self.vector_type != "float" and self.has_full_precision:
+            rows = self.client.get(
+                collection_name=self.collection_name,
+                ids=ids,
+                output_fields=["id", FULL_PRECISION_FIELD],
+            )
+            stored = {
+                row["id"]: np.asarray(row[FULL_PRECISION_FIELD], dtype=np.float32) for row in rows
+            }
+        else:
+            rows = self.client.get(
+                collection_name=self.collection_name, ids=ids, output_fields=["id", "vector"]
+            )
+            stored = {row["id"]: self.decode_vector(row["vector"]) for row in rows}
+        reranked = []
+        for query_vector, hits in zip(query_vectors, results):
+            query = np.asarray(query_vector, dtype=np.float32)
+            query /= np.linalg.norm(query) or 1.0
+            hits = [hit for hit in hits if hit["id"] in stored]
+            for hit in hits:
+                vector = stored[hit["id"]]
+                hit["distance"] = float(query @ vector / (np.linalg.norm(vector) or 1.0))
+            reranked.append(sorted(hits, key=lambda hit: hit["distance"], reverse=True)[:limit])
+        return reranked
+
+    def search_many(
+        self, query_texts: list[str], embedding_client: EmbeddingClient, limit: int = 3
+    ) -> list[list[dict]]:
+        """Performs semantic searches for several queries with one embedding batch and one search.
+
+        Returns one hit list per query, in the order of `query_texts`.
+        """
+        if not query_texts:
+            return []
+        query_vectors = embedding_client.embed_queries(query_texts)
+        return self.search_by_vectors(query_vectors, limit=limit)
+
+    async def asearch(self, query_text: str, embedding_client: EmbeddingClient, limit: int = 3):
+        """Performs a semantic search without blocking the event loop."""
+        query_vector = await embedding_client.aembed_query(query_text)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor, partial(self.search_by_vector, query_vector, limit=limit)
+        )
+
+    async def asearch_many(
+        self, query_texts: list[str], embedding_client: EmbeddingClient, limit: int = 3
+    ) -> list[list[dict]]:
+        """Performs `search_many` without blocking the event loop."""
+        if not query_texts:
+            return []
+        query_vectors = await embedding_client.aembed_queries(query_texts)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor, partial(self.search_by_vectors, query_vectors, limit=limit)
         )
@@ -1,13 +1,107 @@
 import json
+import logging
+import time
+from collections.abc import AsyncIterator
 from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, Literal
 
 from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
 from langgraph.store.postgres import AsyncPostgresStore
+from psycopg import AsyncConnection
+from psycopg.errors import UniqueViolation
 from psycopg.rows import dict_row
 from psycopg_pool import AsyncConnectionPool
 
 from config.settings import settings
 from config.state import SessionState
+from memory.migrations import run_migrations
+from utils.logger import configure_logging
+
+configure_logging()
+LOGGER = logging.getLogger("postgres")
+LOGGER.setLevel(logging.INFO)
+
+WriteOutcome = Literal["written", "stale", "failed"]
+
+# Both statements are sent with prepare=True so each pooled connection parses and plans them
+# once and every later turn only binds parameters.
+
+# Reads the session row plus, when %(history_limit)s is set, only the last N messages. The
+# (session_id, seq) primary key turns this into a bounded, ordered index range scan.
+GET_STATE_SQL = """
+    SELECT
+        s.session_id,
+        s.user_input,
+        s.retrieved_context,
+        s.response,
+        s.message_count,
+        s.summary,
+        s.summarized_count,
+        GREATEST(s.message_count - %(history_limit)s::INTEGER, 0) AS history_offset,
+        COALESCE(
+            (
+                SELECT jsonb_agg(jsonb_build_object('role', m.role, 'content', m.content)
+                                 ORDER BY m.seq)
+                FROM session_messages m
+                WHERE m.session_id = s.session_id
+                  AND m.seq >= GREATEST(s.message_count - %(history_limit)s::INTEGER, 0)
+            ),
+            '[]'::jsonb
+        ) AS conversation_history
+    FROM session_state s
+    WHERE s.session_id = %(session_id)s
+"""
+
+# Appends the turn's new messages and upserts the session row in one atomic statement. Writes
+# are version-checked against message_count: the (session_id, seq) primary key rejects a
+# writer appending a seq that already exists, and the conditional update leaves the row alone
+# (zero rows affected) when another writer moved message_count since the state was loaded.
+ADD_STATE_SQL = """
+    WITH appended AS (
+        INSERT INTO session_messages (session_id, seq, role, content)
+        SELECT %(session_id)s, m.seq, m.role, m.content
+        FROM jsonb_to_recordset(%(new_messages)s::jsonb) AS m(seq INTEGER, role TEXT, content TEXT)
+    )
+    INSERT INTO session_state (
+        session_id,
+        user_input,
+        retrieved_context,
+        response,
+        message_count,
+        summary,
+        summarized_count
+    )
+    VALUES (
+        %(session_id)s,
+        %(user_input)s,
+        %(retrieved_context)s,
+        %(response)s,
+        %(message_count)s,
+        %(summary)s,
+        %(summarized_count)s
+    )
+    ON CONFLICT (session_id) DO UPDATE SET
+        user_input = EXCLUDED.user_input,
+        retrieved_context = EXCLUDED.retrieved_context,
+        response = EXCLUDED.response,
+        message_count = EXCLUDED.message_count,
+        -- Summaries are refreshed in the background, so a turn may carry an older one.
+        summary = CASE
+            WHEN EXCLUDED.summarized_count >= session_state.summarized_count
+            THEN EXCLUDED.summary ELSE session_state.summary
+        END,
+        summarized_count = GREATEST(EXCLUDED.summarized_count, session_state.summarized_count),
+        updated_at = CURRENT_TIMESTAMP
+    WHERE session_state.message_count = %(expected_count)s
+"""
+
+# Stores a background summary refresh unless a newer summary is already saved.
+UPDATE_SUMMARY_SQL = """
+    UPDATE session_state
+    SET summary = %(summary)s, summarized_count = %(summarized_count)s
+    WHERE session_id = %(session_id)s AND summarized_count < %(summarized_count)s
+"""
 
 
 def get_postgres_connection_string() -> str:
@@ -22,139 +116,180 @@ def get_postgres_connection_string() -> str:
     )
 
 
-@asynccontextmanager
-async def get_postgres_saver():
-    "Initializes and return a postgreSQL saver instance using connection pool for resilent connection"
-
-    application_name = settings.POSTGRES_APPLICATION_NAME + "-" + "saver"
-
-    async with AsyncConnectionPool(
+def create_postgres_pool() -> AsyncConnectionPool:
+    """Create the process-wide connection pool; it is opened and warmed in the app lifespan."""
+    return AsyncConnectionPool(
         get_postgres_connection_string(),
         min_size=settings.POSTGRES_MIN_CONNECTIONS_PER_POOL,
         max_size=settings.POSTGRES_MAX_CONNECTIONS_PER_POOL,
-        kwargs={"autocommit": True, "row_factory": dict_row, "application_name": application_name},
+        kwargs={
+            "autocommit": True,
+            "row_factory": dict_row,
+            "application_name": settings.POSTGRES_APPLICATION_NAME,
+        },
         check=AsyncConnectionPool.check_connection,
-    ) as pool:
-        try:
-            async with pool.connection() as conn:
-                checkpointer = AsyncPostgresSaver(conn)  # type: ignore
-                await checkpointer.setup()
-                yield checkpointer
+        open=False,
+    )
+
 
-        finally:
-            await pool.close()
+@asynccontextmanager
+async def get_postgres_saver(pool: AsyncConnectionPool):
+    "Initializes and return a postgreSQL saver instance backed by the shared connection pool"
+    checkpointer = AsyncPostgresSaver(pool)  # type: ignore
+    await checkpointer.setup()
+    yield checkpointer
 
 
 @asynccontextmanager
-async def get_postgres_store():
-    "Initializes and return a postgreSQL store instance using connection pool for resilent connection"
+async def get_postgres_store(pool: AsyncConnectionPool):
+    "Initializes and return a postgreSQL store instance backed by the shared connection pool"
+    store = AsyncPostgresStore(pool)  # type: ignore
+    await store.setup()
+    yield store
 
-    application_name = settings.POSTGRES_APPLICATION_NAME + "-" + "store"
 
-    async with AsyncConnectionPool(
-        get_postgres_connection_string(),
-        min_size=settings.POSTGRES_MIN_CONNECTIONS_PER_POOL,
-        max_size=settings.POSTGRES_MAX_CONNECTIONS_PER_POOL,
-        kwargs={"autocommit": True, "row_factory": dict_row, "application_name": application_name},
-        check=AsyncConnectionPool.check_connection,
-    ) as pool:
-        try:
-            async with pool.connection() as conn:
-                store = AsyncPostgresStore(conn)  # type: ignore
-                await store.setup()
-                yield store
+class StaleSessionError(Exception):
+    """The session changed in Postgres after the state being written was loaded."""
+
+
+@dataclass
+class AcquisitionStats:
+    """Connection acquisition latency as seen by PostgresClient."""
 
-        finally:
-            await pool.close()
+    count: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+
+    def record(self, elapsed_ms: float) -> None:
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+
+    @property
+    def mean_ms(self) -> float:
+        return self.total_ms / self.count if self.count else 0.0
 
 
 class PostgresClient:
-    def __init__(self):
-        self.connection_string = get_postgres_connection_string()
-        self.pool = None
-
-    async def ensure_pool(self):
-        if self.pool is None:
-            self.pool = AsyncConnectionPool(
-                self.connection_string,
-                min_size=settings.POSTGRES_MIN_CONNECTIONS_PER_POOL,
-                max_size=settings.POSTGRES_MAX_CONNECTIONS_PER_POOL,
-                kwargs={
-                    "autocommit": True,
-                    "row_factory": dict_row,
-                    "application_name": settings.POSTGRES_APPLICATION_NAME,
-                },
-                check=AsyncConnectionPool.check_connection,
-                open=False,
-            )
-            await self.pool.open()
-
-    async def create_tables(self):
-        await self.ensure_pool()
-        async with self.pool.connection() as conn:  # type: ignore
-            await conn.execute("""
-                CREATE TABLE IF NOT EXISTS session_state (
-                    session_id TEXT PRIMARY KEY,
-                    user_input TEXT,
-                    conversation_history JSONB,
-                    retrieved_context JSONB,
-                    response TEXT,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                );
-            """)
+    def __init__(self, pool: AsyncConnectionPool):
+        self.pool = pool
+        self.acquisition = AcquisitionStats()
+
+    @asynccontextmanager
+    async def connection(self) -> AsyncIterator[AsyncConnection]:
+        """Borrow a pooled connection, recording how long the acquisition took."""
+        start = time.perf_counter()
+        async with self.pool.connection() as conn:
+            self.acquisition.record((time.perf_counter() - start) * 1000)
+            yield conn
+
+    def pool_stats(self) -> dict[str, float]:
+        """Current pool occupancy and acquisition latency."""
+        stats = self.pool.get_stats()
+        return {
+            "pool_min": stats["pool_min"],
+            "pool_max": stats["pool_max"],
+            "pool_size": stats["pool_size"],
+            "in_use": stats["pool_size"] - stats["pool_available"],
+            "available": stats["pool_available"],
+            "waiting": stats["requests_waiting"],
+            "acquisitions": self.acquisition.count,
+            "acquisition_mean_ms": self.acquisition.mean_ms,
+            "acquisition_max_ms": self.acquisition.max_ms,
+        }
+
+    async def migrate(self) -> int:
+        """Bring the database schema up to date; run once at startup."""
+        async with self.connection() as conn:
+            return await run_migrations(conn)
 
     async def add_state(self, state: SessionState):
-        await self.ensure_pool()
-        async with self.pool.connection() as conn:  # type: ignore
-            await conn.execute(
-                """
-                INSERT INTO session_state (
-                    session_id, 
-                    user_input, 
-                    conversation_history,
-                    retrieved_context,
-                    response
-                )
-                VALUES (
-                    %(session_id)s, 
-                    %(user_input)s, 
-                    %(conversation_history)s,
-                    %(retrieved_context)s,
-                    %(response)s
+        """Persist the session row and append messages added since the state was loaded.
+
+        :raises StaleSessionError: if another writer updated the session in the meantime.
+        """
+        async with self.connection() as conn:
+            await self._write_state(conn, state)
+
+    async def add_states(self, states: list[SessionState]) -> list[WriteOutcome]:
+        """Persist several sessions over one connection, each in its own transaction.
+
+        Never raises: once a write fails for another reason than staleness, the connection is
+        given up and the remaining states are reported as failed too.
+
+        :return: The outcome for each state, in order. Written states have their
+            `message_count` advanced.
+        """
+        outcomes: list[WriteOutcome] = ["failed"] * len(states)
+        try:
+            async with self.connection() as conn:
+                for index, state in enumerate(states):
+                    try:
+                        await self._write_state(conn, state)
+                        outcomes[index] = "written"
+                    except StaleSessionError:
+                        outcomes[index] = "stale"
+        except Exception:
+            failed = outcomes.count("failed")
+            LOGGER.exception(f"Writing {failed} of {len(states)} sessions failed")
+        return outcomes
+
+    async def _write_state(self, conn: AsyncConnection, state: SessionState) -> None:
+        unsaved = state.conversation_history[state.message_count - state.history_offset :]
+        new_messages = [
+            {"seq": state.message_count + index, "role": msg["role"], "content": msg["content"]}
+            for index, msg in enumerate(unsaved)
+        ]
+        try:
+            async with conn.transaction():
+                cursor = await conn.execute(
+                    ADD_STATE_SQL,
+                    {
+                        "session_id": state.session_id,
+                        "user_input": state.user_input,
+                        "retrieved_context": json.dumps(state.retrieved_context),
+                        "response": state.response,
+                        "message_count": state.message_count + len(new_messages),
+                        "expected_count": state.message_count,
+                        "new_messages": json.dumps(new_messages),
+                        "summary": state.summary,
+                        "summarized_count": state.summarized_count,
+                    },
+                    prepare=True,
                 )
-                ON CONFLICT (session_id) DO UPDATE SET
-                    user_input = EXCLUDED.user_input,
-                    conversation_history = EXCLUDED.conversation_history,
-                    retrieved_context = EXCLUDED.retrieved_context,
-                    response = EXCLUDED.response,
-                    updated_at = CURRENT_TIMESTAMP;
-                """,
+                if cursor.rowcount == 0:
+                    # Raising inside the block rolls back the messages appended above.
+                    raise StaleSessionError(f"Session {state.session_id} changed concurrently")
+        except UniqueViolation as e:
+            raise StaleSessionError(f"Session {state.session_id} changed concurrently") from e
+        state.message_count += len(new_messages)
+
+    async def update_summary(self, session_id: str, summary: str, summarized_count: int) -> None:
+        """Save a refreshed summary covering the first `summarized_count` messages."""
+        async with self.connection() as conn:
+            await conn.execute(
+                UPDATE_SUMMARY_SQL,
                 {
-                    "session_id": state.session_id,
-                    "user_input": state.user_input,
-                    "conversation_history": json.dumps(state.conversation_history),
-                    "retrieved_context": json.dumps(state.retrieved_context),
-                    "response": state.response,
+                    "session_id": session_id,
+                    "summary": summary,
+                    "summarized_count": summarized_count,
                 },
             )
 
-    async def get_state(self, session_id: str) -> SessionState | None:
-        await self.ensure_pool()
-        async with self.pool.connection() as conn:  # type: ignore
+    async def get_state(
+        self, session_id: str, history_limit: int | None = None
+    ) -> SessionState | None:
+        """Load a session, optionally with only its last `history_limit` messages."""
+        async with self.connection() as conn:
             async with conn.cursor() as cur:
                 await cur.execute(
-                    "SELECT * FROM session_state WHERE session_id = %(session_id)s",
-                    {"session_id": session_id},
+                    GET_STATE_SQL,
+                    {"session_id": session_id, "history_limit": history_limit},
+                    prepare=True,
                 )
                 row = await cur.fetchone()
                 if row:
                     parsed_row = dict(row)
-                    if "conversation_history" in parsed_row and isinstance(
-                        parsed_row["conversation_history"], str
-                    ):
-                        parsed_row["conversation_history"] = json.loads(
-                            parsed_row["conversation_history"]
-                        )
                     if "retrieved_context" in parsed_row and isinstance(
                         parsed_row["retrieved_context"], str
                     ):
@@ -164,6 +299,22 @@ class PostgresClient:
                     return SessionState(**parsed_row)
         return None
 
-    async def close(self):
-        if self.pool:
-            await self.pool.close()
+    async def get_messages(self, session_id: str, last_n: int) -> list[dict[str, Any]]:
+        """Return the last `last_n` messages of a session in conversation order."""
+        async with self.connection() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(
+                    """
+                    SELECT role, content FROM (
+                        SELECT seq, role, content
+                        FROM session_messages
+                        WHERE session_id = %(session_id)s
+                        ORDER BY seq DESC
+                        LIMIT %(last_n)s
+                    ) AS recent
+                    ORDER BY seq
+                    """,
+                    {"session_id": session_id, "last_n": last_n},
+                    prepare=True,
+                )
+                return [dict(row) for row in await cur.fetchall()]
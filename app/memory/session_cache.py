@@ -0,0 +1,318 @@
+"""In-process cache of hot sessions in front of PostgresClient."""
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Literal
+
+from config.state import SessionState
+from memory.postgres import PostgresClient, StaleSessionError
+from utils.cache import LRUCache
+from utils.logger import configure_logging
+from utils.metrics import timed
+
+configure_logging()
+LOGGER = logging.getLogger("session_cache")
+LOGGER.setLevel(logging.INFO)
+
+WriteMode = Literal["write_through", "write_behind"]
+
+
+@dataclass
+class CachedSession:
+    """A session as this worker knows it.
+
+    `state.message_count` counts every message of the session; those from `persisted_count`
+    on have not been written to Postgres yet.
+    """
+
+    state: SessionState
+    persisted_count: int
+    # Bumped on every turn so a flush can tell whether it wrote the latest version.
+    generation: int = 0
+    flushed_generation: int = 0
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+    @property
+    def dirty(self) -> bool:
+        return self.generation != self.flushed_generation
+
+    def pending_state(self) -> SessionState:
+        """The unpersisted part of the session, shaped for PostgresClient.add_state."""
+        state = self.state
+        return SessionState(
+            session_id=state.session_id,
+            user_input=state.user_input,
+            retrieved_context=state.retrieved_context,
+            response=state.response,
+            conversation_history=state.conversation_history[
+                self.persisted_count - state.history_offset :
+            ],
+            message_count=self.persisted_count,
+            history_offset=self.persisted_count,
+            summary=state.summary,
+            summarized_count=state.summarized_count,
+        )
+
+
+class SessionStateCache:
+    """Read-through LRU of hot sessions with write-through or write-behind persistence.
+
+    Consecutive turns of an active chat read their state from memory instead of Postgres. In
+    `write_through` mode (the default) each turn is still written before the request
+    completes. In the opt-in `write_behind` mode a turn only updates the cache; dirty sessions
+    are written in batches every `flush_interval_seconds`, as soon as `flush_batch_size` are
+    pending, and on shutdown, so a crash loses at most one interval of turns.
+
+    Postgres writes are version-checked, so with several workers a stale cached session can
+    never overwrite newer turns: the conflict is detected, and the unpersisted messages are
+    replayed on top of the history Postgres holds. Sticky routing by session_id keeps such
+    conflicts, and stale reads, rare; `ttl_seconds` bounds how long a stale read can last.
+    """
+
+    def __init__(
+        self,
+        postgres_client: PostgresClient,
+        max_sessions: int,
+        write_mode: WriteMode = "write_through",
+        flush_interval_seconds: float = 0.2,
+        flush_batch_size: int = 100,
+        ttl_seconds: float | None = None,
+        max_history: int | None = None,
+    ):
+        self.postgres_client = postgres_client
+        self.write_mode = write_mode
+        self.flush_interval_seconds = flush_interval_seconds
+        self.flush_batch_size = flush_batch_size
+        self.max_history = max_history
+        self.sessions = LRUCache(max_size=max_sessions, ttl_seconds=ttl_seconds)
+        # Dirty sessions stay pinned here until flushed, so LRU eviction never drops a turn.
+        self._dirty: dict[str, CachedSession] = {}
+        self._flush_lock = asyncio.Lock()
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self._flush_task: asyncio.Task | None = None
+        self.flushes = 0
+        self.conflicts = 0
+
+    @property
+    def stats(self) -> dict[str, float]:
+        return {
+            **self.sessions.stats.as_dict(),
+            "pending_writes": len(self._dirty),
+            "flushes": self.flushes,
+            "conflicts": self.conflicts,
+        }
+
+    def _lookup(self, session_id: str) -> CachedSession | None:
+        entry = self.sessions.get(session_id)
+        if entry is None and (entry := self._dirty.get(session_id)) is not None:
+            self.sessions.set(session_id, entry)
+        return entry
+
+    @staticmethod
+    def _copy(state: SessionState, history_limit: int | None = None) -> SessionState:
+        """Copy a state for a turn to mutate, keeping its last `history_limit` messages."""
+        drop = 0
+        if history_limit is not None:
+            drop = max(len(state.conversation_history) - history_limit, 0)
+        return state.model_copy(
+            update={
+                "conversation_history": state.conversation_history[drop:],
+                "retrieved_context": list(state.retrieved_context),
+                "history_offset": state.history_offset + drop,
+            }
+        )
+
+    def _trim(self, entry: CachedSession) -> None:
+        """Drop persisted messages beyond `max_history` so hot sessions stay small."""
+        if self.max_history is None:
+            return
+        state = entry.state
+        keep_from = state.message_count - self.max_history
+        drop = min(keep_from, entry.persisted_count) - state.history_offset
+        if drop > 0:
+            state.conversation_history = state.conversation_history[drop:]
+            state.history_offset += drop
+
+    async def get_state(
+        self, session_id: str, history_limit: int | None = None
+    ) -> SessionState | None:
+        """Load a session from the cache, falling back to Postgres on a miss."""
+        entry = self._lookup(session_id)
+        if entry is not None:
+            return self._copy(entry.state, history_limit)
+        state = await self.postgres_client.get_state(session_id, history_limit=history_limit)
+        if state is not None:
+            entry = CachedSession(state=self._copy(state), persisted_count=state.message_count)
+            self.sessions.set(session_id, entry)
+        return state
+
+    async def add_state(self, state: SessionState) -> None:
+        """Record a turn in the cache and persist it according to the write mode.
+
+        Like PostgresClient.add_state, `state.message_count` is advanced past the new messages.
+        """
+        new_messages = state.conversation_history[state.message_count - state.history_offset :]
+        entry = self._lookup(state.session_id)
+        if entry is None:
+            # Not cached (first turn or evicted while clean): the loaded count is what Postgres has.
+            persisted = state.conversation_history[: state.message_count - state.history_offset]
+            entry = CachedSession(
+                state=SessionState(
+                    session_id=state.session_id,
+                    conversation_history=list(persisted),
+                    message_count=state.message_count,
+                    history_offset=state.history_offset,
+                ),
+                persisted_count=state.message_count,
+            )
+            self.sessions.set(state.session_id, entry)
+        elif entry.state.message_count != state.message_count:
+            # A concurrent turn on the same session finished first; append after it.
+            LOGGER.warning(f"Session {state.session_id} had concurrent turns; appending in order")
+
+        cached = entry.state
+        cached.conversation_history = cached.conversation_history + new_messages
+        cached.message_count += len(new_messages)
+        cached.user_input = state.user_input
+        cached.response = state.response
+        cached.retrieved_context = list(state.retrieved_context)
+        if state.summarized_count >= cached.summarized_count:
+            cached.summary = state.summary
+            cached.summarized_count = state.summarized_count
+        entry.generation += 1
+        state.message_count += len(new_messages)
+
+        if self.write_mode == "write_through":
+            await self._write_through(entry)
+        else:
+            self._dirty[state.session_id] = entry
+            self._schedule_flush()
+
+    async def update_summary(self, session_id: str, summary: str, summarized_count: int) -> None:
+        """Save a refreshed summary in the cache and in Postgres.
+
+        A session whose first turn is still pending in write-behind mode has no row to update
+        yet; the flush writes the summary with it.
+        """
+        entry = self._lookup(session_id)
+        if entry is not None and summarized_count > entry.state.summarized_count:
+            entry.state.summary = summary
+            entry.state.summarized_count = summarized_count
+        await self.postgres_client.update_summary(session_id, summary, summarized_count)
+
+    async def _write_through(self, entry: CachedSession) -> None:
+        async with entry.lock:
+            for _ in range(2):
+                if not entry.dirty:
+                    return
+                try:
+                    await self._write([entry])
+                except Exception:
+                    # Forget the session so the next turn reloads what Postgres really has.
+                    self.sessions.pop(entry.state.session_id)
+                    raise
+        if entry.dirty:
+            self.sessions.pop(entry.state.session_id)
+            raise StaleSessionError(f"Session {entry.state.session_id} keeps changing concurrently")
+
+    async def _write(self, entries: list[CachedSession]) -> None:
+        """Persist the pending part of each session; rebase the ones that turn out stale.
+
+        Every committed write is recorded before any rebase or error, so a session that was
+        written is never sent again with its old expected count.
+
+        :raises RuntimeError: if some writes failed; those sessions stay dirty for a retry.
+        """
+        pending = [(entry, entry.generation, entry.pending_state()) for entry in entries]
+        with timed("session_flush"):
+            outcomes = await self.postgres_client.add_states([state for _, _, state in pending])
+        self.flushes += 1
+        for (entry, generation, state), outcome in zip(pending, outcomes):
+            if outcome == "written":
+                entry.persisted_count = state.message_count
+                entry.flushed_generation = generation
+                if not entry.dirty:
+                    self._dirty.pop(entry.state.session_id, None)
+                self._trim(entry)
+        for (entry, _, _), outcome in zip(pending, outcomes):
+            if outcome == "stale":
+                self.conflicts += 1
+                await self._rebase(entry)
+        if failed := outcomes.count("failed"):
+            raise RuntimeError(f"{failed} of {len(entries)} session writes failed")
+
+    async def _rebase(self, entry: CachedSession) -> None:
+        """Move unpersisted messages onto the end of the history Postgres now holds.
+
+        Messages Postgres already holds are dropped rather than replayed: a write can commit
+        even though its acknowledgement was lost.
+        """
+        cached = entry.state
+        pending = cached.conversation_history[entry.persisted_count - cached.history_offset :]
+        latest = await self.postgres_client.get_state(cached.session_id)
+        latest = latest or SessionState(session_id=cached.session_id)
+        written = latest.conversation_history[entry.persisted_count - latest.history_offset :]
+        # A lost acknowledgement leaves the leading pending messages in Postgres already;
+        # messages written by another worker differ, so nothing of ours is skipped for them.
+        saved = 0
+        while saved < min(len(written), len(pending)) and written[saved] == pending[saved]:
+            saved += 1
+        pending = pending[saved:]
+        LOGGER.warning(
+            f"Session {cached.session_id} changed in Postgres ({entry.persisted_count} -> "
+            f"{latest.message_count} messages); replaying {len(pending)} unsaved messages"
+        )
+        cached.conversation_history = latest.conversation_history + pending
+        cached.history_offset = latest.history_offset
+        cached.message_count = latest.message_count + len(pending)
+        if latest.summarized_count > cached.summarized_count:
+            cached.summary = latest.summary
+            cached.summarized_count = latest.summarized_count
+        entry.persisted_count = latest.message_count
+        self._trim(entry)
+
+    def _schedule_flush(self) -> None:
+        if len(self._dirty) >= self.flush_batch_size:
+            self._start_flush()
+        elif self._flush_handle is None:
+            loop = asyncio.get_running_loop()
+            self._flush_handle = loop.call_later(self.flush_interval_seconds, self._start_flush)
+
+    def _start_flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.ensure_future(self.flush())
+
+    async def flush(self) -> None:
+        """Write every dirty session, `flush_batch_size` sessions per connection checkout."""
+        async with self._flush_lock:
+            entries = list(self._dirty.values())
+            for start in range(0, len(entries), self.flush_batch_size):
+                try:
+                    await self._write(entries[start : start + self.flush_batch_size])
+                except Exception:
+                    LOGGER.exception("Session flush failed; will retry")
+                    break
+            if self._dirty and self._flush_handle is None:
+                # Turns that arrived during the flush, conflicts and failures go in the next one.
+                loop = asyncio.get_running_loop()
+                self._flush_handle = loop.call_later(self.flush_interval_seconds, self._start_flush)
+
+    async def close(self) -> None:
+        """Flush pending writes; called on shutdown before the Postgres pool closes."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        # A flush that hit a conflict leaves the rebased session dirty for another attempt.
+        for _ in range(3):
+            await self.flush()
+            if not self._dirty:
+                break
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if self._dirty:
+            LOGGER.error(f"{len(self._dirty)} sessions could not be persisted on shutdown")
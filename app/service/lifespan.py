@@ -2,9 +2,18 @@ import logging
 from collections.abc import AsyncGenerator
 from contextlib import asynccontextmanager
 
-import asyncpg
 from fastapi import FastAPI
 
+from agent.dependencies import (
+    get_embedding_client,
+    get_milvus_manager,
+    get_orchestrate_rag_agent,
+    get_postgres_client,
+    get_postgres_pool,
+    get_query_router,
+    get_retriever,
+    get_session_cache,
+)
 from config.settings import settings
 from memory import initialize_database, initialize_store
 from utils.logger import configure_logging
@@ -16,26 +25,45 @@ LOGGER.setLevel(logging.INFO)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncGenerator:
-    """Initializes database checkpointer and store based on settings."""
+    """Opens the shared Postgres pool, applies migrations and sets up the saver and store."""
+    pool = get_postgres_pool()
     try:
-        app.state.db_conn = await asyncpg.connect(
-            user=settings.POSTGRES_USER,
-            password=settings.POSTGRES_PASSWORD.get_secret_value(),
-            database=settings.POSTGRES_DB,
-            host=settings.POSTGRES_HOST,
-            port=settings.POSTGRES_PORT,
-        )
-
-        # Initialize saver and store
-        async with initialize_database() as saver, initialize_store() as store:
-            if hasattr(saver, "setup"):
-                await saver.setup()
-            if hasattr(store, "setup"):
-                await store.setup()
+        # Open and warm the pool to POSTGRES_MIN_CONNECTIONS_PER_POOL before serving traffic
+        await pool.open(wait=True)
+        app.state.postgres_pool = pool
 
+        # Apply schema migrations once so request handlers never issue DDL
+        await get_postgres_client().migrate()
+
+        # Load the embedding model and make sure it matches the collection
+        await get_embedding_client().warm_up()
+        milvus_manager = get_milvus_manager()
+        milvus_manager.validate_vector_dim()
+        if settings.MILVUS_LOAD_ON_STARTUP:
+            # Load explicitly so the first request does not wait for the collection to load
+            milvus_manager.load()
+
+        # Build in-memory retrieval indexes before the first request needs them
+        await get_retriever().warm_up()
+        if router := get_query_router():
+            await router.refresh()
+
+        # Initialize saver and store on the same pool
+        async with initialize_database(pool) as saver, initialize_store(pool) as store:
+            app.state.saver = saver
+            app.state.store = store
             yield
     finally:
-        # Cleanup on shutdown
-        if hasattr(app.state, "db_conn"):
-            await app.state.db_conn.close()
+        # Cleanup on shutdown, persisting summaries and write-behind session state while the
+        # pool is open
+        if get_orchestrate_rag_agent.cache_info().currsize:
+            await get_orchestrate_rag_agent().close()
+        if session_cache := get_session_cache():
+            await session_cache.close()
+        if get_embedding_client.cache_info().currsize and (cache := get_embedding_client().cache):
+            # Finish queued embedding cache writes
+            cache.close()
+        if settings.MILVUS_RELEASE_ON_SHUTDOWN:
+            get_milvus_manager().release()
+        await pool.close()
         LOGGER.info("Application shutting down...")
@@ -1,12 +1,28 @@
+import json
 import logging
-from typing import Annotated
+from collections.abc import AsyncIterator
+from typing import Annotated, Any
 
-from fastapi import APIRouter, Depends
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from starlette.background import BackgroundTask
 
-from agent.dependencies import get_orchestrate_rag_agent
+from agent.contexts import ChunkStore
+from agent.dependencies import (
+    get_chunk_store,
+    get_embedding_client,
+    get_orchestrate_rag_agent,
+    get_postgres_client,
+    get_retrieval_prefetcher,
+    get_retriever,
+    get_semantic_cache,
+    get_session_cache,
+)
 from agent.rag_agent import OrchestrateRAGAgent
-from config.schemas import UserInput
+from config.schemas import ChunkLookup, UserInput
+from config.settings import settings
+from memory.postgres import PostgresClient
+from utils.metrics import REGISTRY, render_gauge
 
 router = APIRouter()
 LOGGER = logging.getLogger("service")
@@ -18,6 +34,54 @@ async def health_check():
     return JSONResponse(content={"status": "ok"}, status_code=200)
 
 
+@router.get("/pool_stats", include_in_schema=False)
+async def pool_stats(
+    postgres_client: Annotated[PostgresClient, Depends(get_postgres_client)]
+) -> JSONResponse:
+    return JSONResponse(content=postgres_client.pool_stats(), status_code=200)
+
+
+def cache_layer_stats() -> dict[str, dict[str, float]]:
+    """Hit/miss counters for every enabled cache layer, keyed by layer name."""
+    layers: dict[str, dict[str, float]] = {}
+    if embedding_cache := get_embedding_client().cache:
+        for tier, stats in embedding_cache.stats.items():
+            layers[f"embedding_{tier}"] = stats
+    if retrieval_cache := get_retriever().cache:
+        for layer, stats in retrieval_cache.stats.items():
+            layers[f"retrieval_{layer}"] = stats
+    if prefetcher := get_retrieval_prefetcher():
+        layers["retrieval_prefetch"] = prefetcher.stats.as_dict()
+    if semantic_cache := get_semantic_cache():
+        layers["semantic_answers"] = semantic_cache.stats.as_dict()
+    if session_cache := get_session_cache():
+        layers["session_state"] = session_cache.stats
+    return layers
+
+
+@router.get("/cache_stats", include_in_schema=False)
+async def cache_stats() -> JSONResponse:
+    return JSONResponse(content=cache_layer_stats(), status_code=200)
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics(
+    postgres_client: Annotated[PostgresClient, Depends(get_postgres_client)]
+) -> PlainTextResponse:
+    cache_samples = [
+        ({"layer": layer, "counter": counter}, value)
+        for layer, stats in cache_layer_stats().items()
+        for counter, value in stats.items()
+    ]
+    pool_samples = [({"stat": stat}, value) for stat, value in postgres_client.pool_stats().items()]
+    body = (
+        REGISTRY.render()
+        + render_gauge("rag_cache", "Cache layer counters and hit ratios.", cache_samples)
+        + render_gauge("rag_postgres_pool", "Postgres pool occupancy and waits.", pool_samples)
+    )
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4")
+
+
 @router.post("/chat")
 async def chat(
     request: UserInput,
@@ -31,3 +95,73 @@ async def chat(
     except Exception as e:
         LOGGER.exception("OrchestrateRAGAgent failed.")
         return JSONResponse(content={"error": f"OrchestrateRAGAgent error: {e}"}, status_code=500)
+
+
+async def resolve_chunks(chunk_store: ChunkStore, refs: list[dict]) -> JSONResponse:
+    try:
+        content = await chunk_store.aresolve(refs)
+    except Exception as e:
+        LOGGER.exception("Chunk lookup failed.")
+        return JSONResponse(content={"error": f"Chunk lookup error: {e}"}, status_code=500)
+    return JSONResponse(content=content, status_code=200)
+
+
+@router.get("/chunks")
+async def chunks(
+    ids: Annotated[list[int], Query(max_length=settings.CHUNKS_MAX_IDS)],
+    chunk_store: Annotated[ChunkStore, Depends(get_chunk_store)]
+) -> JSONResponse:
+    """Full text of chunks by ID, in the requested order; unknown IDs are marked missing."""
+    return await resolve_chunks(chunk_store, [{"chunk_id": chunk_id} for chunk_id in ids])
+
+
+@router.post("/chunks")
+async def chunks_by_ref(
+    request: ChunkLookup,
+    chunk_store: Annotated[ChunkStore, Depends(get_chunk_store)]
+) -> JSONResponse:
+    """Full text of the chunks referenced in `retrieved_context`, in the requested order.
+
+    Unlike the GET form, this also finds chunks a re-ingest moved to a new ID.
+    """
+    return await resolve_chunks(chunk_store, [ref.model_dump() for ref in request.refs])
+
+
+async def format_sse(events: AsyncIterator[dict[str, Any]]) -> AsyncIterator[str]:
+    """Encode agent events as Server-Sent Events frames."""
+    async for event in events:
+        yield f"event: {event['event']}\ndata: {json.dumps(event['data'], ensure_ascii=False)}\n\n"
+
+
+@router.post("/chat/stream")
+async def chat_stream(
+    request: UserInput,
+    agent: Annotated[OrchestrateRAGAgent, Depends(get_orchestrate_rag_agent)]
+) -> Response:
+    session_id = request.session_id or "session-123"
+    try:
+        state = await agent.load_state_memory(session_id)
+    except Exception as e:
+        LOGGER.exception("OrchestrateRAGAgent failed.")
+        return JSONResponse(content={"error": f"OrchestrateRAGAgent error: {e}"}, status_code=500)
+    state.user_input = request.user_input
+    failed = False
+
+    async def events() -> AsyncIterator[dict[str, Any]]:
+        nonlocal failed
+        async for event in agent.stream(state):
+            failed = failed or event["event"] == "error"
+            yield event
+
+    async def save() -> None:
+        if not failed:
+            await agent.save_state_memory(state)
+
+    # The background task runs once the stream has been sent, keeping the Postgres write off
+    # the time-to-first-token path; a turn that ended in an error frame is not saved.
+    return StreamingResponse(
+        format_sse(events()),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(save),
+    )
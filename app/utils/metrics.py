@@ -0,0 +1,248 @@
+"""Minimal Prometheus metrics registry and per-stage timing spans.
+
+Metrics are rendered in the Prometheus text exposition format by `/metrics`. When
+`OTEL_ENABLED` is set and `opentelemetry-api` is installed, every timed stage is also
+recorded as an OpenTelemetry span; exporters are configured the usual OTel way.
+"""
+
+import abc
+import bisect
+import logging
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Any
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+from config.settings import settings
+from utils.logger import configure_logging
+
+configure_logging()
+LOGGER = logging.getLogger("metrics")
+LOGGER.setLevel(logging.INFO)
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+TOKEN_BUCKETS = (16, 64, 256, 1024, 2048, 4096, 8192, 16384, 32768)
+ITERATION_BUCKETS = (1, 2, 3, 4, 5, 6, 8, 10)
+
+
+def escape_label(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(labels: dict[str, Any]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{escape_label(value)}"' for key, value in labels.items()) + "}"
+
+
+def format_value(value: float) -> str:
+    return repr(float(value)) if value != float("inf") else "+Inf"
+
+
+class Metric(abc.ABC):
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict[str, Any]) -> tuple:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+
+    @abc.abstractmethod
+    def render(self) -> list[str]:
+        """Render the metric in the Prometheus text exposition format."""
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> list[str]:
+        with self._lock:
+            values = dict(self._values)
+        return self.header() + [
+            f"{self.name}{format_labels(dict(zip(self.labelnames, key)))} {format_value(value)}"
+            for key, value in values.items()
+        ]
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # key -> (per-bucket counts with a trailing +Inf slot, sum)
+        self._series: dict[tuple, tuple[list[int], float]] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._series.get(key) or ([0] * (len(self.buckets) + 1), 0.0)
+            counts[index] += 1
+            self._series[key] = (counts, total + value)
+
+    def snapshot(self) -> dict[tuple, tuple[list[int], float]]:
+        """Copy of each series' per-bucket counts (with a trailing +Inf slot) and sum."""
+        with self._lock:
+            return {key: (list(counts), total) for key, (counts, total) in self._series.items()}
+
+    def render(self) -> list[str]:
+        series = self.snapshot()
+        lines = self.header()
+        for key, (counts, total) in series.items():
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                cumulative += count
+                bucket_labels = format_labels({**labels, "le": format_value(bound)})
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{format_labels(labels)} {format_value(total)}")
+            lines.append(f"{self.name}_count{format_labels(labels)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: list[Metric] = []
+
+    def counter(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Counter:
+        metric = Counter(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(line for metric in self._metrics for line in metric.render()) + "\n"
+
+
+def render_gauge(name: str, documentation: str, samples: list[tuple[dict, float]]) -> str:
+    """Render a gauge whose values are read at scrape time."""
+    lines = [f"# HELP {name} {documentation}", f"# TYPE {name} gauge"]
+    lines += [f"{name}{format_labels(labels)} {format_value(value)}" for labels, value in samples]
+    return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+STAGE_SECONDS = REGISTRY.histogram(
+    "rag_stage_duration_seconds", "Time spent in each stage of a chat turn.", ("stage",)
+)
+LLM_TOKENS = REGISTRY.histogram(
+    "rag_llm_call_tokens", "Tokens per LLM call.", ("direction",), buckets=TOKEN_BUCKETS
+)
+LLM_TOKENS_TOTAL = REGISTRY.counter(
+    "rag_llm_tokens_total", "Tokens across all LLM calls.", ("direction",)
+)
+REACT_ITERATIONS = REGISTRY.histogram(
+    "rag_react_iterations", "LLM calls per ReAct agent run.", buckets=ITERATION_BUCKETS
+)
+ROUTE_DECISIONS = REGISTRY.counter(
+    "rag_route_decisions_total", "Query routing decisions.", ("route", "reason")
+)
+ROUTE_SECONDS = REGISTRY.histogram(
+    "rag_route_duration_seconds", "Time to answer a question on each route.", ("route",)
+)
+ROUTE_FALLBACK_OUTCOMES = REGISTRY.counter(
+    "rag_route_fallback_outcomes_total",
+    "Whether questions routed to the agent went on to call retrieval.",
+    ("outcome",),
+)
+
+
+@lru_cache
+def get_tracer() -> Any:
+    """OpenTelemetry tracer, or None when tracing is disabled or not installed."""
+    if not settings.OTEL_ENABLED:
+        return None
+    try:
+        from opentelemetry import trace
+    except ImportError:
+        LOGGER.warning("OTEL_ENABLED is set but opentelemetry-api is not installed")
+        return None
+    return trace.get_tracer("rag_agent")
+
+
+@contextmanager
+def timed(stage: str) -> Iterator[None]:
+    """Record the duration of a stage, and an OpenTelemetry span when tracing is on."""
+    tracer = get_tracer()
+    start = time.perf_counter()
+    try:
+        if tracer is None:
+            yield
+        else:
+            with tracer.start_as_current_span(stage):
+                yield
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage=stage)
+
+
+class LLMMetricsCallback(BaseCallbackHandler):
+    """Times each LLM call of one agent run and records its token usage."""
+
+    def __init__(self):
+        self.iterations = 0
+        self._started: dict[UUID, float] = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id: UUID, **kwargs) -> None:
+        self._started[run_id] = time.perf_counter()
+
+    def on_llm_start(self, serialized, prompts, *, run_id: UUID, **kwargs) -> None:
+        self._started[run_id] = time.perf_counter()
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs) -> None:
+        self._started.pop(run_id, None)
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs) -> None:
+        self.iterations += 1
+        if (started := self._started.pop(run_id, None)) is not None:
+            STAGE_SECONDS.observe(time.perf_counter() - started, stage="llm_call")
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if not usage:
+                    continue
+                for direction in ("input", "output"):
+                    tokens = usage.get(f"{direction}_tokens", 0)
+                    LLM_TOKENS.observe(tokens, direction=direction)
+                    LLM_TOKENS_TOTAL.inc(tokens, direction=direction)
+
+    def record_run(self) -> None:
+        REACT_ITERATIONS.observe(self.iterations)
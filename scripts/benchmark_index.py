@@ -0,0 +1,307 @@
+"""Measure recall@k, latency and QPS of Milvus vector index configurations.
+
+Vectors are read from the configured collection, or generated in clusters with --synthetic.
+The first --queries of them are held out as queries and the rest are copied into a scratch
+collection, which is re-indexed for each configuration so the serving collection is never
+touched. Recall@k is measured against exact brute-force cosine search in NumPy over the
+full-dimension float vectors, so --output-dims truncation, float16/binary storage and optional
+rescoring are compared on recall against their estimated index memory.
+
+Usage:
+    python -m scripts.benchmark_index --k 5 --queries 200
+    python -m scripts.benchmark_index --synthetic 50000 --dim 768 --index-types HNSW IVF_FLAT
+    python -m scripts.benchmark_index --vector-types float float16 binary --output-dims 768 256 \\
+        --rescore --oversample 4 --full-precision
+"""
+
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+from dotenv import load_dotenv
+
+APP_PATH = Path(__file__).parent.parent / "app"
+load_dotenv(APP_PATH / ".env")
+sys.path.append(str(APP_PATH))
+
+from config.settings import settings
+from memory.milvus_manager import (
+    FULL_PRECISION_FIELD,
+    INDEX_TYPES,
+    SEARCH_EFFORT_PARAMS,
+    MilvusManager,
+    default_build_params,
+    encode_vectors,
+)
+
+FLOAT_INDEX_TYPES = ["AUTOINDEX", "HNSW", "IVF_FLAT", "IVF_SQ8", "IVF_PQ", "DISKANN"]
+BINARY_INDEX_TYPES = ["BIN_FLAT", "BIN_IVF_FLAT"]
+
+# Search effort values swept for each index type; the others take no search parameters.
+SWEEPS: dict[str, list[int]] = {
+    "HNSW": [16, 32, 64, 128, 256],
+    "IVF_FLAT": [1, 4, 16, 64],
+    "IVF_SQ8": [1, 4, 16, 64],
+    "IVF_PQ": [1, 4, 16, 64],
+    "DISKANN": [20, 50, 100, 200],
+    "BIN_IVF_FLAT": [1, 4, 16, 64],
+}
+
+
+def load_vectors(milvus_manager: MilvusManager, max_rows: int) -> np.ndarray:
+    vectors = []
+    for row in milvus_manager.iter_rows(output_fields=["vector"]):
+        vectors.append(milvus_manager.decode_vector(row["vector"]))
+        if len(vectors) >= max_rows:
+            break
+    return np.asarray(vectors, dtype=np.float32)
+
+
+def synthetic_vectors(rows: int, dim: int, seed: int) -> np.ndarray:
+    """Gaussian clusters, which exercise an ANN index more like real embeddings than noise."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(max(rows // 100, 1), dim))
+    assignments = rng.integers(len(centers), size=rows)
+    return (centers[assignments] + 0.5 * rng.normal(size=(rows, dim))).astype(np.float32)
+
+
+def exact_top_k(data: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    """Row positions of the exact cosine top-k of every query."""
+    data = data / np.linalg.norm(data, axis=1, keepdims=True).clip(min=1e-12)
+    queries = queries / np.linalg.norm(queries, axis=1, keepdims=True).clip(min=1e-12)
+    scores = queries @ data.T
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    return np.take_along_axis(top, np.argsort(-np.take_along_axis(scores, top, 1), 1), 1)
+
+
+def fill_scratch_collection(milvus_manager: MilvusManager, data: np.ndarray) -> np.ndarray:
+    """Copy `data` into a fresh scratch collection and return the assigned primary keys."""
+    milvus_manager.create_collection(dim=data.shape[1], drop_existing=True)
+    ids = []
+    for start in range(0, len(data), 1000):
+        vectors = data[start : start + 1000].tolist()
+        rows = [
+            {
+                "vector": encoded,
+                "text_content": "",
+                "page_number": 0,
+                "source": "",
+                "chunk_hash": "",
+                **({FULL_PRECISION_FIELD: vector} if milvus_manager.has_full_precision else {}),
+            }
+            for vector, encoded in zip(
+                vectors, encode_vectors(vectors, milvus_manager.vector_type)
+            )
+        ]
+        result = milvus_manager.client.insert(milvus_manager.collection_name, data=rows)
+        ids.extend(result["ids"])
+    return np.asarray(ids, dtype=np.int64)
+
+
+def measure(
+    milvus_manager: MilvusManager,
+    queries: np.ndarray,
+    expected_ids: np.ndarray,
+    k: int,
+    search_params: dict,
+    concurrency: int,
+) -> dict[str, float]:
+    def search(query: np.ndarray) -> tuple[list[int], float]:
+        start = time.perf_counter()
+        hits = milvus_manager.search_by_vectors([query.tolist()], k, search_params)[0]
+        return [hit["id"] for hit in hits], time.perf_counter() - start
+
+    # Sequential queries give unloaded latency; the concurrent pass gives throughput.
+    results = [search(query) for query in queries]
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        start = time.perf_counter()
+        list(pool.map(search, queries))
+        elapsed = time.perf_counter() - start
+
+    recall = np.mean([
+        len(set(found) & set(expected.tolist())) / k
+        for (found, _), expected in zip(results, expected_ids)
+    ])
+    latencies = np.asarray([latency for _, latency in results]) * 1000
+    return {
+        "recall": float(recall),
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+        "qps": len(queries) / elapsed,
+    }
+
+
+def truncate(vectors: np.ndarray, dim: int) -> np.ndarray:
+    """Keep the first `dim` components and re-normalize, as Matryoshka embeddings allow."""
+    vectors = vectors[:, :dim].copy()
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True).clip(min=1e-12)
+
+
+def index_bytes_per_vector(
+    vector_type: str, index_type: str, dim: int, build_params: dict
+) -> float | None:
+    """Estimated index memory per vector: the encoded vector plus HNSW's neighbour lists."""
+    raw = {"float": 4 * dim, "float16": 2 * dim, "binary": dim / 8}[vector_type]
+    if index_type == "IVF_SQ8":
+        return dim
+    if index_type == "IVF_PQ":
+        return build_params["m"] * build_params["nbits"] / 8
+    if index_type == "HNSW":
+        return raw + 2 * build_params["M"] * 4
+    if index_type == "DISKANN":
+        # Vectors and graph live on disk; memory holds compressed codes sized by the server.
+        return None
+    return raw
+
+
+def benchmark_layout(
+    milvus_manager: MilvusManager,
+    data: np.ndarray,
+    queries: np.ndarray,
+    expected_positions: np.ndarray,
+    index_types: list[str],
+    args: argparse.Namespace,
+) -> list[dict]:
+    """Measure every index configuration over one vector dimension and type."""
+    dim, vector_type = data.shape[1], milvus_manager.vector_type
+    ids = fill_scratch_collection(milvus_manager, data)
+    expected_ids = ids[expected_positions]
+    results, measured = [], set()
+    for index_type in index_types:
+        build_params = default_build_params(index_type, dim, len(data))
+        start = time.perf_counter()
+        try:
+            index = milvus_manager.create_index(index_type, build_params) or {}
+        except Exception as e:
+            print(f"{dim:>5} {vector_type:<8} {index_type:<12} skipped: {e}")
+            continue
+        build_seconds = time.perf_counter() - start
+        # Stores without ANN indexes (the flat index) report what they actually built.
+        index_type = index.get("index_type", index_type)
+        if index_type in measured:
+            continue
+        measured.add(index_type)
+        per_vector = index_bytes_per_vector(vector_type, index_type, dim, build_params)
+        memory_mb = None if per_vector is None else per_vector * len(data) / 2**20
+        for value in SWEEPS.get(index_type, [None]):
+            search_params = {SEARCH_EFFORT_PARAMS[index_type]: value} if value else {}
+            for oversample in [None, args.oversample] if args.rescore else [None]:
+                milvus_manager.rescore_oversample = oversample
+                stats = measure(
+                    milvus_manager, queries, expected_ids, args.k, search_params, args.concurrency
+                )
+                label = ", ".join(f"{name}={v}" for name, v in search_params.items()) or "-"
+                rescore = f"x{oversample}" if oversample else "-"
+                memory = f"{memory_mb:.2f}" if memory_mb is not None else "-"
+                print(
+                    f"{dim:>5} {vector_type:<8} {index_type:<12} {label:<16} {rescore:>7} "
+                    f"{memory:>9} {build_seconds:>8.2f} {stats['recall']:>9.3f} "
+                    f"{stats['p50_ms']:>8.2f} {stats['p95_ms']:>8.2f} {stats['qps']:>8.0f}"
+                )
+                results.append({
+                    "dim": dim,
+                    "vector_type": vector_type,
+                    "index_type": index_type,
+                    "build_params": build_params,
+                    "search_params": search_params,
+                    "rescore_oversample": oversample,
+                    "memory_mb": memory_mb,
+                    "build_seconds": build_seconds,
+                    **stats,
+                })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--index-types",
+        nargs="+",
+        choices=INDEX_TYPES,
+        help="Index types to build (default: the float or the binary ones, per vector type)",
+    )
+    parser.add_argument(
+        "--vector-types", nargs="+", default=["float"], choices=["float", "float16", "binary"]
+    )
+    parser.add_argument(
+        "--output-dims",
+        nargs="+",
+        type=int,
+        help="Matryoshka dimensions to truncate the vectors to (default: the full dimension)",
+    )
+    parser.add_argument("--rescore", action="store_true", help="Also measure with rescoring")
+    parser.add_argument("--oversample", type=int, default=settings.MILVUS_RESCORE_OVERSAMPLE)
+    parser.add_argument(
+        "--full-precision",
+        action="store_true",
+        default=settings.MILVUS_RESCORE_FULL_PRECISION,
+        help="Rescore float16/binary vectors against a full-precision copy",
+    )
+    parser.add_argument("--k", type=int, default=settings.RETRIEVAL_TOP_K)
+    parser.add_argument("--queries", type=int, default=200, help="Vectors held out as queries")
+    parser.add_argument("--max-rows", type=int, default=100_000)
+    parser.add_argument("--synthetic", type=int, help="Generate this many vectors instead")
+    parser.add_argument("--dim", type=int, default=settings.MILVUS_EMBEDDING_DIM)
+    parser.add_argument("--concurrency", type=int, default=settings.MILVUS_SEARCH_MAX_WORKERS)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--keep", action="store_true", help="Keep the scratch collection")
+    parser.add_argument("--output", type=Path, help="Also write the results as JSON")
+    args = parser.parse_args()
+
+    source = MilvusManager()
+    if args.synthetic:
+        vectors = synthetic_vectors(args.synthetic + args.queries, args.dim, args.seed)
+    else:
+        vectors = load_vectors(source, args.max_rows + args.queries)
+    if len(vectors) <= args.queries + args.k:
+        parser.error(f"need more than {args.queries + args.k} vectors, found {len(vectors)}")
+    np.random.default_rng(args.seed).shuffle(vectors)
+    queries, data = vectors[: args.queries], vectors[args.queries :]
+    # Ground truth is exact search over the full-dimension float vectors, so truncation and
+    # quantization losses both count against recall.
+    expected_positions = exact_top_k(data, queries, args.k)
+
+    milvus_manager = MilvusManager(client=source.client)
+    milvus_manager.collection_name = f"{settings.MILVUS_COLLECTION_NAME}_index_bench"
+    milvus_manager.rescore_full_precision = args.full_precision
+    print(f"Benchmarking {len(data)} vectors in {milvus_manager.collection_name}")
+    print(
+        f"{'dim':>5} {'vectors':<8} {'index':<12} {'search':<16} {'rescore':>7} "
+        f"{'est. MB':>9} {'build s':>8} {'recall@' + str(args.k):>9} "
+        f"{'p50 ms':>8} {'p95 ms':>8} {'qps':>8}"
+    )
+    results = []
+    try:
+        for dim in args.output_dims or [data.shape[1]]:
+            for vector_type in args.vector_types:
+                milvus_manager.vector_type = vector_type
+                index_types = args.index_types or (
+                    BINARY_INDEX_TYPES if vector_type == "binary" else FLOAT_INDEX_TYPES
+                )
+                try:
+                    results += benchmark_layout(
+                        milvus_manager,
+                        truncate(data, dim),
+                        truncate(queries, dim),
+                        expected_positions,
+                        index_types,
+                        args,
+                    )
+                except Exception as e:
+                    print(f"{dim:>5} {vector_type:<8} skipped: {e}")
+    finally:
+        if not args.keep and milvus_manager.client.has_collection(milvus_manager.collection_name):
+            milvus_manager.client.drop_collection(milvus_manager.collection_name)
+
+    if args.output:
+        config = {k: v for k, v in vars(args).items() if k != "output"}
+        args.output.write_text(json.dumps({"config": config, "results": results}, indent=2))
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
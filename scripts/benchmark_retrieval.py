@@ -0,0 +1,67 @@
+"""Benchmark concurrent retrieval against stubbed embedding and Milvus backends.
+
+Compares the blocking `Retriever.retrieve` path, called directly from coroutines the way the
+agent used to, against the async `Retriever.aretrieve` path.
+
+Usage:
+    python -m scripts.benchmark_retrieval --concurrency 32
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+APP_PATH = Path(__file__).parent.parent / "app"
+sys.path.append(str(APP_PATH))
+
+from agent.rag_agent import Retriever
+from memory.milvus_manager import MilvusManager
+from scripts.fakes import FakeEmbeddingClient, FakeMilvusClient
+
+
+async def run_blocking(retriever: Retriever, queries: list[str]) -> float:
+    """Run sync retrievals from coroutines; each one stalls the event loop."""
+
+    async def retrieve(query: str) -> list[str]:
+        return retriever.retrieve(query)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(retrieve(query) for query in queries))
+    return time.perf_counter() - start
+
+
+async def run_async(retriever: Retriever, queries: list[str]) -> float:
+    """Run async retrievals concurrently."""
+    start = time.perf_counter()
+    await asyncio.gather(*(retriever.aretrieve(query) for query in queries))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--embed-latency", type=float, default=0.05)
+    parser.add_argument("--search-latency", type=float, default=0.02)
+    args = parser.parse_args()
+
+    milvus_manager = MilvusManager(client=FakeMilvusClient(latency=args.search_latency))
+    embedder = FakeEmbeddingClient(latency=args.embed_latency)
+    retriever = Retriever(
+        milvus_manager=milvus_manager,
+        embedder=embedder,  # type: ignore[arg-type]
+    )
+    queries = [f"question {i}" for i in range(args.concurrency)]
+
+    blocking = asyncio.run(run_blocking(retriever, queries))
+    concurrent = asyncio.run(run_async(retriever, queries))
+
+    print(f"Concurrent sessions: {args.concurrency}")
+    print(f"Blocking retrieve:   {blocking:.3f}s ({args.concurrency / blocking:.1f} req/s)")
+    print(f"Async aretrieve:     {concurrent:.3f}s ({args.concurrency / concurrent:.1f} req/s)")
+    print(f"Speedup:             {blocking / concurrent:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,8 @@
+import json
 import logging
 import os
 import uuid
+from collections.abc import Iterator
 from dataclasses import dataclass
 
 import requests
@@ -17,6 +19,8 @@ class Config:
 
     API_BASE_URL: str = os.getenv("API_BASE_URL", "http://localhost:8080")
     QUERY_URL: str = f"{API_BASE_URL}/chat"
+    STREAM_URL: str = f"{API_BASE_URL}/chat/stream"
+    CHUNKS_URL: str = f"{API_BASE_URL}/chunks"
     TIMEOUT: int = 300
 
 
@@ -39,6 +43,42 @@ class AgentClient:
             logger.error(f"API Request failed: {e}")
             raise
 
+    def fetch_chunks(self, refs: list[dict]) -> list[dict]:
+        """Fetches the text of referenced chunks; entries that already carry text pass through."""
+        chunk_refs = [ref for ref in refs if "chunk_id" in ref]
+        if not chunk_refs:
+            return refs
+        try:
+            response = requests.post(
+                self.config.CHUNKS_URL, json={"refs": chunk_refs}, timeout=self.config.TIMEOUT
+            )
+            response.raise_for_status()
+            return response.json()
+        except requests.exceptions.RequestException as e:
+            logger.error(f"API Request failed: {e}")
+            raise
+
+    def stream_query(self, query: str) -> Iterator[tuple[str, dict]]:
+        """Sends a query to the streaming endpoint and yields (event, data) pairs."""
+        payload = {"session_id": st.session_state["session_id"], "user_input": query}
+        try:
+            with requests.post(
+                self.config.STREAM_URL, json=payload, stream=True, timeout=self.config.TIMEOUT
+            ) as response:
+                response.raise_for_status()
+                event = None
+                for raw_line in response.iter_lines():
+                    # SSE is always UTF-8; requests would guess ISO-8859-1 for text/event-stream.
+                    line = raw_line.decode("utf-8")
+                    if line.startswith("event: "):
+                        event = line.removeprefix("event: ")
+                    elif line.startswith("data: ") and event:
+                        yield event, json.loads(line.removeprefix("data: "))
+                        event = None
+        except requests.exceptions.RequestException as e:
+            logger.error(f"API Request failed: {e}")
+            raise
+
 
 class ChatInterface:
     """Chat interface for the chatbot."""
@@ -73,38 +113,61 @@ class ChatInterface:
 
                 if msg["role"] == "assistant" and msg.get("retrieved_contexts"):
                     with st.expander("📚 Retrieved Contexts", expanded=False):
-                        for i, ctx in enumerate(msg["retrieved_contexts"], start=1):
-                            content = ctx.get("content", "") if isinstance(ctx, dict) else str(ctx)
-                            st.markdown(f"**Context {i}**")
-                            st.markdown(content)
-                            st.divider()
+                        self._render_contexts(msg["retrieved_contexts"])
 
         if prompt := st.chat_input("How can I help?"):
             self._process_input(prompt)
 
+    @staticmethod
+    def _render_contexts(contexts: list):
+        for i, ctx in enumerate(contexts, start=1):
+            if isinstance(ctx, dict):
+                content = ctx.get("text_content") or ctx.get("content", "")
+                if ctx.get("missing"):
+                    content = "_This passage is no longer in the collection._"
+                page = ctx.get("page_number")
+            else:
+                content, page = str(ctx), None
+            st.markdown(f"**Context {i}**" + (f" (page {page})" if page is not None else ""))
+            st.markdown(content)
+            st.divider()
+
     def _process_input(self, prompt: str):
         st.session_state["messages"].append({"role": "user", "content": prompt})
         with st.chat_message("user"):
             st.markdown(prompt)
 
-        with st.chat_message("assistant"), st.spinner("Thinking..."):
+        with st.chat_message("assistant"):
             try:
                 meta = SessionState(**st.session_state["session_metadata"])
                 meta.user_input = prompt
-                response_data = self.agent_client.send_query(prompt)
-
-                response_text = response_data.get("response", "")
-                retrieved_contexts = response_data.get("retrieved_context", [])
-
-                st.markdown(response_text)
+                status = st.empty()
+                retrieved_contexts: list = []
+                response_data: dict = {}
+
+                def tokens() -> Iterator[str]:
+                    status.caption("Thinking...")
+                    for event, data in self.agent_client.stream_query(prompt):
+                        if event == "retrieval_started":
+                            status.caption("Searching the thesis...")
+                        elif event == "retrieved_contexts":
+                            retrieved_contexts[:] = data.get("retrieved_contexts", [])
+                        elif event == "token":
+                            status.empty()
+                            yield data["text"]
+                        elif event == "state":
+                            response_data.update(data)
+                        elif event == "error":
+                            raise RuntimeError(data.get("error"))
+                    status.empty()
+
+                streamed_text = st.write_stream(tokens())
+                response_text = response_data.get("response") or str(streamed_text)
 
                 if retrieved_contexts:
+                    retrieved_contexts = self.agent_client.fetch_chunks(retrieved_contexts)
                     with st.expander("📚 Retrieved Contexts", expanded=False):
-                        for i, ctx in enumerate(retrieved_contexts, start=1):
-                            content = ctx.get("content", "") if isinstance(ctx, dict) else str(ctx)
-                            st.markdown(f"**Context {i}**")
-                            st.markdown(content)
-                            st.divider()
+                        self._render_contexts(retrieved_contexts)
 
                 st.session_state["messages"].append(
                     {
@@ -0,0 +1,97 @@
+"""Measure query routing accuracy against a labelled question set.
+
+The input is JSON lines with a question and whether it needs the knowledge base:
+
+    {"question": "What dataset does the thesis use?", "retrieve": true}
+    {"question": "Write a haiku about autumn", "retrieve": false}
+
+Each question is routed once with the configured embedding backend and collection. Accuracy,
+precision and recall of the `retrieve` route are reported for the configured threshold and a
+sweep of alternatives, so ROUTING_CENTROID_THRESHOLD can be tuned on real traffic.
+
+Usage:
+    python -m scripts.evaluate_router questions.jsonl
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from dotenv import load_dotenv
+
+APP_PATH = Path(__file__).parent.parent / "app"
+load_dotenv(APP_PATH / ".env")
+sys.path.append(str(APP_PATH))
+
+from agent.router import QueryRouter
+from config.settings import settings
+from core.embedder import EmbeddingClient
+from memory.milvus_manager import MilvusManager
+
+
+def scores_at(threshold: float, labels: np.ndarray, predicted: np.ndarray) -> dict[str, float]:
+    true_positives = int((predicted & labels).sum())
+    return {
+        "threshold": threshold,
+        "accuracy": float((predicted == labels).mean()),
+        "precision": true_positives / max(int(predicted.sum()), 1),
+        "recall": true_positives / max(int(labels.sum()), 1),
+        "fast_path_share": float(predicted.mean()),
+    }
+
+
+async def evaluate(router: QueryRouter, examples: list[dict]) -> tuple[list, list[float]]:
+    decisions, latencies = [], []
+    for example in examples:
+        start = time.perf_counter()
+        decisions.append(await router.route(example["question"]))
+        latencies.append(time.perf_counter() - start)
+    return decisions, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("questions", type=Path, help="JSON lines of question/retrieve pairs")
+    parser.add_argument("--threshold", type=float, default=settings.ROUTING_CENTROID_THRESHOLD)
+    args = parser.parse_args()
+
+    examples = [json.loads(line) for line in args.questions.read_text().splitlines() if line]
+    router = QueryRouter(
+        milvus_manager=MilvusManager(),
+        embedder=EmbeddingClient(),
+        threshold=args.threshold,
+        keywords=settings.ROUTING_KEYWORDS,
+    )
+    decisions, latencies = asyncio.run(evaluate(router, examples))
+
+    labels = np.asarray([bool(example["retrieve"]) for example in examples])
+    keyword = np.asarray([decision.reason == "keyword" for decision in decisions])
+    similarity = np.asarray([decision.score or 0.0 for decision in decisions])
+
+    print(f"{len(examples)} questions, mean routing latency {np.mean(latencies) * 1000:.1f}ms")
+    print(f"{'threshold':>9} {'accuracy':>9} {'precision':>9} {'recall':>9} {'fast path':>9}")
+    sweep = sorted({args.threshold, *np.round(np.arange(0.3, 0.91, 0.05), 2)})
+    for threshold in sweep:
+        stats = scores_at(threshold, labels, keyword | (similarity >= threshold))
+        marker = " <- configured" if threshold == args.threshold else ""
+        print(
+            f"{threshold:>9.2f} {stats['accuracy']:>9.3f} {stats['precision']:>9.3f} "
+            f"{stats['recall']:>9.3f} {stats['fast_path_share']:>9.3f}{marker}"
+        )
+
+    misrouted = [
+        (example["question"], decision)
+        for example, decision in zip(examples, decisions)
+        if (decision.route == "retrieve") != bool(example["retrieve"])
+    ]
+    for question, decision in misrouted[:10]:
+        score = f"{decision.score:.3f}" if decision.score is not None else "-"
+        print(f"misrouted -> {decision.route} ({decision.reason}, {score}): {question}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+"""Deterministic local stand-ins for the external backends used in benchmarks."""
+
+import asyncio
+import hashlib
+import json
+import time
+from collections.abc import AsyncIterator, Iterator
+from typing import Any
+from uuid import uuid4
+
+import numpy as np
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, ToolMessage
+from langchain_core.messages.tool import tool_call_chunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+
+def fake_vector(text: str, dim: int) -> list[float]:
+    """Build a deterministic unit vector for a text."""
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+    vector = np.random.default_rng(seed).standard_normal(dim).astype(np.float32)
+    vector /= np.linalg.norm(vector)
+    return vector.tolist()
+
+
+class FakeEmbeddingClient:
+    """Embedding client that sleeps for a fixed latency instead of calling the API."""
+
+    def __init__(self, latency: float = 0.05, dim: int = 64):
+        self.latency = latency
+        self.dim = dim
+
+    def embed_query(self, query: str) -> list[float]:
+        time.sleep(self.latency)
+        return fake_vector(query, self.dim)
+
+    async def aembed_query(self, query: str) -> list[float]:
+        await asyncio.sleep(self.latency)
+        return fake_vector(query, self.dim)
+
+    def embed_queries(self, queries: list[str]) -> list[list[float]]:
+        time.sleep(self.latency)
+        return [fake_vector(query, self.dim) for query in queries]
+
+    async def aembed_queries(self, queries: list[str]) -> list[list[float]]:
+        await asyncio.sleep(self.latency)
+        return [fake_vector(query, self.dim) for query in queries]
+
+
+class FakeEmbeddings:
+    """Embedding backend with a fixed latency per call, for use inside a real EmbeddingClient.
+
+    Latency is charged per call rather than per text, so request batching shows up in results.
+    """
+
+    def __init__(self, latency: float = 0.05, dim: int = 64):
+        self.latency = latency
+        self.dim = dim
+        self.calls = 0
+
+    @property
+    def dimension(self) -> int:
+        return self.dim
+
+    async def warm_up(self) -> None:
+        pass
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        self.calls += 1
+        time.sleep(self.latency)
+        return [fake_vector(text, self.dim) for text in texts]
+
+    def embed_queries(self, texts: list[str]) -> list[list[float]]:
+        return self.embed_documents(texts)
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.embed_documents([text])[0]
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        return [fake_vector(text, self.dim) for text in texts]
+
+    async def aembed_queries(self, texts: list[str]) -> list[list[float]]:
+        return await self.aembed_documents(texts)
+
+    async def aembed_query(self, text: str) -> list[float]:
+        return (await self.aembed_documents([text]))[0]
+
+
+class FakeChatModel(BaseChatModel):
+    """Chat model that calls `retrieve_context` once per question and then answers.
+
+    Every call sleeps for `latency` and reports token usage estimated from message length.
+    """
+
+    latency: float = 0.2
+    answer: str = "Retrieval augmented generation grounds answers in retrieved passages."
+    tools_bound: bool = False
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def bind_tools(self, tools: Any, **kwargs: Any) -> "FakeChatModel":  # type: ignore[override]
+        return self.model_copy(update={"tools_bound": True})
+
+    def _reply(self, messages: list[BaseMessage]) -> AIMessage:
+        last = messages[-1]
+        if self.tools_bound and not isinstance(last, ToolMessage):
+            tool_call = {
+                "name": "retrieve_context",
+                "args": {"question": str(last.content)},
+                "id": f"call_{uuid4().hex[:12]}",
+            }
+            reply = AIMessage(content="", tool_calls=[tool_call])
+        else:
+            reply = AIMessage(content=self.answer)
+        input_tokens = sum(len(str(message.content)) for message in messages) // 4 + 1
+        output_tokens = len(self.answer) // 4 + 1 if reply.content else 8
+        reply.usage_metadata = {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+        }
+        return reply
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        time.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self._reply(messages))])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        await asyncio.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self._reply(messages))])
+
+    def _chunks(self, reply: AIMessage) -> Iterator[ChatGenerationChunk]:
+        if reply.tool_calls:
+            tool_call_chunks = [
+                tool_call_chunk(
+                    name=call["name"], args=json.dumps(call["args"]), id=call["id"], index=index
+                )
+                for index, call in enumerate(reply.tool_calls)
+            ]
+            message = AIMessageChunk(
+                content="", tool_call_chunks=tool_call_chunks, usage_metadata=reply.usage_metadata
+            )
+            yield ChatGenerationChunk(message=message)
+            return
+        words = str(reply.content).split(" ")
+        for index, word in enumerate(words):
+            usage = reply.usage_metadata if index == len(words) - 1 else None
+            text = word if index == len(words) - 1 else word + " "
+            yield ChatGenerationChunk(message=AIMessageChunk(content=text, usage_metadata=usage))
+
+    async def _astream(
+        self, messages, stop=None, run_manager=None, **kwargs
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        await asyncio.sleep(self.latency)
+        for chunk in self._chunks(self._reply(messages)):
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+
+class FakeLLMClient:
+    """LLMClient stand-in backed by FakeChatModel."""
+
+    def __init__(self, latency: float = 0.2):
+        self.model = FakeChatModel(latency=latency)
+
+    async def ainvoke(self, messages: list[BaseMessage]):
+        response = await self.model.ainvoke(messages)
+        return response.content
+
+
+class FakeQueryIterator:
+    def __init__(self, rows: list[dict], batch_size: int):
+        self.rows = rows
+        self.batch_size = batch_size
+
+    def next(self) -> list[dict]:
+        batch, self.rows = self.rows[: self.batch_size], self.rows[self.batch_size :]
+        return batch
+
+    def close(self) -> None:
+        pass
+
+
+class FakeMilvusClient:
+    """Blocking MilvusClient stand-in that returns synthetic hits after a fixed latency."""
+
+    def __init__(self, latency: float = 0.02, dim: int = 64, num_rows: int = 100):
+        self.latency = latency
+        self.dim = dim
+        self.num_rows = num_rows
+        self.properties: dict[str, str] = {}
+
+    def row(self, i: int) -> dict:
+        text = f"Synthetic passage {i}"
+        return {
+            "id": i,
+            "text_content": text,
+            "page_number": i,
+            "source": "synthetic.pdf",
+            "chunk_hash": hashlib.sha256(text.encode("utf-8")).hexdigest(),
+            "vector": fake_vector(text, self.dim),
+        }
+
+    def entity(self, i: int) -> dict:
+        row = self.row(i)
+        fields = ("text_content", "page_number", "source", "chunk_hash")
+        return {field: row[field] for field in fields}
+
+    def has_collection(self, collection_name: str, **kwargs) -> bool:
+        return True
+
+    def get(self, collection_name: str, ids: list, output_fields: list | None = None, **kwargs):
+        time.sleep(self.latency)
+        return [{"id": i, **self.entity(i)} for i in ids]
+
+    def query_iterator(
+        self, collection_name: str, batch_size: int = 1000, output_fields=None, **kwargs
+    ) -> FakeQueryIterator:
+        fields = ["id", *(output_fields or [])]
+        rows = [self.row(i) for i in range(self.num_rows)]
+        return FakeQueryIterator([{k: row[k] for k in fields} for row in rows], batch_size)
+
+    def search(self, collection_name: str, data: list, limit: int = 10, **kwargs) -> list:
+        time.sleep(self.latency)
+        return [
+            [
+                {
+                    "id": rank,
+                    "distance": 1.0 - rank / (limit + 1),
+                    "entity": self.entity(rank),
+                }
+                for rank in range(limit)
+            ]
+            for _ in data
+        ]
+
+    def describe_collection(self, collection_name: str, **kwargs) -> dict:
+        return {
+            "collection_name": collection_name,
+            "fields": [{"name": "vector", "params": {"dim": self.dim}}],
+            "properties": dict(self.properties),
+        }
+
+    def alter_collection_properties(self, collection_name: str, properties: dict, **kwargs):
+        self.properties.update(properties)
+
+    def list_indexes(self, collection_name: str, **kwargs) -> list[str]:
+        return ["vector"]
+
+    def describe_index(self, collection_name: str, index_name: str, **kwargs) -> dict:
+        return {"index_type": "AUTOINDEX", "metric_type": "COSINE", "field_name": index_name}
+
+    def load_collection(self, collection_name: str, **kwargs) -> None:
+        pass
+
+    def release_collection(self, collection_name: str, **kwargs) -> None:
+        pass
+
+    def close(self):
+        pass
@@ -0,0 +1,85 @@
+"""Ingest PDF documents into Milvus.
+
+Usage:
+    python scripts/ingest.py path/to/thesis.pdf path/to/more_pdfs/
+    python scripts/ingest.py --drop-existing path/to/thesis.pdf
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+APP_PATH = Path(__file__).parent.parent / "app"
+load_dotenv(APP_PATH / ".env")
+sys.path.append(str(APP_PATH))
+
+from config.settings import settings
+from core.embedder import EmbeddingClient
+from core.ingestion import ingest_documents
+from memory.milvus_manager import MilvusManager
+
+
+def collect_pdfs(paths: list[Path]) -> list[Path]:
+    """Expand directories into the PDFs they contain."""
+    pdfs = []
+    for path in paths:
+        if path.is_dir():
+            pdfs.extend(sorted(path.rglob("*.pdf")))
+        elif path.suffix.lower() == ".pdf":
+            pdfs.append(path)
+    return pdfs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest PDF documents into Milvus.")
+    parser.add_argument("paths", nargs="+", type=Path, help="PDF files or directories")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--drop-existing", action="store_true", help="Recreate the collection")
+    mode.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only embed new or changed chunks and delete chunks that no longer exist "
+        "(the default unless --drop-existing is given)",
+    )
+    parser.add_argument(
+        "--root",
+        type=Path,
+        default=Path.cwd(),
+        help="Documents are named by their path relative to this folder (default: the cwd)",
+    )
+    parser.add_argument("--batch-size", type=int, default=settings.INGEST_BATCH_SIZE)
+    parser.add_argument("--workers", type=int, default=settings.INGEST_WORKERS)
+    args = parser.parse_args()
+
+    pdfs = collect_pdfs(args.paths)
+    if not pdfs:
+        parser.error("no PDF files found")
+
+    milvus_manager = MilvusManager()
+    milvus_manager.create_collection(drop_existing=args.drop_existing)
+    report = ingest_documents(
+        pdfs,
+        EmbeddingClient(),
+        milvus_manager,
+        batch_size=args.batch_size,
+        workers=args.workers,
+        # A dropped collection is empty, so there is nothing to diff against.
+        incremental=not args.drop_existing,
+        root=args.root,
+    )
+
+    print(f"Documents: {report.documents}")
+    print(f"Pages:     {report.pages} ({report.pages_per_second:.1f} pages/s)")
+    print(f"Chunks:    {report.chunks} ({report.chunks_per_second:.1f} chunks/s)")
+    if not args.drop_existing:
+        print(f"Embedded:  {report.embedded}")
+        print(f"Reused:    {report.reused}")
+        print(f"Unchanged: {report.unchanged}")
+        print(f"Deleted:   {report.deleted}")
+    print(f"Elapsed:   {report.seconds:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+"""Load-test the FastAPI app end to end with local stand-ins for the LLM, embeddings and Milvus.
+
+The app runs in-process behind an ASGI transport, so no port is opened and nothing leaves the
+machine except Postgres traffic. Postgres is real: point POSTGRES_* (app/.env) at a local
+instance, e.g. the `rag_ai_agent_db` service from app/docker-compose.yml.
+
+Each virtual user owns one session and sends `--turns` sequential requests; `--concurrency`
+users run at once. Questions are drawn from a pool of `--distinct-questions`, so a small pool
+exercises the caches and a large one measures cold paths. Results, including per-stage
+p50/p95/p99 estimated from the stage duration histogram, are printed and written to `--output`
+as JSON.
+
+Usage:
+    python -m scripts.load_test --concurrency 16 --turns 5 --output load_test.json
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+import sys
+import time
+from functools import lru_cache
+from pathlib import Path
+
+import httpx
+import numpy as np
+from dotenv import load_dotenv
+
+APP_PATH = Path(__file__).parent.parent / "app"
+load_dotenv(APP_PATH / ".env")
+sys.path.append(str(APP_PATH))
+
+from agent import dependencies
+from config.settings import settings
+from core.embedder import EmbeddingClient
+from memory.milvus_manager import MilvusManager
+from scripts.fakes import FakeEmbeddings, FakeLLMClient, FakeMilvusClient
+from utils import metrics
+
+
+def percentiles(samples: list[float]) -> dict[str, float]:
+    if not samples:
+        return {"count": 0}
+    values = np.asarray(samples) * 1000
+    return {
+        "count": len(samples),
+        "mean_ms": float(values.mean()),
+        "p50_ms": float(np.percentile(values, 50)),
+        "p95_ms": float(np.percentile(values, 95)),
+        "p99_ms": float(np.percentile(values, 99)),
+    }
+
+
+def stage_snapshot() -> dict[str, tuple[list[int], float]]:
+    """Per-stage bucket counts and sums of the stage duration histogram."""
+    return {key[0]: series for key, series in metrics.STAGE_SECONDS.snapshot().items()}
+
+
+def bucket_quantile(q: float, bounds: tuple[float, ...], counts: list[int]) -> float:
+    """Estimate a quantile from histogram buckets by linear interpolation, as Prometheus does."""
+    rank = q * sum(counts)
+    cumulative, lower = 0, 0.0
+    for bound, count in zip((*bounds, float("inf")), counts):
+        if count and cumulative + count >= rank:
+            if bound == float("inf"):
+                return lower
+            return lower + (bound - lower) * (rank - cumulative) / count
+        cumulative += count
+        lower = bound
+    return lower
+
+
+def stage_percentiles(
+    before: dict[str, tuple[list[int], float]], after: dict[str, tuple[list[int], float]]
+) -> dict[str, dict[str, float]]:
+    """Per-stage count, mean and estimated percentiles of what was observed between snapshots."""
+    bounds = metrics.STAGE_SECONDS.buckets
+    stages = {}
+    for stage, (counts, total) in sorted(after.items()):
+        previous_counts, previous_total = before.get(stage, ([0] * len(counts), 0.0))
+        delta = [now - then for now, then in zip(counts, previous_counts)]
+        if not (count := sum(delta)):
+            continue
+        stages[stage] = {
+            "count": count,
+            "mean_ms": (total - previous_total) / count * 1000,
+            **{
+                f"p{q}_ms": bucket_quantile(q / 100, bounds, delta) * 1000
+                for q in (50, 95, 99)
+            },
+        }
+    return stages
+
+
+def install_fakes(args: argparse.Namespace) -> None:
+    """Swap the external backends for local stand-ins before the app is imported."""
+    # Vectors match the configured dimension so the startup dimension check passes as in prod.
+    dim = settings.MILVUS_EMBEDDING_DIM
+
+    @lru_cache
+    def get_embedding_client() -> EmbeddingClient:
+        # A real client keeps the cache and request batcher in the measured path.
+        client = EmbeddingClient()
+        client.model = FakeEmbeddings(latency=args.embed_latency, dim=dim)  # type: ignore
+        return client
+
+    @lru_cache
+    def get_llm_client() -> FakeLLMClient:
+        return FakeLLMClient(latency=args.llm_latency)
+
+    @lru_cache
+    def get_milvus_manager() -> MilvusManager:
+        return MilvusManager(client=FakeMilvusClient(latency=args.search_latency, dim=dim))
+
+    dependencies.get_embedding_client = get_embedding_client
+    dependencies.get_llm_client = get_llm_client  # type: ignore[assignment]
+    dependencies.get_milvus_manager = get_milvus_manager
+
+
+async def run_user(
+    client: httpx.AsyncClient,
+    user: int,
+    args: argparse.Namespace,
+    questions: list[str],
+    latencies: list[float],
+    errors: list[str],
+) -> None:
+    rng = random.Random(args.seed + user)
+    session_id = f"load-{args.run_id}-{user}"
+    for _ in range(args.turns):
+        payload = {"session_id": session_id, "user_input": rng.choice(questions)}
+        start = time.perf_counter()
+        try:
+            if args.stream:
+                async with client.stream("POST", "/chat/stream", json=payload) as response:
+                    async for _ in response.aiter_lines():
+                        pass
+            else:
+                response = await client.post("/chat", json=payload)
+            if response.status_code != 200:
+                errors.append(f"HTTP {response.status_code}")
+                continue
+        except Exception as e:
+            errors.append(repr(e))
+            continue
+        latencies.append(time.perf_counter() - start)
+
+
+async def run(args: argparse.Namespace) -> dict:
+    install_fakes(args)
+
+    # Imported after install_fakes so the app wires in the stand-ins.
+    from main import app
+    from service.routes import cache_layer_stats
+
+    rng = random.Random(args.seed)
+    questions = [
+        f"What does the thesis say about topic {rng.randrange(10**6)}?"
+        for _ in range(args.distinct_questions)
+    ]
+    latencies: list[float] = []
+    errors: list[str] = []
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://load-test", timeout=None
+        ) as client:
+            stages_before = stage_snapshot()
+            start = time.perf_counter()
+            await asyncio.gather(
+                *(
+                    run_user(client, user, args, questions, latencies, errors)
+                    for user in range(args.concurrency)
+                )
+            )
+            elapsed = time.perf_counter() - start
+            stages = stage_percentiles(stages_before, stage_snapshot())
+        pool_stats = dependencies.get_postgres_client().pool_stats()
+        caches = cache_layer_stats()
+
+    agent_runs = stages.get("react_agent", {}).get("count") or len(latencies) or 1
+    llm_calls = stages.get("llm_call", {}).get("count", 0)
+    return {
+        "config": {k: v for k, v in vars(args).items() if k != "output"},
+        "commit": git_commit(),
+        "requests": len(latencies) + len(errors),
+        "errors": len(errors),
+        "error_samples": errors[:5],
+        "seconds": elapsed,
+        "throughput_rps": len(latencies) / elapsed if elapsed else 0.0,
+        "latency": percentiles(latencies),
+        "stages": stages,
+        "llm_calls_per_agent_run": llm_calls / agent_runs,
+        "caches": caches,
+        "postgres_pool": pool_stats,
+    }
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(result: dict) -> None:
+    latency = result["latency"]
+    print(
+        f"{result['requests']} requests, {result['errors']} errors in {result['seconds']:.2f}s "
+        f"({result['throughput_rps']:.1f} req/s)"
+    )
+    if latency["count"]:
+        print(
+            f"end-to-end  p50={latency['p50_ms']:.1f}ms  p95={latency['p95_ms']:.1f}ms  "
+            f"p99={latency['p99_ms']:.1f}ms"
+        )
+    for stage, stats in result["stages"].items():
+        print(
+            f"{stage:<20} n={stats['count']:<6} p50={stats['p50_ms']:.1f}ms  "
+            f"p95={stats['p95_ms']:.1f}ms  p99={stats['p99_ms']:.1f}ms"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent sessions")
+    parser.add_argument("--turns", type=int, default=5, help="Requests per session")
+    parser.add_argument("--distinct-questions", type=int, default=50)
+    parser.add_argument("--stream", action="store_true", help="Drive /chat/stream instead")
+    parser.add_argument("--llm-latency", type=float, default=0.2)
+    parser.add_argument("--embed-latency", type=float, default=0.05)
+    parser.add_argument("--search-latency", type=float, default=0.02)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, default=Path("load_test.json"))
+    args = parser.parse_args()
+    # Fresh session ids per run so earlier runs' history does not skew the numbers.
+    args.run_id = f"{int(time.time())}"
+
+    result = asyncio.run(run(args))
+    print_report(result)
+    args.output.write_text(json.dumps(result, indent=2))
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Inspect or rebuild the vector index of the Milvus collection.
+
+Usage:
+    python -m scripts.manage_index show
+    python -m scripts.manage_index create --index-type HNSW --param M=32 --param efConstruction=256
+
+`create` releases the collection while the index is rebuilt, so searches fail until it is
+loaded again; pick the configuration with `scripts.benchmark_index` first.
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+APP_PATH = Path(__file__).parent.parent / "app"
+load_dotenv(APP_PATH / ".env")
+sys.path.append(str(APP_PATH))
+
+from config.settings import settings
+from memory.milvus_manager import INDEX_TYPES, MilvusManager
+
+
+def parse_param(value: str) -> tuple[str, int]:
+    name, _, number = value.partition("=")
+    if not name or not number.isdigit():
+        raise argparse.ArgumentTypeError(f"expected NAME=INTEGER, got {value!r}")
+    return name, int(number)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("show", help="Print the index and load state of the collection")
+    create = commands.add_parser("create", help="Rebuild the vector index and load it")
+    create.add_argument(
+        "--index-type",
+        default=settings.MILVUS_INDEX_TYPE,
+        choices=INDEX_TYPES,
+    )
+    create.add_argument(
+        "--param",
+        type=parse_param,
+        action="append",
+        default=[],
+        help="Build parameter such as M=16, nlist=1024 or m=96 (defaults per index type)",
+    )
+    args = parser.parse_args()
+
+    milvus_manager = MilvusManager()
+    if args.command == "create":
+        milvus_manager.create_index(args.index_type, dict(args.param) or None)
+    index = milvus_manager.describe_index()
+    if index is None:
+        print(f"Collection {milvus_manager.collection_name} has no vector index")
+        return
+    load_state = milvus_manager.client.get_load_state(milvus_manager.collection_name)
+    print(json.dumps({**index, "load_state": str(load_state.get("state"))}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
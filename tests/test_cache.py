@@ -0,0 +1,118 @@
+import asyncio
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from core.embedding_cache import EmbeddingCache, SQLiteEmbeddingStore
+from utils.cache import CacheStats, LRUCache
+
+
+def test_cache_stats_hit_ratio():
+    stats = CacheStats(hits=3, misses=1)
+    assert stats.hit_ratio == 0.75
+    assert stats.as_dict() == {"hits": 3, "misses": 1, "evictions": 0, "hit_ratio": 0.75}
+    assert CacheStats().hit_ratio == 0.0
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(max_size=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert len(cache) == 2
+    assert cache.stats.evictions == 1
+    assert (cache.stats.hits, cache.stats.misses) == (3, 1)
+
+
+def test_lru_cache_expires_entries():
+    cache = LRUCache(max_size=2, ttl_seconds=0.01)
+    cache.set("a", 1)
+    time.sleep(0.02)
+
+    assert cache.get("a") is None
+    assert len(cache) == 0
+    assert cache.stats.evictions == 1
+
+
+def test_lru_cache_pop_and_clear():
+    cache = LRUCache(max_size=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+
+    assert cache.pop("a") == 1
+    assert cache.pop("a") is None
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_lru_cache_rejects_empty_size():
+    with pytest.raises(ValueError):
+        LRUCache(max_size=0)
+
+
+def test_embedding_cache_normalizes_keys_per_model():
+    cache = EmbeddingCache(model_name="model-a", max_size=10)
+    cache.set("What is  RAG?", [0.5, 0.25])
+
+    assert cache.get("what is rag?") == [0.5, 0.25]
+    assert EmbeddingCache(model_name="model-b", max_size=10).get("what is rag?") is None
+
+
+def test_embedding_cache_disk_tier_survives_restarts(tmp_path: Path):
+    path = str(tmp_path / "embeddings.sqlite3")
+    EmbeddingCache(model_name="m", max_size=10, path=path).set("query", [1.0, 2.0])
+
+    reopened = EmbeddingCache(model_name="m", max_size=10, path=path)
+    assert reopened.get("query") == [1.0, 2.0]
+    assert reopened.stats["disk"]["hits"] == 1
+
+
+def test_embedding_cache_async_paths_keep_sqlite_off_the_event_loop(tmp_path: Path):
+    path = str(tmp_path / "embeddings.sqlite3")
+    writer = EmbeddingCache(model_name="m", max_size=10, path=path)
+    reader = EmbeddingCache(model_name="m", max_size=10, path=path)
+    threads: set[str] = set()
+    for store in (writer.disk, reader.disk):
+        for name in ("get", "set"):
+            method = getattr(store, name)
+
+            def record(*args, method=method):
+                threads.add(threading.current_thread().name)
+                return method(*args)
+
+            setattr(store, name, record)
+
+    async def run():
+        writer.set_nowait("query", [1.0, 2.0])
+        writer.flush()
+        return await reader.aget_many(["query", "other"]), await reader.aget("query")
+
+    assert asyncio.run(run()) == ([[1.0, 2.0], None], [1.0, 2.0])
+    assert threads and all(name.startswith("embedding_cache") for name in threads)
+    # The second lookup is a memory hit promoted by the first.
+    assert reader.stats["disk"]["hits"] == 1
+    writer.close()
+    reader.close()
+
+
+def test_sqlite_store_prunes_expired_and_oldest_rows(tmp_path: Path):
+    path = str(tmp_path / "embeddings.sqlite3")
+    store = SQLiteEmbeddingStore(path, max_rows=3, prune_interval=5)
+    for index in range(5):
+        store.set(f"key{index}", np.full(2, index, dtype=np.float32))
+
+    assert store.get("key0") is None
+    assert store.get("key4") is not None
+    store.close()
+
+    expiring = SQLiteEmbeddingStore(path, ttl_seconds=0.01)
+    time.sleep(0.02)
+    assert expiring.prune() == 3
@@ -0,0 +1,92 @@
+import asyncio
+
+from agent.context_window import ContextWindow, estimate_tokens
+from config.state import SessionState
+
+
+class FakeLLM:
+    """Returns a fixed summary and records the prompts it was sent."""
+
+    def __init__(self, reply: str = "summary", fail: bool = False):
+        self.reply = reply
+        self.fail = fail
+        self.prompts: list[str] = []
+
+    async def ainvoke(self, messages):
+        self.prompts.append(messages[0].content)
+        if self.fail:
+            raise RuntimeError("LLM unavailable")
+        return self.reply
+
+
+def conversation(turns: int, words: int = 40) -> list[dict]:
+    text = " ".join(["word"] * words)
+    return [
+        {"role": role, "content": f"{role} {turn}: {text}"}
+        for turn in range(turns)
+        for role in ("user", "assistant")
+    ]
+
+
+def test_select_keeps_short_histories_whole():
+    state = SessionState(session_id="s", conversation_history=conversation(2))
+    selection = ContextWindow(FakeLLM(), token_budget=10_000).select(state)
+
+    assert selection.messages == state.conversation_history
+    assert selection.saved_tokens == 0
+
+
+def test_select_keeps_recent_turns_within_budget():
+    history = conversation(10)
+    per_message = estimate_tokens(history[0]["content"])
+    state = SessionState(session_id="s", conversation_history=history, summary="earlier")
+    window = ContextWindow(FakeLLM(), token_budget=5 * per_message)
+    selection = window.select(state)
+
+    assert selection.summary == "earlier"
+    assert selection.messages[0]["role"] == "user"
+    assert selection.messages == history[-len(selection.messages) :]
+    assert selection.used_tokens <= window.token_budget
+    assert selection.saved_tokens > 0
+
+
+def test_select_skips_summarized_messages():
+    history = conversation(4)
+    state = SessionState(
+        session_id="s", conversation_history=history, summary="first turns", summarized_count=4
+    )
+    selection = ContextWindow(FakeLLM(), token_budget=10_000).select(state)
+
+    assert selection.messages == history[4:]
+
+
+def test_refresh_summary_folds_overflowing_messages():
+    llm = FakeLLM(reply="folded summary")
+    history = conversation(10)
+    state = SessionState(session_id="s", conversation_history=history, message_count=20)
+    window = ContextWindow(llm, token_budget=6 * estimate_tokens(history[1]["content"]))
+    asyncio.run(window.refresh_summary(state))
+
+    assert state.summary == "folded summary"
+    assert 0 < state.summarized_count < len(history)
+    assert history[state.summarized_count]["role"] == "user"
+    assert "user 0:" in llm.prompts[0]
+
+
+def test_refresh_summary_skips_histories_within_budget():
+    llm = FakeLLM()
+    state = SessionState(session_id="s", conversation_history=conversation(2))
+    asyncio.run(ContextWindow(llm, token_budget=10_000).refresh_summary(state))
+
+    assert llm.prompts == []
+    assert state.summarized_count == 0
+
+
+def test_refresh_summary_keeps_previous_summary_on_failure():
+    history = conversation(10)
+    state = SessionState(session_id="s", conversation_history=history, summary="old")
+    window = ContextWindow(FakeLLM(fail=True), token_budget=estimate_tokens(history[0]["content"]))
+    asyncio.run(window.refresh_summary(state))
+
+    assert state.summary == "old"
+    assert state.summarized_count == 0
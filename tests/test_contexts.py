@@ -0,0 +1,54 @@
+from agent.contexts import chunk_refs, merge_refs, render_contexts
+
+
+def hit(hit_id: int, text: str, page: int = 1) -> dict:
+    return {
+        "id": hit_id,
+        "distance": 0.5,
+        "entity": {
+            "text_content": text,
+            "page_number": page,
+            "source": "thesis.pdf",
+            "chunk_hash": f"hash{hit_id}",
+        },
+    }
+
+
+def test_render_contexts_numbers_passages_with_pages():
+    rendered = render_contexts([hit(1, "First passage", page=3), hit(2, "Second passage")])
+
+    assert rendered == "[1] (page 3)\nFirst passage\n\n[2] (page 1)\nSecond passage"
+
+
+def test_render_contexts_drops_repeated_ids_and_texts():
+    hits = [hit(1, "Same  text"), hit(1, "Other"), hit(2, "same text"), hit(3, "New")]
+
+    assert render_contexts(hits) == "[1] (page 1)\nSame  text\n\n[2] (page 1)\nNew"
+
+
+def test_render_contexts_truncates_long_passages():
+    rendered = render_contexts([hit(1, "abcdef  ghij")], max_chars=8)
+
+    assert rendered.endswith("\nabcdef…")
+
+
+def test_render_contexts_without_hits():
+    assert render_contexts([]) == "No relevant passages found."
+
+
+def test_chunk_refs_keep_rank_order_and_stable_keys():
+    refs = chunk_refs([hit(2, "b", page=5), hit(1, "a"), hit(2, "b", page=5)])
+
+    assert refs == [
+        {"chunk_id": 2, "page_number": 5, "source": "thesis.pdf", "chunk_hash": "hash2"},
+        {"chunk_id": 1, "page_number": 1, "source": "thesis.pdf", "chunk_hash": "hash1"},
+    ]
+
+
+def test_merge_refs_keeps_first_occurrence():
+    first = chunk_refs([hit(1, "a"), hit(2, "b")])
+    second = chunk_refs([hit(2, "b", page=9), hit(3, "c")])
+
+    merged = merge_refs(first, second)
+    assert [ref["chunk_id"] for ref in merged] == [1, 2, 3]
+    assert merged[1]["page_number"] == 1
@@ -0,0 +1,99 @@
+import asyncio
+
+import pytest
+
+from core.embedder import EmbeddingBatcher
+
+
+class FakeBackend:
+    """Embeds each text as [len(text)] after a short delay, recording every batch."""
+
+    def __init__(self, fail: bool = False, drop_last: bool = False, delay: float = 0.01):
+        self.fail = fail
+        self.drop_last = drop_last
+        self.delay = delay
+        self.batches: list[list[str]] = []
+
+    async def __call__(self, texts: list[str]) -> list[list[float]]:
+        self.batches.append(texts)
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("backend down")
+        vectors = [[float(len(text))] for text in texts]
+        return vectors[:-1] if self.drop_last else vectors
+
+
+def test_batcher_coalesces_and_deduplicates():
+    backend = FakeBackend()
+    batcher = EmbeddingBatcher(backend, max_batch_size=10, max_wait_seconds=0.01)
+
+    async def run():
+        return await asyncio.gather(*(batcher.embed(text) for text in ["a", "bb", "a", "a"]))
+
+    assert asyncio.run(run()) == [[1.0], [2.0], [1.0], [1.0]]
+    assert backend.batches == [["a", "bb"]]
+    assert (batcher.requests, batcher.batches, batcher.deduplicated) == (4, 1, 2)
+
+
+def test_batcher_flushes_full_batches_immediately():
+    backend = FakeBackend()
+    batcher = EmbeddingBatcher(backend, max_batch_size=2, max_wait_seconds=10)
+
+    async def run():
+        texts = ["a", "bb", "ccc", "dddd"]
+        return await asyncio.gather(*(batcher.embed(text) for text in texts))
+
+    assert asyncio.run(asyncio.wait_for(run(), timeout=5)) == [[1.0], [2.0], [3.0], [4.0]]
+    assert backend.batches == [["a", "bb"], ["ccc", "dddd"]]
+
+
+def test_batcher_shares_in_flight_results():
+    backend = FakeBackend(delay=0.05)
+    batcher = EmbeddingBatcher(backend, max_batch_size=10, max_wait_seconds=0.001)
+
+    async def run():
+        first = asyncio.ensure_future(batcher.embed("a"))
+        await asyncio.sleep(0.02)
+        return await asyncio.gather(first, batcher.embed("a"))
+
+    assert asyncio.run(run()) == [[1.0], [1.0]]
+    assert backend.batches == [["a"]]
+
+
+def test_batcher_fails_every_caller_of_a_failed_batch():
+    batcher = EmbeddingBatcher(FakeBackend(fail=True), max_wait_seconds=0.001)
+
+    async def run():
+        return await asyncio.gather(
+            batcher.embed("a"), batcher.embed("b"), return_exceptions=True
+        )
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert not batcher._in_flight
+
+
+def test_batcher_rejects_short_results():
+    batcher = EmbeddingBatcher(FakeBackend(drop_last=True), max_wait_seconds=0.001)
+
+    async def run():
+        return await asyncio.gather(
+            batcher.embed("a"), batcher.embed("b"), return_exceptions=True
+        )
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+def test_batcher_fails_callers_when_the_batch_is_cancelled():
+    batcher = EmbeddingBatcher(FakeBackend(delay=1), max_wait_seconds=0.001)
+
+    async def run():
+        caller = asyncio.ensure_future(batcher.embed("a"))
+        await asyncio.sleep(0.05)
+        for task in batcher._tasks:
+            task.cancel()
+        return await asyncio.wait_for(caller, timeout=5)
+
+    with pytest.raises(RuntimeError, match="cancelled"):
+        asyncio.run(run())
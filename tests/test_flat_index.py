@@ -0,0 +1,135 @@
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from memory.flat_index import FlatIndexClient
+from memory.milvus_manager import MilvusManager
+
+DIM = 8
+
+
+def unit(index: int) -> list[float]:
+    vector = np.zeros(DIM, dtype=np.float32)
+    vector[index % DIM] = 1.0
+    return vector.tolist()
+
+
+def rows(count: int, start: int = 0) -> list[dict]:
+    return [
+        {
+            "vector": unit(start + i),
+            "text_content": f"chunk {start + i}",
+            "page_number": start + i,
+            "source": "thesis.pdf",
+            "chunk_hash": f"hash{start + i}",
+        }
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def manager(tmp_path: Path) -> MilvusManager:
+    manager = MilvusManager(client=FlatIndexClient(tmp_path))
+    manager.vector_type = "float"
+    manager.rescore_oversample = None
+    manager.create_collection(dim=DIM)
+    return manager
+
+
+def test_insert_and_search(manager: MilvusManager):
+    assert manager.insert_batch(rows(4)) == 4
+
+    (hits,) = manager.search_by_vector(unit(2), limit=2)
+    assert hits[0]["entity"]["text_content"] == "chunk 2"
+    assert hits[0]["distance"] == pytest.approx(1.0)
+    assert hits[1]["distance"] == pytest.approx(0.0)
+    assert set(hits[0]["entity"]) == {"text_content", "page_number", "source", "chunk_hash"}
+
+
+def test_search_many_queries_at_once(manager: MilvusManager):
+    manager.insert_batch(rows(4))
+
+    results = manager.search_by_vectors([unit(0), unit(3)], limit=1)
+    assert [hits[0]["entity"]["page_number"] for hits in results] == [0, 3]
+
+
+def test_delete_hides_rows(manager: MilvusManager):
+    manager.insert_batch(rows(4))
+    (hit,) = manager.search_by_vector(unit(1), limit=1)[0]
+
+    assert manager.delete_ids([hit["id"]]) == 1
+    assert manager.delete_ids([hit["id"]]) == 0
+    ids = [hit["id"] for hit in manager.search_by_vector(unit(1), limit=4)[0]]
+    assert hit["id"] not in ids
+    assert len(ids) == 3
+    assert manager.get_chunks([hit["id"]]) == {}
+
+
+def test_compaction_keeps_ids_and_survives_reload(manager: MilvusManager, tmp_path: Path):
+    manager.insert_batch(rows(4))
+    ids = [row["id"] for row in manager.iter_rows(["id"])]
+    manager.delete_ids(ids[:3])
+    files = tmp_path / manager.collection_name
+    assert len((files / "rows.jsonl").read_text().splitlines()) == 1
+
+    manager.insert_batch(rows(1, start=4))
+    reopened = MilvusManager(client=FlatIndexClient(tmp_path))
+    stored = {row["id"]: row["page_number"] for row in reopened.iter_rows(["page_number"])}
+    assert stored[ids[3]] == 3
+    assert len(stored) == 2
+    assert max(stored) > max(ids)
+
+
+def test_writes_from_another_client_are_visible(manager: MilvusManager, tmp_path: Path):
+    manager.insert_batch(rows(2))
+    other = MilvusManager(client=FlatIndexClient(tmp_path))
+    assert len(other.search_by_vector(unit(0), limit=10)[0]) == 2
+
+    manager.insert_batch(rows(2, start=2))
+    assert len(other.search_by_vector(unit(0), limit=10)[0]) == 4
+
+
+def test_find_chunks_by_source_and_hash(manager: MilvusManager):
+    manager.insert_batch(rows(3))
+
+    found = manager.find_chunks([("thesis.pdf", "hash1"), ("thesis.pdf", "missing")])
+    assert list(found) == [("thesis.pdf", "hash1")]
+    assert found[("thesis.pdf", "hash1")]["text_content"] == "chunk 1"
+
+
+def test_float32_search_reads_the_memory_map_without_copying(tmp_path: Path):
+    manager = MilvusManager(client=FlatIndexClient(tmp_path))
+    manager.vector_type = "float"
+    manager.rescore_oversample = None
+    manager.create_collection(dim=256)
+    vectors = np.random.default_rng(0).standard_normal((20_000, 256)).astype(np.float32)
+    for start in range(0, len(vectors), 5000):
+        batch = vectors[start : start + 5000].tolist()
+        manager.insert_batch([{**row, "vector": vector} for row, vector in zip(rows(5000), batch)])
+    manager.search_by_vector(vectors[0].tolist(), limit=5)
+
+    tracemalloc.start()
+    try:
+        (hits,) = manager.search_by_vector(vectors[0].tolist(), limit=5)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    assert hits[0]["distance"] == pytest.approx(1.0, abs=1e-5)
+    # The stored matrix is 20 MB; scores and masks for one query are well under 1 MB.
+    assert peak < 2**20
+
+
+def test_float16_search_scores_in_blocks(tmp_path: Path):
+    manager = MilvusManager(client=FlatIndexClient(tmp_path))
+    manager.vector_type = "float16"
+    manager.rescore_oversample = None
+    manager.create_collection(dim=DIM)
+    manager.insert_batch(rows(8))
+    collection = manager.client._collection(manager.collection_name)
+    collection.score_block_rows = 3
+
+    results = manager.search_by_vectors([unit(5), unit(6)], limit=1)
+    assert [hits[0]["entity"]["page_number"] for hits in results] == [5, 6]
+    assert results[0][0]["distance"] == pytest.approx(1.0)
@@ -0,0 +1,95 @@
+from pathlib import Path
+from unittest.mock import patch
+
+from core.ingestion import (
+    Chunk,
+    ChunkBatch,
+    ChunkManifest,
+    IngestionReport,
+    ingest_documents,
+    source_name,
+)
+from memory.flat_index import FlatIndexClient
+from memory.milvus_manager import MilvusManager
+
+
+def stored(row_id: int, chunk: Chunk, page_number: int | None = None) -> dict:
+    return {
+        "id": row_id,
+        "source": chunk.source,
+        "chunk_hash": chunk.content_hash,
+        "page_number": chunk.page_number if page_number is None else page_number,
+    }
+
+
+def test_manifest_leaves_unchanged_chunks_alone():
+    chunk = Chunk(source="a.pdf", page_number=1, text="same text")
+    manifest = ChunkManifest([stored(10, chunk)])
+
+    assert manifest.match(chunk) == (True, None)
+    assert manifest.orphan_ids() == []
+
+
+def test_manifest_reuses_vectors_of_moved_chunks():
+    chunk = Chunk(source="a.pdf", page_number=2, text="moved text")
+    manifest = ChunkManifest([stored(10, chunk, page_number=1)])
+
+    assert manifest.match(chunk) == (False, 10)
+    # A stored row is claimed once; a second copy of the chunk needs a new embedding.
+    assert manifest.match(chunk) == (False, None)
+
+
+def test_manifest_keys_by_source():
+    chunk = Chunk(source="a.pdf", page_number=1, text="shared text")
+    other = Chunk(source="b.pdf", page_number=1, text="shared text")
+    manifest = ChunkManifest([stored(10, chunk)])
+
+    assert manifest.match(other) == (False, None)
+    assert manifest.orphan_ids() == [10]
+
+
+def test_manifest_reports_unmatched_rows_as_orphans():
+    kept = Chunk(source="a.pdf", page_number=1, text="kept")
+    removed = Chunk(source="a.pdf", page_number=2, text="removed")
+    manifest = ChunkManifest([stored(10, kept), stored(11, removed)])
+    manifest.match(kept)
+
+    assert manifest.orphan_ids() == [11]
+
+
+def test_source_name_is_relative_to_the_root(tmp_path: Path):
+    first = tmp_path / "2023" / "thesis.pdf"
+    second = tmp_path / "2024" / "thesis.pdf"
+
+    assert source_name(first, tmp_path) == "2023/thesis.pdf"
+    assert source_name(second, tmp_path) != source_name(first, tmp_path)
+    assert source_name(first, tmp_path / "elsewhere") == first.resolve().as_posix()
+
+
+class FakeEmbeddingClient:
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return [[float(len(text)), 1.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0] for text in texts]
+
+
+def ingest(manager: MilvusManager, path: Path, pages: list[str]) -> IngestionReport:
+    chunks = [
+        Chunk(source=path.name, page_number=number, text=text)
+        for number, text in enumerate(pages, start=1)
+    ]
+    with patch("core.ingestion.iter_chunk_batches", return_value=[ChunkBatch(len(pages), chunks)]):
+        return ingest_documents(
+            [path], FakeEmbeddingClient(), manager, workers=1, root=path.parent  # type: ignore
+        )
+
+
+def test_reingesting_a_document_does_not_duplicate_it(tmp_path: Path):
+    manager = MilvusManager(client=FlatIndexClient(tmp_path / "index"))
+    manager.create_collection(dim=8)
+    document = tmp_path / "thesis.pdf"
+
+    ingest(manager, document, ["intro", "method"])
+    report = ingest(manager, document, ["intro", "method", "results"])
+
+    assert (report.unchanged, report.embedded, report.deleted) == (2, 1, 0)
+    rows = manager.iter_rows(output_fields=["text_content"])
+    assert sorted(row["text_content"] for row in rows) == ["intro", "method", "results"]
@@ -0,0 +1,72 @@
+import asyncio
+import json
+from uuid import uuid4
+
+import psycopg
+import pytest
+from psycopg import AsyncConnection
+
+from memory import migrations
+from memory.postgres import get_postgres_connection_string
+
+
+@pytest.fixture
+def schema():
+    """A throwaway schema in the configured Postgres; skipped when none is reachable."""
+    name = f"test_{uuid4().hex[:12]}"
+    try:
+        conn = psycopg.connect(get_postgres_connection_string(), autocommit=True, connect_timeout=2)
+    except psycopg.OperationalError as e:
+        pytest.skip(f"Postgres is not reachable: {e}")
+    with conn:
+        conn.execute(f"CREATE SCHEMA {name}")
+        try:
+            yield name
+        finally:
+            conn.execute(f"DROP SCHEMA {name} CASCADE")
+
+
+async def migrate(schema: str, monkeypatch, up_to: int | None = None) -> list[dict]:
+    if up_to is not None:
+        pending = [m for m in migrations.MIGRATIONS if m.version <= up_to]
+        monkeypatch.setattr(migrations, "MIGRATIONS", pending)
+    conn = await AsyncConnection.connect(
+        get_postgres_connection_string(), autocommit=True, options=f"-c search_path={schema}"
+    )
+    async with conn:
+        await migrations.run_migrations(conn)
+        if up_to == 1:
+            # Session rows as the pre-migration code wrote them: an array and an encoded string.
+            history = [{"role": "user", "content": "hi"}, {"role": "assistant", "content": "hey"}]
+            await conn.execute(
+                "INSERT INTO session_state (session_id, conversation_history) VALUES "
+                "('array', %s::jsonb), ('string', to_jsonb(%s::text)), ('empty', NULL)",
+                (json.dumps(history), json.dumps(history)),
+            )
+            return []
+        cursor = await conn.execute(
+            "SELECT s.session_id, s.message_count, m.seq, m.role, m.content "
+            "FROM session_state s LEFT JOIN session_messages m USING (session_id) "
+            "ORDER BY s.session_id, m.seq"
+        )
+        columns = [column.name for column in cursor.description or []]
+        return [dict(zip(columns, row)) for row in await cursor.fetchall()]
+
+
+def test_migration_2_backfills_session_messages(schema, monkeypatch):
+    asyncio.run(migrate(schema, monkeypatch, up_to=1))
+    monkeypatch.undo()
+    rows = asyncio.run(migrate(schema, monkeypatch))
+
+    by_session: dict[str, list[dict]] = {}
+    for row in rows:
+        by_session.setdefault(row["session_id"], []).append(row)
+    for session_id in ("array", "string"):
+        assert [(r["seq"], r["role"], r["content"]) for r in by_session[session_id]] == [
+            (0, "user", "hi"),
+            (1, "assistant", "hey"),
+        ]
+        assert by_session[session_id][0]["message_count"] == 2
+    assert by_session["empty"] == [
+        {"session_id": "empty", "message_count": 0, "seq": None, "role": None, "content": None}
+    ]
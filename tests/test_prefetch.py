@@ -0,0 +1,68 @@
+import asyncio
+
+from agent.prefetch import RetrievalPrefetcher
+
+HITS = [{"id": 1, "distance": 0.9, "entity": {"text_content": "passage"}}]
+
+
+class FakeEmbedder:
+    async def aembed_queries(self, queries: list[str]) -> list[list[float]]:
+        vectors = {"what is rag": [1.0, 0.0], "explain rag": [0.95, 0.3], "bm25": [0.0, 1.0]}
+        return [vectors[query] for query in queries]
+
+
+async def search() -> list[dict]:
+    await asyncio.sleep(0.01)
+    return HITS
+
+
+async def claim(prefetcher: RetrievalPrefetcher, prefetched: str, queries: list[str]):
+    task = asyncio.ensure_future(search())
+    with prefetcher.prefetching(prefetched, task):
+        hits = await prefetcher.claim(queries)
+    await asyncio.sleep(0)
+    return hits, task
+
+
+def test_claim_reuses_a_matching_prefetch():
+    prefetcher = RetrievalPrefetcher(FakeEmbedder())  # type: ignore[arg-type]
+    hits, task = asyncio.run(claim(prefetcher, "What is RAG?", ["what is rag"]))
+
+    assert hits == HITS
+    assert not task.cancelled()
+    assert (prefetcher.stats.hits, prefetcher.stats.misses, prefetcher.stats.evictions) == (1, 0, 0)
+
+
+def test_claim_misses_and_discards_a_different_question():
+    prefetcher = RetrievalPrefetcher(FakeEmbedder())  # type: ignore[arg-type]
+    hits, task = asyncio.run(claim(prefetcher, "what is rag", ["explain rag"]))
+
+    assert hits is None
+    assert task.cancelled()
+    assert (prefetcher.stats.hits, prefetcher.stats.misses, prefetcher.stats.evictions) == (0, 1, 1)
+
+
+def test_multi_query_calls_never_claim():
+    prefetcher = RetrievalPrefetcher(FakeEmbedder())  # type: ignore[arg-type]
+    hits, _ = asyncio.run(claim(prefetcher, "what is rag", ["what is rag", "bm25"]))
+
+    assert hits is None
+
+
+def test_similarity_mode_claims_close_questions():
+    prefetcher = RetrievalPrefetcher(
+        FakeEmbedder(), match="similarity", threshold=0.9  # type: ignore[arg-type]
+    )
+
+    close, _ = asyncio.run(claim(prefetcher, "what is rag", ["explain rag"]))
+    far, _ = asyncio.run(claim(prefetcher, "what is rag", ["bm25"]))
+
+    assert close == HITS
+    assert far is None
+
+
+def test_claim_outside_a_prefetch_returns_none():
+    prefetcher = RetrievalPrefetcher(FakeEmbedder())  # type: ignore[arg-type]
+
+    assert asyncio.run(prefetcher.claim(["what is rag"])) is None
+    assert prefetcher.stats.misses == 0
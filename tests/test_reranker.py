@@ -0,0 +1,68 @@
+import asyncio
+import time
+
+from core.reranker import CrossEncoderReranker
+
+
+class FakeCrossEncoder:
+    """Scores a passage by its length, after an optional delay."""
+
+    def __init__(self, delay: float = 0.0, fail: bool = False):
+        self.delay = delay
+        self.fail = fail
+
+    def predict(self, pairs, **kwargs) -> list[float]:
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("model crashed")
+        return [float(len(text)) for _, text in pairs]
+
+
+def hits(*texts: str) -> list[dict]:
+    return [{"id": index, "entity": {"text_content": text}} for index, text in enumerate(texts)]
+
+
+def make_reranker(delay: float = 0.0, timeout: float | None = 1.0) -> CrossEncoderReranker:
+    reranker = CrossEncoderReranker("fake", timeout_seconds=timeout)
+    reranker._model = FakeCrossEncoder(delay)
+    return reranker
+
+
+def test_rerank_orders_hits_by_score():
+    reranker = make_reranker()
+    ranked = reranker.rerank("q", hits("a", "ccc", "bb"), top_k=2)
+
+    assert [hit["entity"]["text_content"] for hit in ranked] == ["ccc", "bb"]
+    assert reranker.stats.hits == 1
+
+
+def test_rerank_keeps_the_original_order_on_timeout():
+    reranker = make_reranker(delay=0.3, timeout=0.05)
+    ranked = reranker.rerank("q", hits("a", "ccc", "bb"), top_k=2)
+
+    assert [hit["entity"]["text_content"] for hit in ranked] == ["a", "ccc"]
+    assert reranker.stats.misses == 1
+
+
+def test_arerank_keeps_the_original_order_on_timeout():
+    reranker = make_reranker(delay=0.3, timeout=0.05)
+    ranked = asyncio.run(reranker.arerank("q", hits("a", "ccc", "bb"), top_k=2))
+
+    assert [hit["entity"]["text_content"] for hit in ranked] == ["a", "ccc"]
+    assert reranker.stats.misses == 1
+
+
+def test_rerank_keeps_the_original_order_on_errors():
+    reranker = make_reranker()
+    reranker._model = FakeCrossEncoder(fail=True)
+
+    ranked = reranker.rerank("q", hits("a", "ccc"), top_k=1)
+    assert [hit["entity"]["text_content"] for hit in ranked] == ["a"]
+    assert reranker.stats.misses == 1
+
+
+def test_multi_query_rerank_keeps_each_passage_best_score():
+    reranker = make_reranker()
+    scores = reranker.score(["q1", "q2"], ["a", "bbb"])
+
+    assert scores == [1.0, 3.0]
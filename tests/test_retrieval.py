@@ -0,0 +1,50 @@
+from agent.rag_agent import reciprocal_rank_fusion
+from memory.lexical_index import BM25Index, tokenize
+
+ROWS = [
+    {"id": 1, "text_content": "Milvus stores dense vectors", "page_number": 1},
+    {"id": 2, "text_content": "BM25 ranks passages by term frequency", "page_number": 2},
+    {"id": 3, "text_content": "Dense retrieval and BM25 retrieval can be fused", "page_number": 3},
+]
+
+
+def hit(hit_id: int) -> dict:
+    return {"id": hit_id, "distance": 0.0, "entity": {"text_content": f"passage {hit_id}"}}
+
+
+def test_tokenize_folds_case_and_punctuation():
+    assert tokenize("Hybrid, BM25-style search!") == ["hybrid", "bm25", "style", "search"]
+
+
+def test_bm25_ranks_matching_passages():
+    index = BM25Index(ROWS)
+    hits = index.search("bm25 term frequency", limit=5)
+
+    assert [hit["id"] for hit in hits] == [2, 3]
+    assert hits[0]["distance"] > hits[1]["distance"]
+    assert hits[0]["entity"]["text_content"] == ROWS[1]["text_content"]
+    assert hits[0]["entity"]["page_number"] == 2
+
+
+def test_bm25_respects_limit_and_misses():
+    index = BM25Index(ROWS)
+
+    assert len(index.search("dense bm25", limit=1)) == 1
+    assert index.search("unrelated words", limit=5) == []
+    assert BM25Index([]).search("anything", limit=5) == []
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    dense = [hit(1), hit(2), hit(3)]
+    sparse = [hit(3), hit(4)]
+    fused = reciprocal_rank_fusion([dense, sparse])
+
+    # 3 is in both lists; 2 and 4 tie at rank 2 and keep the order they were first seen in.
+    assert [hit["id"] for hit in fused] == [3, 1, 2, 4]
+
+
+def test_reciprocal_rank_fusion_keeps_first_hit_per_id():
+    first = {"id": 1, "distance": 0.9, "entity": {"text_content": "dense"}}
+    second = {"id": 1, "distance": 7.0, "entity": {"text_content": "sparse"}}
+
+    assert reciprocal_rank_fusion([[first], [second]]) == [first]
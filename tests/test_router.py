@@ -0,0 +1,87 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from agent.router import QueryRouter
+
+
+class FakeMilvusManager:
+    def __init__(self, vectors: list[list[float]]):
+        self.vectors = vectors
+        self.version = "1"
+        self.scans = 0
+        self.executor = ThreadPoolExecutor(max_workers=1)
+
+    async def acollection_version(self) -> str:
+        return self.version
+
+    def iter_rows(self, output_fields: list[str]):
+        self.scans += 1
+        for index, vector in enumerate(self.vectors):
+            yield {"id": index, "vector": vector}
+
+    def decode_vector(self, value) -> np.ndarray:
+        return np.asarray(value, dtype=np.float32)
+
+
+class FakeEmbedder:
+    def __init__(self, vectors: dict[str, list[float]]):
+        self.vectors = vectors
+        self.calls = 0
+
+    async def aembed_query(self, question: str) -> list[float]:
+        self.calls += 1
+        return self.vectors[question]
+
+
+QUESTIONS = {"on topic": [1.0, 0.1], "off topic": [0.0, 1.0]}
+
+
+def make_router(vectors: list[list[float]], keywords=None):
+    manager = FakeMilvusManager(vectors)
+    embedder = FakeEmbedder(QUESTIONS)
+    router = QueryRouter(manager, embedder, threshold=0.8, keywords=keywords)  # type: ignore
+    return router, manager, embedder
+
+
+def test_keywords_route_to_retrieval_without_embedding():
+    router, _, embedder = make_router([[1.0, 0.0]], keywords=["Thesis"])
+    decision = asyncio.run(router.route("What does the thesis conclude?"))
+
+    assert (decision.route, decision.reason) == ("retrieve", "keyword")
+    assert embedder.calls == 0
+
+
+def test_centroid_similarity_picks_the_route():
+    router, _, _ = make_router([[1.0, 0.0], [0.9, 0.1]])
+
+    async def run():
+        return await router.route("on topic"), await router.route("off topic")
+
+    on_topic, off_topic = asyncio.run(run())
+    assert (on_topic.route, on_topic.reason) == ("retrieve", "centroid")
+    assert on_topic.score is not None and on_topic.score >= 0.8
+    assert (off_topic.route, off_topic.reason) == ("agent", "centroid")
+
+
+def test_empty_collection_routes_to_the_agent():
+    router, _, _ = make_router([])
+    decision = asyncio.run(router.route("on topic"))
+
+    assert (decision.route, decision.reason) == ("agent", "no_centroid")
+
+
+def test_centroid_is_rebuilt_only_when_the_collection_changes():
+    router, manager, _ = make_router([[1.0, 0.0]])
+
+    async def run():
+        await router.route("on topic")
+        await router.route("on topic")
+        manager.version = "2"
+        manager.vectors = [[0.0, 1.0]]
+        return await router.route("on topic")
+
+    decision = asyncio.run(run())
+    assert manager.scans == 2
+    assert decision.route == "agent"
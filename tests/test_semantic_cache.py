@@ -0,0 +1,99 @@
+import asyncio
+import time
+
+from agent.semantic_cache import SemanticAnswerCache
+
+VECTORS = {
+    "what is rag": [1.0, 0.0, 0.0],
+    "what is rag exactly": [0.99, 0.14, 0.0],
+    "what is bm25": [0.0, 1.0, 0.0],
+    "how does bm25 work": [0.1, 0.99, 0.0],
+}
+CONTEXTS = [{"chunk_id": 1, "page_number": 1}]
+
+
+class FakeEmbedder:
+    async def aembed_query(self, question: str) -> list[float]:
+        return VECTORS[question]
+
+
+class FakeMilvusManager:
+    def __init__(self):
+        self.version = "1"
+
+    async def acollection_version(self) -> str:
+        return self.version
+
+
+def make_cache(**kwargs) -> tuple[SemanticAnswerCache, FakeMilvusManager]:
+    manager = FakeMilvusManager()
+    options = {"threshold": 0.95, "max_size": 4, **kwargs}
+    cache = SemanticAnswerCache(FakeEmbedder(), manager, **options)  # type: ignore[arg-type]
+    return cache, manager
+
+
+def test_lookup_hits_above_the_threshold_only():
+    cache, _ = make_cache()
+
+    async def run():
+        await cache.store("what is rag", "RAG answer", CONTEXTS)
+        return await cache.lookup("what is rag exactly"), await cache.lookup("what is bm25")
+
+    hit, miss = asyncio.run(run())
+    assert hit is not None and hit.response == "RAG answer"
+    assert miss is None
+    assert (cache.stats.hits, cache.stats.misses) == (1, 1)
+
+
+def test_answers_without_contexts_are_not_stored():
+    cache, _ = make_cache()
+
+    async def run():
+        await cache.store("what is rag", "ungrounded", [])
+        return await cache.lookup("what is rag")
+
+    assert asyncio.run(run()) is None
+
+
+def test_expired_entries_do_not_shadow_valid_ones():
+    cache, _ = make_cache(threshold=0.5, ttl_seconds=60)
+
+    async def run():
+        await cache.store("what is bm25", "BM25 answer", CONTEXTS)
+        await cache.store("what is rag", "RAG answer", CONTEXTS)
+        # Age the closest entry past the TTL.
+        for entry in cache._entries.values():
+            if entry.question == "what is bm25":
+                entry.stored_at = time.time() - 120
+        return await cache.lookup("how does bm25 work")
+
+    assert asyncio.run(run()) is None
+    assert len(cache._entries) == 1
+    assert cache.stats.evictions == 1
+
+
+def test_collection_version_change_drops_every_answer():
+    cache, manager = make_cache()
+
+    async def run():
+        await cache.store("what is rag", "RAG answer", CONTEXTS)
+        manager.version = "2"
+        return await cache.lookup("what is rag")
+
+    assert asyncio.run(run()) is None
+    assert cache.stats.evictions == 1
+
+
+def test_full_cache_evicts_the_least_recently_used_answer():
+    cache, _ = make_cache(max_size=2)
+
+    async def run():
+        await cache.store("what is rag", "RAG answer", CONTEXTS)
+        await cache.store("what is bm25", "BM25 answer", CONTEXTS)
+        await cache.lookup("what is rag")
+        await cache.store("how does bm25 work", "BM25 details", CONTEXTS)
+        return await cache.lookup("what is rag"), await cache.lookup("what is bm25")
+
+    rag, bm25 = asyncio.run(run())
+    assert rag is not None and rag.response == "RAG answer"
+    assert bm25 is not None and bm25.response == "BM25 details"
@@ -0,0 +1,173 @@
+import asyncio
+
+import pytest
+
+from config.state import SessionState
+from memory.session_cache import SessionStateCache
+
+
+class FakeStore:
+    """PostgresClient stand-in with the same version check on message_count."""
+
+    def __init__(self):
+        self.histories: dict[str, list[dict]] = {}
+        self.get_calls = 0
+        self.write_calls = 0
+        self.fail_next = False
+        self.lose_next_ack = False
+
+    def append(self, session_id: str, messages: list[dict]) -> None:
+        """Messages written by another worker."""
+        self.histories.setdefault(session_id, []).extend(messages)
+
+    async def get_state(self, session_id: str, history_limit: int | None = None):
+        self.get_calls += 1
+        if session_id not in self.histories:
+            return None
+        history = list(self.histories[session_id])
+        return SessionState(
+            session_id=session_id, conversation_history=history, message_count=len(history)
+        )
+
+    async def add_states(self, states: list[SessionState]) -> list[str]:
+        self.write_calls += 1
+        if self.fail_next:
+            self.fail_next = False
+            return ["failed"] * len(states)
+        outcomes = []
+        for state in states:
+            history = self.histories.setdefault(state.session_id, [])
+            if len(history) != state.message_count:
+                outcomes.append("stale")
+                continue
+            new = state.conversation_history[state.message_count - state.history_offset :]
+            history.extend(new)
+            if self.lose_next_ack:
+                # Committed, but the caller never hears about it.
+                self.lose_next_ack = False
+                outcomes.append("failed")
+                continue
+            state.message_count += len(new)
+            outcomes.append("written")
+        return outcomes
+
+    async def update_summary(self, session_id: str, summary: str, summarized_count: int) -> None:
+        pass
+
+
+def turn(state: SessionState, question: str) -> SessionState:
+    """Append one user/assistant exchange, as a request would."""
+    state.user_input = question
+    state.conversation_history = state.conversation_history + [
+        {"role": "user", "content": question},
+        {"role": "assistant", "content": f"answer to {question}"},
+    ]
+    return state
+
+
+async def chat(cache: SessionStateCache, session_id: str, question: str) -> None:
+    state = await cache.get_state(session_id) or SessionState(session_id=session_id)
+    await cache.add_state(turn(state, question))
+
+
+def contents(store: FakeStore, session_id: str) -> list[str]:
+    return [message["content"] for message in store.histories[session_id]]
+
+
+def test_write_through_persists_every_turn_and_reads_from_memory():
+    store = FakeStore()
+    cache = SessionStateCache(store, max_sessions=10)
+
+    async def run():
+        await chat(cache, "s", "q1")
+        await chat(cache, "s", "q2")
+
+    asyncio.run(run())
+    assert contents(store, "s") == ["q1", "answer to q1", "q2", "answer to q2"]
+    assert store.get_calls == 1
+    assert store.write_calls == 2
+    assert cache.stats["pending_writes"] == 0
+
+
+def test_write_behind_batches_until_flush():
+    store = FakeStore()
+    cache = SessionStateCache(store, max_sessions=10, write_mode="write_behind")
+
+    async def run():
+        await chat(cache, "a", "q1")
+        await chat(cache, "b", "q1")
+        await chat(cache, "a", "q2")
+        assert store.histories == {}
+        assert cache.stats["pending_writes"] == 2
+        await cache.close()
+
+    asyncio.run(run())
+    assert contents(store, "a") == ["q1", "answer to q1", "q2", "answer to q2"]
+    assert contents(store, "b") == ["q1", "answer to q1"]
+    assert store.write_calls == 1
+    assert cache.stats["pending_writes"] == 0
+
+
+def test_conflict_replays_unsaved_messages_after_the_other_writer():
+    store = FakeStore()
+    cache = SessionStateCache(store, max_sessions=10, write_mode="write_behind")
+
+    async def run():
+        await chat(cache, "s", "q1")
+        await cache.flush()
+        await chat(cache, "s", "q2")
+        store.append("s", [{"role": "user", "content": "other"}])
+        await cache.close()
+
+    asyncio.run(run())
+    assert contents(store, "s") == ["q1", "answer to q1", "other", "q2", "answer to q2"]
+    assert cache.conflicts == 1
+
+
+def test_lost_acknowledgement_is_not_written_twice():
+    store = FakeStore()
+    cache = SessionStateCache(store, max_sessions=10, write_mode="write_behind")
+
+    async def run():
+        await chat(cache, "s", "q1")
+        store.lose_next_ack = True
+        await cache.flush()
+        await cache.close()
+        await chat(cache, "s", "q2")
+        await cache.close()
+
+    asyncio.run(run())
+    assert contents(store, "s") == ["q1", "answer to q1", "q2", "answer to q2"]
+    assert cache.conflicts == 1
+
+
+def test_failed_flush_keeps_sessions_dirty_for_a_retry():
+    store = FakeStore()
+    cache = SessionStateCache(store, max_sessions=10, write_mode="write_behind")
+
+    async def run():
+        await chat(cache, "s", "q1")
+        store.fail_next = True
+        await cache.flush()
+        assert cache.stats["pending_writes"] == 1
+        await cache.close()
+
+    asyncio.run(run())
+    assert contents(store, "s") == ["q1", "answer to q1"]
+
+
+def test_write_through_failure_forgets_the_session():
+    store = FakeStore()
+    cache = SessionStateCache(store, max_sessions=10)
+
+    async def run():
+        await chat(cache, "s", "q1")
+        store.fail_next = True
+        with pytest.raises(RuntimeError):
+            await chat(cache, "s", "q2")
+        # The next turn reloads what the store really has.
+        await chat(cache, "s", "q3")
+
+    asyncio.run(run())
+    assert contents(store, "s") == ["q1", "answer to q1", "q3", "answer to q3"]
+    assert store.get_calls == 2
@@ -0,0 +1,82 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from memory.flat_index import FlatIndexClient
+from memory.milvus_manager import MilvusManager, decode_vector, encode_vectors
+
+DIM = 16
+
+
+def make_manager(
+    path: Path, vector_type: str, oversample: int | None = None, full_precision: bool = False
+) -> MilvusManager:
+    manager = MilvusManager(client=FlatIndexClient(path))
+    manager.vector_type = vector_type
+    manager.rescore_oversample = oversample
+    manager.rescore_full_precision = full_precision
+    manager.create_collection(dim=DIM)
+    return manager
+
+
+def insert(manager: MilvusManager, vectors: np.ndarray) -> None:
+    manager.insert_batch([
+        {
+            "vector": vector,
+            "text_content": f"chunk {index}",
+            "page_number": index,
+            "source": "thesis.pdf",
+            "chunk_hash": f"hash{index}",
+        }
+        for index, vector in enumerate(vectors.tolist())
+    ])
+
+
+def cosine(a: np.ndarray, b: np.ndarray) -> float:
+    return float(a @ b / (np.linalg.norm(a) * np.linalg.norm(b)))
+
+
+def test_binary_vectors_round_trip_as_signs():
+    vector = np.linspace(-1, 1, DIM)
+    (encoded,) = encode_vectors([vector.tolist()], "binary")
+
+    assert len(encoded) == DIM // 8
+    assert decode_vector(encoded, "binary", DIM).tolist() == np.where(vector > 0, 1, -1).tolist()
+
+
+def test_binary_hamming_distance_becomes_cosine(tmp_path: Path):
+    manager = make_manager(tmp_path, "binary")
+    signs = np.ones((2, DIM), dtype=np.float32)
+    signs[1, : DIM // 4] = -1
+    insert(manager, signs)
+
+    (hits,) = manager.search_by_vector(signs[0].tolist(), limit=2)
+    # Sign vectors differing in d of 16 bits have a cosine of 1 - 2d/16.
+    assert [hit["distance"] for hit in hits] == [1.0, pytest.approx(1 - 2 * 4 / DIM)]
+    assert hits[1]["distance"] == pytest.approx(cosine(signs[0], signs[1]))
+
+
+def test_rescore_ranks_shortlists_by_full_precision_cosine(tmp_path: Path):
+    vectors = np.random.default_rng(0).standard_normal((40, DIM)).astype(np.float32)
+    query = vectors[0] + 0.3 * vectors[1]
+    expected = sorted(range(len(vectors)), key=lambda i: -cosine(query, vectors[i]))[:3]
+    manager = make_manager(tmp_path, "binary", oversample=10, full_precision=True)
+    insert(manager, vectors)
+
+    (hits,) = manager.search_by_vector(query.tolist(), limit=3)
+    assert [hit["entity"]["page_number"] for hit in hits] == expected
+    for hit in hits:
+        exact = cosine(query, vectors[hit["entity"]["page_number"]])
+        assert hit["distance"] == pytest.approx(exact, abs=1e-5)
+
+
+def test_rescore_without_a_full_precision_copy_uses_decoded_vectors(tmp_path: Path):
+    vectors = np.random.default_rng(1).standard_normal((10, DIM)).astype(np.float32)
+    manager = make_manager(tmp_path, "binary", oversample=2)
+    insert(manager, vectors)
+    assert not manager.has_full_precision
+
+    (hits,) = manager.search_by_vector(vectors[0].tolist(), limit=1)
+    signs = np.where(vectors[0] > 0, 1.0, -1.0)
+    assert hits[0]["distance"] == pytest.approx(cosine(vectors[0], signs), abs=1e-5)